@@ -0,0 +1,66 @@
+import time
+
+from prometheus_client import Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "playfriends_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+HTTP_RESPONSE_SIZE_BYTES = Histogram(
+    "playfriends_http_response_size_bytes",
+    "HTTP response body size by route template",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "playfriends_http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class PrometheusMiddleware:
+    """
+    요청별 지연 시간, 응답 크기, 상태 코드를 라우트 템플릿(예: /api/v1/groups/{group_id}) 단위로 기록하는 ASGI 미들웨어.
+    실제 경로 대신 템플릿을 라벨로 사용하므로 라벨 수가 라우트 수로 제한됩니다.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            # 라우팅이 끝나면 FastAPI가 매칭된 라우트를 scope["route"]에 기록합니다.
+            route = scope.get("route")
+            route_path = getattr(route, "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_SECONDS.labels(method, route_path, str(status_code)).observe(elapsed)
+            HTTP_RESPONSE_SIZE_BYTES.labels(method, route_path).observe(response_size)
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.db.session import get_db
+from app.models.activity import ActivityModel
+from app.models.user import UserModel
+from app.core.security import get_current_user
+from app.schemas.activity import ActivityCreate, ActivityUpdate
+from app.services.activity_service import ActivityService
+
+router = APIRouter()
+
+def get_activity_service(db: AsyncIOMotorClient = Depends(get_db)) -> ActivityService:
+    return ActivityService(db)
+
+@router.post("/activities/", response_model=ActivityModel, status_code=status.HTTP_201_CREATED)
+async def create_activity(
+    activity_data: ActivityCreate,
+    service: ActivityService = Depends(get_activity_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Add an activity to the catalog and update its category's play_attributes.
+    """
+    try:
+        return await service.create_activity(activity_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/activities/{activity_id}", response_model=ActivityModel)
+async def get_activity(
+    activity_id: str,
+    service: ActivityService = Depends(get_activity_service)
+):
+    """
+    Get a single activity by ID.
+    """
+    activity = await service.get_activity(activity_id)
+    if not activity:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found")
+    return activity
+
+@router.put("/activities/{activity_id}", response_model=ActivityModel)
+async def update_activity(
+    activity_id: str,
+    activity_data: ActivityUpdate,
+    service: ActivityService = Depends(get_activity_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Update an activity. The old and new category play_attributes are adjusted incrementally.
+    """
+    try:
+        activity = await service.update_activity(activity_id, activity_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not activity:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found")
+    return activity
+
+@router.delete("/activities/{activity_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_activity(
+    activity_id: str,
+    service: ActivityService = Depends(get_activity_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Delete an activity and remove its contribution from its category's play_attributes.
+    """
+    if not await service.delete_activity(activity_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found")
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from geopy.distance import geodesic
 
 from app.schemas.group import GroupCreate, GroupUpdate, GroupList, GroupDetailResponse, Message
 from app.schemas.schedule import ScheduleSuggestion
+from app.schemas.rating import RatingCreate
+from app.models.activity_log import ActivityLogModel
 from app.models.user import UserModel
 from app.services.group_service import GroupService
+from app.services.group_preferences import CONSENSUS_STRATEGIES
+from app.services.schedule_job_service import ScheduleJobService
+from app.services.rating_service import RatingService
 from app.schemas.category import CategoryListResponse
-from app.schemas.schedule import ListScheduleResponse
+from app.schemas.schedule import ListScheduleResponse, ScheduleJobResponse
 from app.db.session import get_db
 from app.core.security import get_current_user
 
@@ -17,6 +23,19 @@ router = APIRouter()
 def get_group_service(db: AsyncIOMotorClient = Depends(get_db)) -> GroupService:
     return GroupService(db)
 
+def validate_strategy(
+    strategy: Optional[str] = Query(None, description="그룹 선호도 합의 전략 (mean, weighted, least_misery, most_pleasure, variance_penalized). 없으면 그룹의 기본 선호도")
+) -> Optional[str]:
+    if strategy is not None and strategy not in CONSENSUS_STRATEGIES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown strategy. Choose from: {', '.join(CONSENSUS_STRATEGIES)}")
+    return strategy
+
+def get_schedule_job_service(db: AsyncIOMotorClient = Depends(get_db)) -> ScheduleJobService:
+    return ScheduleJobService(db)
+
+def get_rating_service(request: Request, db: AsyncIOMotorClient = Depends(get_db)) -> RatingService:
+    return RatingService(db, getattr(request.app.state, "rating_buffer", None))
+
 @router.post("/groups/", response_model=GroupDetailResponse, status_code=status.HTTP_201_CREATED)
 async def create_group(
     group_data: GroupCreate,
@@ -134,6 +153,7 @@ async def leave_group(
 @router.post("/groups/{group_id}/recommend-categories", response_model=CategoryListResponse)
 async def recommend_categories(
     group_id: str,
+    strategy: Optional[str] = Depends(validate_strategy),
     service: GroupService = Depends(get_group_service),
     current_user: UserModel = Depends(get_current_user)
 ):
@@ -147,13 +167,14 @@ async def recommend_categories(
     if group.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the group owner can get recommendations")
 
-    categories = await service.recommend_categories(group_id)
+    categories = await service.recommend_categories(group_id, strategy=strategy)
     return categories
 
 @router.post("/groups/{group_id}/schedules", response_model=ListScheduleResponse, status_code=status.HTTP_201_CREATED)
 async def create_schedule(
     group_id: str,
     categories: List[str] = Body(..., embed=True),
+    strategy: Optional[str] = Depends(validate_strategy),
     service: GroupService = Depends(get_group_service),
     current_user: UserModel = Depends(get_current_user)
 ):
@@ -166,11 +187,123 @@ async def create_schedule(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
     if str(current_user.id) not in [member.id for member in group.members]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can create a schedule")
-    schedules = await service.create_schedules(group_id, categories)
+    schedules = await service.create_schedules(group_id, categories, strategy=strategy)
     if not schedules:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to create schedule. Check group times or selected categories.")
     return schedules
 
+@router.post("/groups/{group_id}/schedules/stream", status_code=status.HTTP_200_OK)
+async def stream_schedule(
+    group_id: str,
+    request: Request,
+    categories: List[str] = Body(..., embed=True),
+    format: Optional[str] = Query(None, description="sse 또는 ndjson (기본값: Accept 헤더, 없으면 sse)"),
+    strategy: Optional[str] = Depends(validate_strategy),
+    service: GroupService = Depends(get_group_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Stream schedule suggestions as they become ready.
+    Each candidate is first sent with its local timeline (source="local"); when Gemini refinement
+    finishes, the refined schedule with the same index follows (source="llm"). The stream ends with a "done" event.
+    """
+    group = await service.get_group(group_id)
+    if not group:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+    if str(current_user.id) not in [member.id for member in group.members]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can create a schedule")
+
+    if format is None:
+        format = "ndjson" if "application/x-ndjson" in request.headers.get("accept", "") else "sse"
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be sse or ndjson")
+
+    async def event_stream():
+        async for event in service.stream_schedules(group_id, categories, strategy=strategy):
+            payload = event.model_dump_json(exclude_none=True)
+            if format == "sse":
+                yield f"event: {event.event}\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    # 프록시가 응답을 모아서 보내지 않도록 버퍼링을 끕니다.
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(), media_type=media_type, headers=headers)
+
+@router.post("/groups/{group_id}/schedules/jobs", response_model=ScheduleJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_schedule_job(
+    group_id: str,
+    request: Request,
+    categories: List[str] = Body(..., embed=True),
+    strategy: Optional[str] = Depends(validate_strategy),
+    service: GroupService = Depends(get_group_service),
+    job_service: ScheduleJobService = Depends(get_schedule_job_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Queue schedule generation and return the job immediately.
+    If the same request for this group is already pending or running and the group's members and
+    preferences have not changed since, that job is returned instead (deduplicated=true). Poll GET /groups/{group_id}/schedules/jobs/{job_id} for the result.
+    """
+    group = await service.get_group(group_id)
+    if not group:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+    if str(current_user.id) not in [member.id for member in group.members]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can create a schedule")
+
+    job, created = await job_service.submit(
+        group_id, categories, str(current_user.id), strategy=strategy, preference_version=group.preference_version
+    )
+    worker_pool = getattr(request.app.state, "schedule_job_pool", None)
+    if created and worker_pool:
+        worker_pool.notify()
+    return ScheduleJobResponse.from_job(job, deduplicated=not created)
+
+@router.get("/groups/{group_id}/schedules/jobs/{job_id}", response_model=ScheduleJobResponse)
+async def get_schedule_job(
+    group_id: str,
+    job_id: str,
+    service: GroupService = Depends(get_group_service),
+    job_service: ScheduleJobService = Depends(get_schedule_job_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Get the status of a schedule generation job, including the schedules once it has succeeded.
+    """
+    job = await job_service.get_job(job_id)
+    if not job or job.group_id != group_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule job not found")
+    group = await service.get_group(group_id)
+    if not group:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+    if str(current_user.id) not in [member.id for member in group.members]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can view schedule jobs")
+    return ScheduleJobResponse.from_job(job)
+
+@router.post("/groups/{group_id}/ratings", response_model=ActivityLogModel, status_code=status.HTTP_202_ACCEPTED)
+async def rate_activity(
+    group_id: str,
+    rating: RatingCreate,
+    service: GroupService = Depends(get_group_service),
+    rating_service: RatingService = Depends(get_rating_service),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Rate an activity the group did together (1-5).
+    Ratings are buffered and written in batches, then feed the collaborative-filtering model used to rank activities.
+    """
+    group = await service.get_group(group_id)
+    if not group:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+    if str(current_user.id) not in [member.id for member in group.members]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only group members can rate activities")
+
+    log = await rating_service.record_rating(str(current_user.id), group_id, rating.activity_id, rating.rating)
+    if not log:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found")
+    return log
+
 @router.post("/groups/schedule", response_model=GroupDetailResponse, summary="그룹 스케줄 확정 및 저장")
 async def confirm_schedule(
     suggestion: ScheduleSuggestion,
@@ -1,6 +1,10 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
+from typing import List
 import secrets
 
+from app.core.slots import validate_slot_rule
+
 class Settings(BaseSettings):
     MONGO_URI: str
     MONGO_DATABASE: str
@@ -9,6 +13,110 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # 주기 작업 스케줄러: "leader"(리스를 가진 인스턴스만 실행), "local"(모든 인스턴스 실행), "off"
+    SCHEDULER_MODE: str = "leader"
+    SCHEDULER_LEASE_TTL_SECONDS: int = 60
+    SCHEDULER_LEASE_RENEW_SECONDS: int = 20
+
+    # opentelemetry가 설치되어 있을 때 추천 파이프라인 단계별 스팬을 생성할지 여부
+    OTEL_TRACING_ENABLED: bool = False
+
+    # 카탈로그 메모리 캐시(활동 특성 배열, 카테고리 인덱스)의 최대 재사용 시간. catalog_meta 버전이 바뀌면 즉시 다시 만듭니다.
+    CATALOG_CACHE_MAX_AGE_SECONDS: int = 300
+
+    # Gemini 호출 계층: 동시 호출 수, 초당 호출 수(버킷 크기), 호출당 타임아웃, 재시도, 서킷 브레이커
+    GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_RATE_LIMIT_PER_SECOND: float = 5.0
+    GEMINI_RATE_LIMIT_BURST: int = 10
+    GEMINI_CALL_TIMEOUT_SECONDS: float = 10.0
+    GEMINI_MAX_RETRIES: int = 2
+    GEMINI_RETRY_BASE_SECONDS: float = 0.5
+    GEMINI_RETRY_MAX_SECONDS: float = 4.0
+    GEMINI_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    GEMINI_CIRCUIT_RESET_SECONDS: float = 30.0
+    # 스케줄 생성 요청 하나가 Gemini 호출에 쓸 수 있는 총 시간. 넘으면 나머지 스케줄은 로컬 타임라인을 사용합니다.
+    GEMINI_REQUEST_BUDGET_SECONDS: float = 20.0
+    # 후보 스케줄들을 한 번의 프롬프트로 보정할지 여부 (False면 스케줄마다 따로 호출)
+    GEMINI_BATCH_REFINEMENT: bool = True
+
+    # 비동기 스케줄 생성 작업: 인스턴스당 워커 수(0이면 실행 안 함), 대기 작업 폴링 간격, 실행 리스,
+    # 리스 만료로 다시 시도할 최대 횟수, 끝난 작업 보관 기간
+    SCHEDULE_JOB_WORKERS: int = 2
+    SCHEDULE_JOB_POLL_SECONDS: float = 1.0
+    SCHEDULE_JOB_LEASE_SECONDS: int = 60
+    SCHEDULE_JOB_MAX_ATTEMPTS: int = 3
+    SCHEDULE_JOB_RETENTION_SECONDS: int = 86400
+
+    # 같은 그룹의 동시 추천/스케줄 요청 합치기. 인스턴스 안에서는 항상 합치고, DISTRIBUTED이면 MongoDB 리스로
+    # 인스턴스 간에도 합칩니다 (리스 TTL, 결과 공유 시간, 다른 인스턴스 결과를 기다리는 최대 시간, 폴링 간격).
+    SINGLEFLIGHT_DISTRIBUTED: bool = False
+    SINGLEFLIGHT_LOCK_TTL_SECONDS: int = 30
+    SINGLEFLIGHT_RESULT_SECONDS: float = 5.0
+    SINGLEFLIGHT_WAIT_SECONDS: float = 25.0
+    SINGLEFLIGHT_POLL_SECONDS: float = 0.2
+
+    # 그룹별 카테고리 추천 캐시(preference_version 기준): 메모리 LRU 크기, MongoDB 계층(group_recommendations) 사용 여부
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = 10000
+    RECOMMENDATION_CACHE_MONGO: bool = False
+
+    # 그룹 기본 통합 선호도의 합의 전략 (mean, weighted, least_misery, most_pleasure, variance_penalized),
+    # weighted에서 방장의 가중치 (다른 멤버는 1), variance_penalized에서 음식 점수 표준편차에 곱하는 계수
+    GROUP_PREFERENCE_STRATEGY: str = "mean"
+    GROUP_PREFERENCE_OWNER_WEIGHT: float = 1.0
+    CONSENSUS_VARIANCE_PENALTY: float = 0.5
+
+    # 협업 필터링(scripts/train_factors.py) 예측 점수를 활동 순위에 섞는 비율. 0이면 사용하지 않습니다.
+    CF_BLEND_WEIGHT: float = 0.2
+
+    # 평점 쓰기 버퍼: 한 번에 insert_many할 최대 개수, 최대 대기 시간(초), 메모리에 쌓아 둘 최대 개수
+    # (가득 차면 버퍼를 거치지 않고 바로 씁니다), 평점 하나를 쓰려고 시도할 최대 횟수(넘으면 activity_logs_dead_letter로 옮김).
+    # 0 이하의 배치 크기는 버퍼를 사용하지 않습니다. 집계 중복 반영을 막는 평점 ID 기록의 보관 기간(초)
+    RATING_BUFFER_BATCH_SIZE: int = 500
+    RATING_BUFFER_FLUSH_SECONDS: float = 1.0
+    RATING_BUFFER_MAX_PENDING: int = 20000
+    RATING_BUFFER_MAX_ATTEMPTS: int = 3
+    RATING_RECEIPT_RETENTION_SECONDS: int = 7 * 86400
+
+    # 카테고리별 활동 IVF 인덱스 (scripts/export_features.py가 만들고, 파일이 없으면 전체 탐색): 사용할 최소 활동 수
+    # (그보다 작으면 전체 탐색), 리스트당 최소 평균 활동 수(리스트 수는 sqrt(활동 수)를 넘지 않음),
+    # 첫 라운드에 볼 리스트 수(라운드마다 두 배), 최대로 볼 리스트 수(0이면 제한 없음 = 전체 탐색과 같은 결과), 인덱스 파일 경로
+    ANN_MIN_CATEGORY_SIZE: int = 2000
+    ANN_LIST_SIZE: int = 16
+    ANN_LISTS_PER_ROUND: int = 4
+    ANN_MAX_LISTS: int = 0
+    ANN_INDEX_DIR: str = ".cache/ann"
+
+    # scripts/export_features.py가 활동 특성 배열을 내보내는 경로. 워커는 catalog 버전이 같은 저장소를 메모리 맵으로 열고,
+    # 없으면 MongoDB에서 다시 만듭니다. 빈 문자열이면 사용하지 않습니다.
+    FEATURE_STORE_DIR: str = ".cache/features"
+
+    # 시간대 기반 카테고리 추천 규칙. 환경 변수에는 JSON 배열로 지정합니다.
+    # start/end는 "HH:MM"(end가 start보다 이르면 자정을 넘는 슬롯), match는 overlap(그룹 시간과 겹침) 또는 start(그룹 시작 시각이 슬롯 안)
+    CATEGORY_SLOT_RULES: List[dict] = [
+        {"category": "식당", "start": "11:30", "end": "14:00", "match": "overlap"},
+        {"category": "식당", "start": "17:30", "end": "20:00", "match": "overlap"},
+        {"category": "주점", "start": "20:00", "end": "24:00", "match": "start"},
+    ]
+
+    @field_validator("GROUP_PREFERENCE_STRATEGY")
+    @classmethod
+    def _validate_group_preference_strategy(cls, strategy: str) -> str:
+        # group_preferences는 settings를 가져오지 않으므로 여기서 가져와도 순환하지 않습니다.
+        from app.services.group_preferences import CONSENSUS_STRATEGIES
+
+        if strategy not in CONSENSUS_STRATEGIES:
+            raise ValueError(f"unknown group preference strategy {strategy!r} (expected one of {', '.join(CONSENSUS_STRATEGIES)})")
+        return strategy
+
+    @field_validator("CATEGORY_SLOT_RULES")
+    @classmethod
+    def _validate_slot_rules(cls, rules: List[dict]) -> List[dict]:
+        # 잘못된 규칙이 추천 요청마다 500을 내지 않도록 시작할 때 확인합니다.
+        for rule in rules:
+            validate_slot_rule(rule)
+        return rules
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.enums import (
+    ActivityType,
+    FoodIngredient,
+    FoodTaste,
+    FoodCookingMethod,
+    FoodCuisineType,
+)
+
+# 추천 계산에 사용하는 고정된 특성 순서. 배열 표현과 pydantic 모델 간 변환의 기준이 됩니다.
+PLAY_DIMENSIONS: Tuple[str, ...] = (
+    "crowd_level",
+    "activeness_level",
+    "trend_level",
+    "planning_level",
+    "location_preference",
+    "vibe_level",
+)
+
+FOOD_FAMILIES: Tuple[Tuple[str, type], ...] = (
+    ("ingredients", FoodIngredient),
+    ("tastes", FoodTaste),
+    ("cooking_methods", FoodCookingMethod),
+    ("cuisine_types", FoodCuisineType),
+)
+
+ACTIVITY_TYPE_CODES: Dict[str, int] = {
+    ActivityType.FOOD.value: 1,
+    ActivityType.ACTIVITY.value: 2,
+}
+FOOD_TYPE_CODE = ACTIVITY_TYPE_CODES[ActivityType.FOOD.value]
+PLAY_TYPE_CODE = ACTIVITY_TYPE_CODES[ActivityType.ACTIVITY.value]
+
+# 음식 속성 항목별 enum 값 개수와, 항목을 이어 붙인 비트 벡터에서 각 항목이 시작하는 위치
+FOOD_FAMILY_WIDTHS: Tuple[int, ...] = tuple(len(enum) for _, enum in FOOD_FAMILIES)
+FOOD_FAMILY_OFFSETS: Tuple[int, ...] = tuple(int(offset) for offset in np.cumsum((0,) + FOOD_FAMILY_WIDTHS[:-1]))
+FOOD_BIT_COUNT = sum(FOOD_FAMILY_WIDTHS)
+
+# 사용자/그룹 선호도 벡터 크기: 음식 점수(FOOD_BIT_COUNT) + 놀이 선호도(PLAY_DIMENSIONS)
+PREFERENCE_VECTOR_SIZE = FOOD_BIT_COUNT + len(PLAY_DIMENSIONS)
+
+# 음식 속성 항목별로 enum 값 -> 항목 안에서의 위치 (enum 선언 순서)
+_FOOD_POSITIONS: Dict[str, Dict[str, int]] = {
+    family: {member.value: position for position, member in enumerate(enum)}
+    for family, enum in FOOD_FAMILIES
+}
+# 음식 속성 항목별로 enum 값 -> 비트
+_FOOD_BITS: Dict[str, Dict[str, int]] = {
+    family: {value: 1 << position for value, position in positions.items()}
+    for family, positions in _FOOD_POSITIONS.items()
+}
+
+
+def _enum_value(value) -> str:
+    return value.value if hasattr(value, "value") else value
+
+
+def _field(obj, name: str):
+    """pydantic 모델과 MongoDB 문서(dict)에서 같은 방식으로 필드를 읽습니다."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def encode_food_masks(food_attributes: Optional[dict]) -> Tuple[int, ...]:
+    """음식 속성(dict)을 FOOD_FAMILIES 순서의 항목별 비트마스크로 변환합니다."""
+    if not food_attributes:
+        return (0,) * len(FOOD_FAMILIES)
+    masks = []
+    for family, _ in FOOD_FAMILIES:
+        bits = _FOOD_BITS[family]
+        mask = 0
+        for value in food_attributes.get(family) or []:
+            mask |= bits.get(_enum_value(value), 0)
+        masks.append(mask)
+    return tuple(masks)
+
+
+def encode_play_vector(play_attributes: Optional[dict]) -> List[float]:
+    """놀이 속성(dict)을 PLAY_DIMENSIONS 순서의 벡터로 변환합니다. 없는 항목은 모델 기본값인 0입니다."""
+    play_attributes = play_attributes or {}
+    return [float(play_attributes.get(dimension) or 0.0) for dimension in PLAY_DIMENSIONS]
+
+
+def food_preference_vector(food_preferences) -> np.ndarray:
+    """
+    FoodPreferences(또는 그 형태의 dict)를 FOOD_FAMILIES 순서로 이어 붙인 길이 FOOD_BIT_COUNT의 점수 벡터로 변환합니다.
+    같은 값이 여러 번 있으면 마지막 점수를, 없는 값은 0을 사용합니다.
+    """
+    vector = np.zeros(FOOD_BIT_COUNT, dtype=np.float64)
+    if not food_preferences:
+        return vector
+    for (family, _), offset in zip(FOOD_FAMILIES, FOOD_FAMILY_OFFSETS):
+        positions = _FOOD_POSITIONS[family]
+        for preference in _field(food_preferences, family) or []:
+            position = positions.get(_enum_value(_field(preference, "name")))
+            if position is not None:
+                vector[offset + position] = _field(preference, "score") or 0.0
+    return vector
+
+
+def preference_vector(food_preferences, play_preferences) -> np.ndarray:
+    """
+    사용자/그룹 선호도를 길이 PREFERENCE_VECTOR_SIZE의 벡터로 변환합니다.
+    앞 FOOD_BIT_COUNT개는 food_preference_vector, 나머지는 PLAY_DIMENSIONS 순서의 놀이 선호도입니다.
+    pydantic 모델과 MongoDB 문서(dict) 모두 받으며, 없는 값은 0입니다.
+    """
+    vector = np.empty(PREFERENCE_VECTOR_SIZE, dtype=np.float64)
+    vector[:FOOD_BIT_COUNT] = food_preference_vector(food_preferences)
+    vector[FOOD_BIT_COUNT:] = [_field(play_preferences, dimension) or 0.0 for dimension in PLAY_DIMENSIONS] if play_preferences else 0.0
+    return vector
+
+
+def food_preferences_from_vector(vector: np.ndarray) -> dict:
+    """preference_vector(또는 food_preference_vector)의 음식 부분을 FoodPreferences 형태의 dict로 되돌립니다."""
+    return {
+        family: [
+            {"name": member.value, "score": float(vector[offset + position])}
+            for position, member in enumerate(enum)
+        ]
+        for (family, enum), offset in zip(FOOD_FAMILIES, FOOD_FAMILY_OFFSETS)
+    }
+
+
+def play_preferences_from_vector(vector: np.ndarray) -> dict:
+    """preference_vector의 놀이 부분을 PlayPreferences 형태의 dict로 되돌립니다."""
+    return {dimension: float(value) for dimension, value in zip(PLAY_DIMENSIONS, vector[FOOD_BIT_COUNT:])}
+
+
+def expand_food_masks(food_masks: np.ndarray) -> np.ndarray:
+    """
+    (n, 4) 항목별 비트마스크를 (n, FOOD_BIT_COUNT) 0/1 행렬로 펼칩니다.
+    음식 선호도 점수는 이 행렬과 food_preference_vector의 곱, 두 활동의 공통 속성 수는 행 간 내적입니다.
+    """
+    food_masks = np.asarray(food_masks, dtype=np.uint32).reshape(-1, len(FOOD_FAMILIES))
+    columns = [
+        (food_masks[:, family, None] >> np.arange(width, dtype=np.uint32)) & 1
+        for family, width in enumerate(FOOD_FAMILY_WIDTHS)
+    ]
+    return np.concatenate(columns, axis=1).astype(np.uint8)
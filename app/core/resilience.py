@@ -0,0 +1,104 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """남은 시간 안에 작업을 시작하거나 끝낼 수 없습니다."""
+
+
+class CircuitOpenError(Exception):
+    """외부 서비스가 비정상으로 판단되어 호출하지 않습니다."""
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """time.monotonic() 기준 deadline까지 남은 초. deadline이 없으면 None입니다."""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """attempt(0부터)번째 재시도 전 대기 시간. 지수 백오프에 full jitter를 적용합니다."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    초당 rate개의 토큰이 최대 capacity개까지 채워지는 토큰 버킷.
+    acquire는 토큰이 생길 때까지 기다리며, deadline 전에 토큰을 얻을 수 없으면 기다리지 않고 DeadlineExceeded를 발생시킵니다.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, deadline: Optional[float] = None):
+        if self.rate <= 0:
+            return
+        # 락을 잡은 채로 기다려 대기 순서대로 토큰을 받게 합니다.
+        async with self._lock:
+            self._refill()
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            time_left = remaining(deadline)
+            if time_left is not None and wait > time_left:
+                raise DeadlineExceeded("rate limit wait exceeds the deadline")
+            if wait > 0:
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold번 쌓이면 열리고(open), reset_seconds 동안 호출을 막습니다.
+    그 뒤에는 한 번의 시험 호출만 허용(half-open)하여 성공하면 닫히고, 실패하면 다시 열립니다.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def cancel_trial(self):
+        """half-open 시험 호출이 성공/실패를 판단할 수 없이 끝났을 때 다른 시험 호출을 허용합니다."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
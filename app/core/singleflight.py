@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from prometheus_client import Counter
+
+SINGLEFLIGHT_CALLS = Counter(
+    "playfriends_singleflight_calls_total",
+    "Calls through a single-flight group by operation and role (leader runs the work, follower shares it)",
+    ["operation", "role"],
+)
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합칩니다.
+
+    첫 호출(leader)만 작업을 실행하고, 작업이 끝나기 전에 같은 키로 들어온 호출(follower)은 같은 결과나
+    예외를 받습니다. 작업이 끝나면 키를 지우므로 결과를 캐시하지는 않습니다.
+    작업은 별도 태스크로 실행되어, 호출자 하나가 취소되어도 나머지 호출자의 작업은 계속됩니다.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.labels(self.operation, "leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.operation, "follower").inc()
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # 모든 호출자가 취소된 뒤 실패한 작업의 예외가 "never retrieved" 경고로 남지 않게 합니다.
+            task.exception()
@@ -0,0 +1,37 @@
+from typing import Any
+
+# 시간대 규칙(CATEGORY_SLOT_RULES) 형식. 설정 검증에서도 쓰므로 settings에 의존하지 않습니다.
+MINUTES_PER_DAY = 24 * 60
+
+# 규칙 매칭 방식
+# - overlap: 그룹 시간 범위가 슬롯과 겹치면 추천 (예: 점심/저녁 시간대의 식당)
+# - start: 그룹 시작 시각이 슬롯 안에 있으면 추천 (예: 20시 이후에 시작하는 모임의 주점)
+MATCH_OVERLAP = "overlap"
+MATCH_START = "start"
+SLOT_MATCHES = (MATCH_OVERLAP, MATCH_START)
+
+
+def parse_minutes(value: Any) -> int:
+    """'HH:MM'을 자정부터의 분으로 바꿉니다. 하루의 끝은 '24:00'으로 쓸 수 있습니다."""
+    if not isinstance(value, str):
+        raise ValueError(f"invalid time of day: {value!r}")
+    hours, _, minutes = value.partition(":")
+    try:
+        total = int(hours) * 60 + int(minutes or 0)
+    except ValueError:
+        raise ValueError(f"invalid time of day: {value!r}") from None
+    if not 0 <= total <= MINUTES_PER_DAY or not 0 <= int(minutes or 0) < 60:
+        raise ValueError(f"invalid time of day: {value!r}")
+    return total
+
+
+def validate_slot_rule(rule: Any) -> None:
+    """규칙 하나의 형식을 검사합니다. 잘못되었으면 ValueError를 발생시킵니다."""
+    if not isinstance(rule, dict):
+        raise ValueError(f"slot rule must be an object: {rule!r}")
+    if not isinstance(rule.get("category"), str) or not rule["category"]:
+        raise ValueError(f"slot rule needs a category name: {rule!r}")
+    parse_minutes(rule.get("start"))
+    parse_minutes(rule.get("end"))
+    if rule.get("match", MATCH_OVERLAP) not in SLOT_MATCHES:
+        raise ValueError(f"unknown slot rule match {rule.get('match')!r} (expected one of {', '.join(SLOT_MATCHES)})")
@@ -0,0 +1,118 @@
+import contextlib
+import contextvars
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # OpenTelemetry는 선택 의존성입니다.
+    otel_trace = None
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "playfriends_pipeline_stage_seconds",
+    "Time spent in each stage of a recommendation pipeline",
+    ["operation", "stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+PIPELINE_ITEMS = Counter(
+    "playfriends_pipeline_items_total",
+    "Items processed by a recommendation pipeline (pool sizes, combos evaluated, permutations pruned, ...)",
+    ["operation", "counter"],
+)
+
+_trace_collectors: contextvars.ContextVar[Optional[List["PipelineTrace"]]] = contextvars.ContextVar(
+    "pipeline_trace_collectors", default=None
+)
+
+
+class PipelineTrace:
+    """
+    추천 파이프라인 한 번의 실행에 대한 단계별 소요 시간과 카운터를 기록합니다.
+
+    단계 시간과 카운터는 실행 중에는 dict에만 누적되고, finish() 시점에 한 번씩 Prometheus로 내보내므로
+    운영 환경에서 켜 두어도 부담이 적습니다. OTEL_TRACING_ENABLED이고 opentelemetry가 설치되어 있으면
+    단계마다 OpenTelemetry 스팬도 생성합니다.
+
+        with PipelineTrace("create_schedules") as trace:
+            with trace.stage("fetch_activities"):
+                ...
+            trace.count("combos_evaluated", n)
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.duration = 0.0
+        self._start = 0.0
+        self._tracer = otel_trace.get_tracer("playfriends") if otel_trace and settings.OTEL_TRACING_ENABLED else None
+        self._root_span_cm = None
+
+    def __enter__(self) -> "PipelineTrace":
+        self._start = time.perf_counter()
+        if self._tracer:
+            self._root_span_cm = self._tracer.start_as_current_span(self.operation)
+            self._root_span_cm.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        self.finish()
+        if self._root_span_cm:
+            span = otel_trace.get_current_span()
+            for name, value in self.counters.items():
+                span.set_attribute(f"playfriends.{name}", value)
+            self._root_span_cm.__exit__(exc_type, exc, tb)
+        return False
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """with 블록의 소요 시간을 단계 이름에 누적합니다. 같은 단계가 여러 번 실행되면 합산됩니다."""
+        span_cm = self._tracer.start_as_current_span(f"{self.operation}.{name}") if self._tracer else None
+        if span_cm:
+            span_cm.__enter__()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+            if span_cm:
+                span_cm.__exit__(None, None, None)
+
+    def count(self, name: str, value: float = 1):
+        self.counters[name] += value
+
+    def finish(self):
+        for name, elapsed in self.stages.items():
+            PIPELINE_STAGE_SECONDS.labels(self.operation, name).observe(elapsed)
+        PIPELINE_STAGE_SECONDS.labels(self.operation, "total").observe(self.duration)
+        for name, value in self.counters.items():
+            PIPELINE_ITEMS.labels(self.operation, name).inc(value)
+
+        collectors = _trace_collectors.get()
+        if collectors is not None:
+            collectors.append(self)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "operation": self.operation,
+            "duration_seconds": self.duration,
+            "stages": dict(self.stages),
+            "counters": dict(self.counters),
+        }
+
+
+@contextlib.contextmanager
+def collect_pipeline_traces() -> Iterator[List[PipelineTrace]]:
+    """블록 안에서 완료된 PipelineTrace를 리스트로 모읍니다. (벤치마크/디버깅용)"""
+    collected: List[PipelineTrace] = []
+    token = _trace_collectors.set(collected)
+    try:
+        yield collected
+    finally:
+        _trace_collectors.reset(token)
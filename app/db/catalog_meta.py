@@ -0,0 +1,72 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.database import Database
+
+from app.core.config import settings
+
+# catalog_meta 컬렉션은 카탈로그 종류별 버전 번호를 저장합니다.
+# 데이터를 바꾸는 쪽이 버전을 올리면, 각 인스턴스의 메모리 캐시/인덱스가 버전 차이를 보고 다시 만들어집니다.
+ACTIVITIES_CATALOG = "activities"
+CATEGORIES_CATALOG = "categories"
+# 협업 필터링 잠재 요인 모델. 버전 문서에 현재 모델 정보(global_mean 등)도 함께 저장합니다.
+FACTORS_CATALOG = "factors"
+
+
+async def get_catalog_version(db: AsyncIOMotorDatabase, name: str) -> int:
+    meta = await db.catalog_meta.find_one({"_id": name})
+    return meta.get("version", 0) if meta else 0
+
+
+async def bump_catalog_version(db: AsyncIOMotorDatabase, name: str) -> None:
+    await db.catalog_meta.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+
+def bump_catalog_version_sync(db: Database, name: str) -> None:
+    """pymongo(동기) 클라이언트를 쓰는 스크립트용입니다."""
+    db.catalog_meta.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+
+
+class CatalogCache:
+    """
+    카탈로그에서 만든 메모리 스냅샷(특성 배열, 인덱스 등)을 프로세스 단위로 재사용합니다.
+    catalog_meta 버전이 바뀌었거나, 다른 DB를 가리키거나, CATALOG_CACHE_MAX_AGE_SECONDS가 지나면
+    build(db)로 다시 만듭니다.
+    """
+
+    def __init__(self, name: str, build: Callable[[AsyncIOMotorDatabase], Awaitable[Any]]):
+        self.name = name
+        self._build = build
+        self._value: Optional[Any] = None
+        self._source = None
+        self._version = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, source, version: int) -> bool:
+        return (
+            self._value is not None
+            and self._source == source
+            and self._version == version
+            and time.monotonic() - self._built_at < settings.CATALOG_CACHE_MAX_AGE_SECONDS
+        )
+
+    async def get(self, db: AsyncIOMotorDatabase) -> Any:
+        source = (id(db.client), db.name)
+        version = await get_catalog_version(db, self.name)
+        if self._is_fresh(source, version):
+            return self._value
+
+        async with self._lock:
+            if self._is_fresh(source, version):
+                return self._value
+            self._value = await self._build(db)
+            self._source = source
+            self._version = version
+            self._built_at = time.monotonic()
+            return self._value
+
+    def invalidate(self):
+        self._value = None
@@ -0,0 +1,56 @@
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import Histogram
+from pymongo import monitoring
+
+MONGO_COMMAND_SECONDS = Histogram(
+    "playfriends_mongo_command_duration_seconds",
+    "MongoDB command latency by command and collection",
+    ["command", "collection", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# 컬렉션과 무관한 연결/인증/세션 관리 명령은 기록하지 않습니다.
+_IGNORED_COMMANDS = {
+    "hello", "ismaster", "isMaster", "ping", "buildinfo", "buildInfo",
+    "saslStart", "saslContinue", "endSessions", "killCursors",
+}
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Motor/PyMongo 명령 이벤트를 받아 컬렉션별 쿼리 수와 소요 시간을 기록합니다.
+    (histogram의 _count가 쿼리 수입니다.) 요청 하나에서 같은 컬렉션으로 find가 반복되는
+    N+1 패턴을 찾는 데 사용합니다.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[object, int], Tuple[str, str]] = {}
+
+    @staticmethod
+    def _collection_name(command_name: str, command: dict) -> Optional[str]:
+        if command_name == "getMore":
+            return command.get("collection")
+        target = command.get(command_name)
+        if isinstance(target, str):
+            return target
+        return None
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        collection = self._collection_name(event.command_name, event.command) or "<database>"
+        self._pending[(event.connection_id, event.request_id)] = (event.command_name, collection)
+
+    def _finish(self, event, outcome: str):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        command_name, collection = pending
+        MONGO_COMMAND_SECONDS.labels(command_name, collection, outcome).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, "failure")
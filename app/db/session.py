@@ -1,7 +1,8 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.db.monitoring import CommandMetricsListener
 
-client = AsyncIOMotorClient(settings.MONGO_URI)
+client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=[CommandMetricsListener()])
 
 async def get_db():
     return client
@@ -1,12 +1,19 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from app.api.routers import example, users, groups
+from app.api.middleware import PrometheusMiddleware
+from app.api.routers import example, users, groups, activities, metrics
 from app.core.config import settings
 from app.db.session import client
+from app.services.activity_features import activity_feature_cache
 from app.services.group_service import GroupService
+from app.services.rating_service import RatingWriteBuffer
+from app.services.schedule_job_service import ScheduleJobService, ScheduleJobWorkerPool
+from app.services.scheduler_service import LeaderElectedScheduler
+from app.services.singleflight_service import MongoSingleFlight
 
-scheduler = AsyncIOScheduler()
+scheduler = LeaderElectedScheduler(client)
+schedule_job_pool = ScheduleJobWorkerPool(client)
+rating_buffer = RatingWriteBuffer(client)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -15,17 +22,39 @@ async def lifespan(app: FastAPI):
     app.mongodb = client[settings.MONGO_DATABASE]
     
     group_service = GroupService(app.mongodb_client)
-    scheduler.add_job(group_service.deactivate_expired_groups, 'cron', hour=0)
+    scheduler.add_job(group_service.deactivate_expired_groups, 'cron', job_id="deactivate_expired_groups", hour=0)
+    schedule_job_service = ScheduleJobService(app.mongodb_client)
+    scheduler.add_job(schedule_job_service.requeue_stale_jobs, 'interval', job_id="requeue_stale_schedule_jobs", seconds=settings.SCHEDULE_JOB_LEASE_SECONDS)
     scheduler.start()
+
+    # 첫 요청 전에 활동 특성을 준비합니다. 내보낸 특성 저장소가 있으면 파일을 매핑하므로 MongoDB를 읽지 않습니다.
+    try:
+        await activity_feature_cache.get(app.mongodb)
+    except Exception as e:
+        print(f"Failed to warm activity features: {e}")
+
+    if settings.SINGLEFLIGHT_DISTRIBUTED:
+        await MongoSingleFlight(app.mongodb_client, "").ensure_indexes()
+
+    await schedule_job_pool.start()
+    app.state.schedule_job_pool = schedule_job_pool
+    await rating_buffer.start()
+    app.state.rating_buffer = rating_buffer
     
     yield
     
     # Shutdown
-    scheduler.shutdown()
+    await schedule_job_pool.shutdown()
+    # 버퍼에 남은 평점은 클라이언트를 닫기 전에 씁니다.
+    await rating_buffer.shutdown()
+    await scheduler.shutdown()
     app.mongodb_client.close()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware)
 
 app.include_router(example.router, tags=["example"])
+app.include_router(metrics.router, tags=["metrics"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(groups.router, prefix="/api/v1", tags=["groups"])
+app.include_router(activities.router, prefix="/api/v1", tags=["activities"])
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 from bson import ObjectId
 import datetime
 from app.schemas.user import FoodPreferences, PlayPreferences
@@ -16,6 +16,8 @@ class GroupModel(BaseModel):
 
     food_preferences: Optional[FoodPreferences] = Field(None, description="그룹의 통합 음식 선호도")
     play_preferences: Optional[PlayPreferences] = Field(None, description="그룹의 통합 놀이 선호도")
+    preference_vectors: Optional[Dict[str, List[float]]] = Field(None, description="합의 전략별 그룹 선호도 벡터 (음식 24 + 놀이 6)")
+    preference_version: int = Field(0, description="멤버, 통합 선호도 또는 시간 범위가 바뀔 때마다 1씩 증가")
 
     schedule: Optional[List[ScheduledActivity]] = Field(None, description="확정된 스케줄")
     distances_km: Optional[List[float]] = Field(None, description="스케줄 장소 간 이동 거리 목록 (km)")
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, List, Optional
+from bson import ObjectId
+import datetime
+
+class ScheduleJobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    ACTIVE = (PENDING, RUNNING)
+
+class ScheduleJobModel(BaseModel):
+    id: str = Field(alias="_id", default=None)
+    group_id: str = Field(..., description="그룹의 ID")
+    categories: List[str] = Field(..., description="선택한 카테고리 이름 목록")
+    strategy: Optional[str] = Field(None, description="그룹 선호도 합의 전략 (없으면 그룹의 기본 선호도)")
+    preference_version: int = Field(0, description="작업을 요청할 때 그룹의 preference_version")
+    requested_by: str = Field(..., description="처음 작업을 요청한 사용자 ID")
+    status: str = Field(ScheduleJobStatus.PENDING, description="pending, running, succeeded 또는 failed")
+    # 대기/실행 중인 동안에만 존재하는 중복 제거 키. 부분 유니크 인덱스로 같은 요청이 하나의 작업을 공유합니다.
+    dedupe_key: Optional[str] = Field(None, description="그룹 ID + preference_version + 카테고리 목록 + 합의 전략의 해시")
+    attempts: int = Field(0, description="워커가 작업을 가져간 횟수")
+    worker_id: Optional[str] = Field(None, description="실행 중인 워커")
+    lease_expires_at: Optional[datetime.datetime] = Field(None, description="이 시간까지 갱신되지 않으면 다시 대기열에 넣습니다")
+    result: Optional[dict] = Field(None, description="ListScheduleResponse")
+    error: Optional[str] = Field(None, description="실패 사유")
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow, description="생성 시간")
+    started_at: Optional[datetime.datetime] = Field(None, description="마지막 실행 시작 시간")
+    finished_at: Optional[datetime.datetime] = Field(None, description="완료 시간")
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def validate_id(cls, v: Any) -> str:
+        if isinstance(v, ObjectId):
+            return str(v)
+        return v
+
+    class Config:
+        from_attributes = True
+        populate_by_name = True
+        json_encoders = {
+            ObjectId: str,
+            datetime.datetime: lambda dt: dt.isoformat(),
+        }
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.core.enums import ActivityType
+from app.models.activity import FoodAttributes, GeoJson, PlayAttributes
+
+class ActivityCreate(BaseModel):
+    name: str = Field(..., description="활동의 이름")
+    type: ActivityType = Field(..., description="FOOD 또는 ACTIVITY 타입")
+    category_id: str = Field(..., description="CategoryModel의 ID")
+    location: Optional[GeoJson] = None
+    food_attributes: Optional[FoodAttributes] = None
+    play_attributes: Optional[PlayAttributes] = None
+
+class ActivityUpdate(BaseModel):
+    name: Optional[str] = None
+    type: Optional[ActivityType] = None
+    category_id: Optional[str] = None
+    location: Optional[GeoJson] = None
+    food_attributes: Optional[FoodAttributes] = None
+    play_attributes: Optional[PlayAttributes] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.models.group import GroupModel
 import datetime
 from .user import FoodPreferences, PlayPreferences
@@ -17,6 +17,7 @@ class GroupUpdate(BaseModel):
     is_active: Optional[bool] = None
     food_preferences: Optional[FoodPreferences] = None
     play_preferences: Optional[PlayPreferences] = None
+    preference_vectors: Optional[Dict[str, List[float]]] = None
     member_ids: Optional[List[str]] = None
     schedule: Optional[List[ScheduledActivity]] = None
     distances_km: Optional[List[float]] = None
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+class RatingCreate(BaseModel):
+    activity_id: str = Field(..., description="평가할 활동의 ID")
+    rating: int = Field(..., ge=1, le=5, description="평점 (1-5)")
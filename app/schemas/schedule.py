@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import datetime
+from app.models.schedule_job import ScheduleJobModel
 from app.models.activity import GeoJson
 
 class ScheduledActivity(BaseModel):
@@ -19,3 +20,39 @@ class ScheduleSuggestion(BaseModel):
 
 class ListScheduleResponse(BaseModel):
     schedules: List[ScheduleSuggestion]
+
+class ScheduleStreamEvent(BaseModel):
+    event: str = Field(..., description="schedule, done 또는 error")
+    index: Optional[int] = Field(None, description="후보 스케줄 번호 (같은 index의 llm 이벤트는 local 이벤트를 대체)")
+    source: Optional[str] = Field(None, description="local(균등 분할 타임라인) 또는 llm(Gemini 보정)")
+    schedule: Optional[ScheduleSuggestion] = None
+    detail: Optional[str] = None
+
+class ScheduleJobResponse(BaseModel):
+    job_id: str = Field(..., description="작업 ID")
+    group_id: str = Field(..., description="그룹의 ID")
+    categories: List[str] = Field(..., description="선택한 카테고리 이름 목록")
+    strategy: Optional[str] = Field(None, description="그룹 선호도 합의 전략 (없으면 그룹의 기본 선호도)")
+    status: str = Field(..., description="pending, running, succeeded 또는 failed")
+    deduplicated: bool = Field(False, description="이미 진행 중인 같은 요청의 작업을 반환했는지 여부")
+    created_at: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    result: Optional[ListScheduleResponse] = Field(None, description="status가 succeeded일 때의 스케줄 후보")
+    error: Optional[str] = Field(None, description="status가 failed일 때의 실패 사유")
+
+    @classmethod
+    def from_job(cls, job: ScheduleJobModel, deduplicated: bool = False) -> "ScheduleJobResponse":
+        return cls(
+            job_id=job.id,
+            group_id=job.group_id,
+            categories=job.categories,
+            strategy=job.strategy,
+            status=job.status,
+            deduplicated=deduplicated,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            result=job.result,
+            error=job.error,
+        )
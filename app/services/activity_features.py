@@ -0,0 +1,230 @@
+import datetime
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.features import (
+    FOOD_FAMILIES,
+    FOOD_TYPE_CODE,
+    PLAY_DIMENSIONS,
+    PLAY_TYPE_CODE,
+    ACTIVITY_TYPE_CODES,
+    encode_food_masks,
+    encode_play_vector,
+    expand_food_masks,
+)
+from app.core.config import settings
+from app.db.catalog_meta import ACTIVITIES_CATALOG, CatalogCache, get_catalog_version
+from app.models.activity import ActivityModel
+
+# 서로 다른 종류(음식/놀거리) 활동 간의 거리
+MIXED_TYPE_DISTANCE = 2.0
+
+# 특성 저장소(FEATURE_STORE_DIR)에 .npy로 저장하는 배열. 형식이 바뀌면 FEATURE_STORE_FORMAT을 올립니다.
+FEATURE_STORE_FORMAT = 1
+_STORED_ARRAYS = ("ids", "category_codes", "type_codes", "has_play", "play", "food_masks", "food_bits", "lonlat")
+_MANIFEST = "manifest.json"
+
+# 추천 계산에 필요한 필드만 가져옵니다. 이름 등은 최종 응답을 만들 때 다시 조회합니다.
+FEATURE_PROJECTION = {"_id": 1, "type": 1, "category_id": 1, "location": 1, "food_attributes": 1, "play_attributes": 1}
+
+
+class ActivityFeatures:
+    """
+    추천 계산용 활동 카탈로그의 struct-of-arrays 표현.
+
+    - ids: 행 번호 -> 활동 ID (str). 특성 저장소에서 읽으면 고정 길이 문자열 배열입니다.
+    - type_codes (uint8): ACTIVITY_TYPE_CODES
+    - category_codes (int32): categories 리스트의 인덱스
+    - play (float32, n x 6): PLAY_DIMENSIONS 순서의 놀이 속성, has_play가 False인 행은 0
+    - food_masks (uint32, n x 4): FOOD_FAMILIES 순서의 음식 속성 비트마스크
+    - food_bits (uint8, n x FOOD_BIT_COUNT): food_masks를 펼친 0/1 행렬 (점수 계산용)
+    - lonlat (float64, n x 2): [경도, 위도], 위치가 없으면 NaN
+
+    ActivityModel은 최종 응답에 필요한 활동만 load_activities로 다시 만듭니다.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        categories: List[str],
+        category_codes: np.ndarray,
+        type_codes: np.ndarray,
+        has_play: np.ndarray,
+        play: np.ndarray,
+        food_masks: np.ndarray,
+        lonlat: np.ndarray,
+        food_bits: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.categories = categories
+        self.category_codes = category_codes
+        self.type_codes = type_codes
+        self.has_play = has_play
+        self.play = play
+        self.food_masks = food_masks
+        self.food_bits = expand_food_masks(food_masks) if food_bits is None else food_bits
+        self.lonlat = lonlat
+
+        # 카테고리별 행 번호 (카탈로그 순서 유지)
+        order = np.argsort(category_codes, kind="stable")
+        boundaries = np.searchsorted(category_codes[order], np.arange(len(categories) + 1))
+        self._category_rows: Dict[str, np.ndarray] = {
+            category_id: order[boundaries[code]:boundaries[code + 1]]
+            for code, category_id in enumerate(categories)
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict]) -> "ActivityFeatures":
+        ids = []
+        category_index: Dict[str, int] = {}
+        category_codes = []
+        type_codes = []
+        has_play = []
+        play = []
+        food_masks = []
+        lonlat = []
+        for doc in documents:
+            ids.append(str(doc["_id"]))
+            category_codes.append(category_index.setdefault(str(doc.get("category_id")), len(category_index)))
+            activity_type = doc.get("type")
+            type_codes.append(ACTIVITY_TYPE_CODES.get(getattr(activity_type, "value", activity_type), 0))
+            has_play.append(bool(doc.get("play_attributes")))
+            play.append(encode_play_vector(doc.get("play_attributes")))
+            food_masks.append(encode_food_masks(doc.get("food_attributes")))
+            coordinates = (doc.get("location") or {}).get("coordinates")
+            lonlat.append(coordinates[:2] if coordinates and len(coordinates) >= 2 else [np.nan, np.nan])
+
+        return cls(
+            ids=ids,
+            categories=list(category_index),
+            category_codes=np.array(category_codes, dtype=np.int32),
+            type_codes=np.array(type_codes, dtype=np.uint8),
+            has_play=np.array(has_play, dtype=bool),
+            play=np.array(play, dtype=np.float32).reshape(-1, len(PLAY_DIMENSIONS)),
+            food_masks=np.array(food_masks, dtype=np.uint32).reshape(-1, len(FOOD_FAMILIES)),
+            lonlat=np.array(lonlat, dtype=np.float64).reshape(-1, 2),
+        )
+
+    def save(self, directory: str, database: str, version: int):
+        """
+        배열들을 directory에 .npy로 저장합니다. manifest.json에 DB 이름과 activities catalog 버전을 기록합니다.
+        임시 디렉터리에 모두 쓴 뒤 이름을 바꾸므로, 읽는 쪽은 완성된 저장소만 봅니다.
+        """
+        temp_directory = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(temp_directory, exist_ok=True)
+        for name in _STORED_ARRAYS:
+            # ids는 고정 길이 유니코드 배열로 저장해 다른 배열처럼 매핑합니다.
+            value = np.array(self.ids, dtype=str) if name == "ids" else getattr(self, name)
+            np.save(os.path.join(temp_directory, f"{name}.npy"), np.ascontiguousarray(value))
+        with open(os.path.join(temp_directory, _MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": FEATURE_STORE_FORMAT,
+                "database": database,
+                "version": version,
+                "count": len(self),
+                "categories": list(self.categories),
+                "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }, f, ensure_ascii=False)
+        try:
+            os.rename(temp_directory, directory)
+        except OSError:
+            # 다른 프로세스가 같은 버전을 먼저 저장했습니다.
+            for name in os.listdir(temp_directory):
+                os.remove(os.path.join(temp_directory, name))
+            os.rmdir(temp_directory)
+            if not os.path.isdir(directory):
+                raise
+
+    @classmethod
+    def load(cls, directory: str, database: str, version: int) -> Optional["ActivityFeatures"]:
+        """
+        save로 저장한 배열을 읽기 전용 메모리 맵으로 엽니다. 같은 파일을 여는 프로세스들은 페이지 캐시를 공유합니다.
+        저장소가 없거나 형식/DB/버전이 다르면 None입니다.
+        """
+        manifest_path = os.path.join(directory, _MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest.get("format"), manifest.get("database"), manifest.get("version")) != (FEATURE_STORE_FORMAT, database, version):
+            return None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in _STORED_ARRAYS}
+        return cls(categories=manifest["categories"], **arrays)
+
+    def rows_for_category(self, category_id: str) -> np.ndarray:
+        return self._category_rows.get(category_id, np.empty(0, dtype=np.int64))
+
+    def play_distances(self, rows: np.ndarray, vector: List[float]) -> np.ndarray:
+        """행들의 놀이 속성과 vector 간 유클리드 거리. 놀이 속성이 없는 행은 inf입니다."""
+        distances = np.linalg.norm(self.play[rows].astype(np.float64) - np.asarray(vector, dtype=np.float64), axis=1)
+        return np.where(self.has_play[rows], distances, np.inf)
+
+    def food_similarity(self, rows: np.ndarray, preference_vector: np.ndarray) -> np.ndarray:
+        """행들의 음식 속성에 포함된 값들의 선호 점수 합 (food_preference_vector와의 내적)."""
+        return self.food_bits[rows] @ preference_vector
+
+    def pairwise_distances(self, rows: np.ndarray) -> np.ndarray:
+        """
+        행들 간의 거리 행렬. 놀거리끼리는 놀이 속성의 유클리드 거리, 음식끼리는 1 / (1 + 공통 속성 수),
+        종류가 다르면 MIXED_TYPE_DISTANCE입니다.
+        """
+        play = self.play[rows].astype(np.float64)
+        play_distance = np.linalg.norm(play[:, None, :] - play[None, :, :], axis=2)
+
+        # 공통 속성 수 = 비트마스크 교집합의 popcount = 펼친 0/1 행렬의 행 간 내적
+        bits = self.food_bits[rows].astype(np.float64)
+        food_distance = 1 / (1 + bits @ bits.T)
+
+        types = self.type_codes[rows]
+        both_play = (types[:, None] == PLAY_TYPE_CODE) & (types[None, :] == PLAY_TYPE_CODE)
+        both_food = (types[:, None] == FOOD_TYPE_CODE) & (types[None, :] == FOOD_TYPE_CODE)
+        distances = np.where(both_play, play_distance, np.where(both_food, food_distance, MIXED_TYPE_DISTANCE))
+        np.fill_diagonal(distances, 0.0)
+        return distances
+
+
+def feature_store_path(database: str, version: int) -> str:
+    return os.path.join(settings.FEATURE_STORE_DIR, f"{database}-activities-v{version}")
+
+
+def load_feature_store(database: str, version: int) -> Optional[ActivityFeatures]:
+    """scripts/export_features.py가 내보낸 현재 버전의 특성 저장소. 없거나 읽지 못하면 None입니다."""
+    if not settings.FEATURE_STORE_DIR:
+        return None
+    directory = feature_store_path(database, version)
+    try:
+        return ActivityFeatures.load(directory, database, version)
+    except Exception as e:
+        print(f"Failed to load activity feature store {directory}: {e}")
+        return None
+
+
+async def _build_activity_features(db: AsyncIOMotorDatabase) -> ActivityFeatures:
+    # 카탈로그 버전과 같은 버전의 저장소가 있으면 MongoDB를 읽지 않고 파일을 매핑합니다.
+    features = load_feature_store(db.name, await get_catalog_version(db, ACTIVITIES_CATALOG))
+    if features is not None:
+        return features
+    documents = await db.activities.find({}, FEATURE_PROJECTION).to_list(length=None)
+    return ActivityFeatures.from_documents(documents)
+
+
+# 프로세스 단위 캐시. catalog_meta의 activities 버전이 바뀌면 다시 만들어집니다.
+activity_feature_cache = CatalogCache(ACTIVITIES_CATALOG, _build_activity_features)
+
+
+async def load_activities(db: AsyncIOMotorDatabase, activity_ids: Iterable[str]) -> Dict[str, ActivityModel]:
+    """최종 응답에 필요한 활동만 한 번의 쿼리로 ActivityModel로 다시 만듭니다."""
+    object_ids = [ObjectId(activity_id) for activity_id in set(activity_ids)]
+    activities = {}
+    async for doc in db.activities.find({"_id": {"$in": object_ids}}):
+        activity = ActivityModel(**doc)
+        activities[activity.id] = activity
+    return activities
@@ -0,0 +1,85 @@
+from typing import Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.db.catalog_meta import ACTIVITIES_CATALOG, bump_catalog_version
+from app.models.activity import ActivityModel
+from app.schemas.activity import ActivityCreate, ActivityUpdate
+from app.services.category_centroid_service import apply_activity_changes
+
+
+class ActivityService:
+    """
+    활동 카탈로그의 쓰기 경로 (/api/v1/activities). 활동을 추가/수정/삭제할 때마다 쓰기 결과의 변경 전/후 문서로
+    카테고리 play_attributes 누적값을 증분 갱신하고, activities/categories catalog 버전을 올려 각 인스턴스의
+    활동 특성 캐시와 카테고리 인덱스가 다시 만들어지게 합니다. 대량 가져오기는 scripts/import_catalog.py를 사용합니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient):
+        self.db = db_client[settings.MONGO_DATABASE]
+        self.collection = self.db.activities
+        self.categories_collection = self.db.categories
+
+    async def _category_exists(self, category_id: str) -> bool:
+        if not ObjectId.is_valid(category_id):
+            return False
+        return await self.categories_collection.find_one({"_id": ObjectId(category_id)}, {"_id": 1}) is not None
+
+    async def _after_write(self, before: Optional[dict], after: Optional[dict]):
+        await apply_activity_changes(self.db, [(before, after)])
+        await bump_catalog_version(self.db, ACTIVITIES_CATALOG)
+
+    async def get_activity(self, activity_id: str) -> Optional[ActivityModel]:
+        if not ObjectId.is_valid(activity_id):
+            return None
+        activity = await self.collection.find_one({"_id": ObjectId(activity_id)})
+        if activity:
+            return ActivityModel(**activity)
+        return None
+
+    async def create_activity(self, activity_data: ActivityCreate) -> ActivityModel:
+        """활동을 추가합니다. 카테고리가 없으면 ValueError를 발생시킵니다."""
+        if not await self._category_exists(activity_data.category_id):
+            raise ValueError("Category not found")
+        activity_dict = activity_data.model_dump(exclude_none=True)
+        result = await self.collection.insert_one(activity_dict)
+        activity_dict["_id"] = result.inserted_id
+
+        await self._after_write(None, activity_dict)
+        return ActivityModel(**activity_dict)
+
+    async def update_activity(self, activity_id: str, activity_data: ActivityUpdate) -> Optional[ActivityModel]:
+        """활동을 수정합니다. 활동이 없으면 None, 바꾸려는 카테고리가 없으면 ValueError입니다."""
+        if not ObjectId.is_valid(activity_id):
+            return None
+        update_data = activity_data.model_dump(exclude_none=True)
+        if not update_data:
+            return await self.get_activity(activity_id)
+        if "category_id" in update_data and not await self._category_exists(update_data["category_id"]):
+            raise ValueError("Category not found")
+
+        # 변경 전 문서를 같은 연산에서 받아 누적값에서 뺄 기여분을 정확히 구합니다.
+        before = await self.collection.find_one_and_update(
+            {"_id": ObjectId(activity_id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if not before:
+            return None
+        after = {**before, **update_data}
+
+        await self._after_write(before, after)
+        return ActivityModel(**after)
+
+    async def delete_activity(self, activity_id: str) -> bool:
+        if not ObjectId.is_valid(activity_id):
+            return False
+        deleted = await self.collection.find_one_and_delete({"_id": ObjectId(activity_id)})
+        if not deleted:
+            return False
+
+        await self._after_write(deleted, None)
+        return True
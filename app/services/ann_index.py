@@ -0,0 +1,292 @@
+import hashlib
+import os
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.activity_features import ActivityFeatures
+
+# 인덱스 종류
+# - play: 놀이 속성 벡터, 그룹 놀이 선호도와의 유클리드 거리가 작은 순 (ActivityFeatures.play_distances)
+# - food: 음식 속성 0/1 벡터, 그룹 음식 점수와의 내적이 큰 순 (ActivityFeatures.food_similarity)
+KIND_PLAY = "play"
+KIND_FOOD = "food"
+
+KMEANS_ITERATIONS = 10
+# k-means 할당 계산에서 한 번에 처리하는 벡터 수. (chunk x 리스트 수) 거리 행렬 크기를 제한합니다.
+ASSIGNMENT_CHUNK_SIZE = 4096
+# 저장 형식이 바뀌면 올립니다. 파일 이름의 지문에 포함되어 이전 형식의 파일은 쓰지 않습니다.
+INDEX_FORMAT_VERSION = 1
+# 경계 비교의 부동소수점 여유. 경계와 실제 점수가 같으면 동점 순서를 맞추기 위해 리스트를 더 봅니다.
+BOUND_EPSILON = 1e-9
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = ASSIGNMENT_CHUNK_SIZE) -> np.ndarray:
+    """각 벡터에 가장 가까운 중심의 번호. |x - c|^2 = |x|^2 - 2 x·c + |c|^2 에서 |x|^2은 비교에 필요 없습니다."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        assignment[start:start + chunk_size] = np.argmin(centroid_norms - 2 * chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def kmeans(vectors: np.ndarray, list_count: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd k-means. 각 벡터의 클러스터 번호를 반환합니다. 빈 클러스터는 임의의 벡터로 다시 시작합니다."""
+    centroids = vectors[rng.choice(len(vectors), list_count, replace=False)].copy()
+    assignment = _nearest_centroids(vectors, centroids)
+    for _ in range(iterations):
+        counts = np.bincount(assignment, minlength=list_count)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        previous, assignment = assignment, _nearest_centroids(vectors, centroids)
+        if np.array_equal(previous, assignment):
+            break
+    return assignment
+
+
+class IVFIndex:
+    """
+    한 카테고리의 활동 벡터를 k-means로 나눈 inverted file 인덱스.
+
+    리스트(클러스터)마다 멤버 벡터의 차원별 최솟값/최댓값(bounding box)을 저장해 두고, 질의는 box로 계산한
+    비용 하한이 작은 리스트부터 멤버의 실제 비용을 계산합니다. 이미 찾은 k번째 비용보다 다음 리스트의 하한이 크면
+    멈추므로 결과는 전체 탐색과 같고, 보통 일부 리스트만 봅니다. max_lists를 주면 그만큼만 보고 멈추는 근사 탐색이 됩니다.
+
+    위치(position)는 카테고리 행 목록(ActivityFeatures.rows_for_category) 안의 순서입니다.
+    unindexed는 인덱스에 넣지 않은 위치(놀이 속성이 없는 활동)로, 비용이 항상 가장 크므로 결과가 k개보다 적을 때
+    카탈로그 순서대로 뒤에 붙입니다.
+    """
+
+    def __init__(self, offsets: np.ndarray, members: np.ndarray, box_min: np.ndarray, box_max: np.ndarray, unindexed: np.ndarray):
+        self.offsets = offsets  # 리스트 i의 위치 = members[offsets[i]:offsets[i + 1]]
+        self.members = members
+        self.box_min = box_min
+        self.box_max = box_max
+        self.unindexed = unindexed
+
+    @property
+    def list_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, indexed: np.ndarray, list_size: int, seed: int = 0) -> "IVFIndex":
+        """
+        vectors[indexed] 위치들을 평균 list_size개 이상씩의 리스트로 나눕니다.
+        k-means 비용은 (위치 수 x 리스트 수)이므로 리스트 수는 sqrt(위치 수)를 넘지 않게 합니다.
+        """
+        positions = np.flatnonzero(indexed)
+        unindexed = np.flatnonzero(~indexed)
+        list_count = max(1, min(len(positions) // max(1, list_size), int(np.sqrt(len(positions)))))
+        if len(positions) <= list_count:
+            assignment = np.arange(len(positions))
+        else:
+            assignment = kmeans(vectors[positions].astype(np.float64), list_count, KMEANS_ITERATIONS, np.random.default_rng(seed))
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(list_count + 1))
+        members = positions[order]
+
+        # 빈 리스트는 box를 +-inf로 두어 항상 가장 큰 하한이 되도록 합니다.
+        box_min = np.full((list_count, vectors.shape[1]), np.inf)
+        box_max = np.full((list_count, vectors.shape[1]), -np.inf)
+        for list_no in range(list_count):
+            list_vectors = vectors[members[offsets[list_no]:offsets[list_no + 1]]]
+            if len(list_vectors):
+                box_min[list_no] = list_vectors.min(axis=0)
+                box_max[list_no] = list_vectors.max(axis=0)
+        return cls(offsets, members, box_min, box_max, unindexed)
+
+    def save(self, path: str):
+        # 다른 워커가 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓰고 이름을 바꿉니다.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, offsets=self.offsets, members=self.members, box_min=self.box_min, box_max=self.box_max, unindexed=self.unindexed)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(data["offsets"], data["members"], data["box_min"], data["box_max"], data["unindexed"])
+
+    def _empty_lists(self) -> np.ndarray:
+        return ~np.isfinite(self.box_min[:, 0])
+
+    def l2_lower_bounds(self, query: np.ndarray) -> np.ndarray:
+        """리스트마다 멤버와 query 사이 거리의 하한 (box 안에서 query에 가장 가까운 점까지의 거리)."""
+        with np.errstate(invalid="ignore"):
+            bounds = np.linalg.norm(np.clip(query, self.box_min, self.box_max) - query, axis=1)
+        return np.where(self._empty_lists(), np.inf, bounds)
+
+    def inner_product_upper_bounds(self, query: np.ndarray) -> np.ndarray:
+        """리스트마다 멤버와 query 내적의 상한을 비용(-상한)으로 반환합니다."""
+        with np.errstate(invalid="ignore"):
+            upper = self.box_max @ np.maximum(query, 0) + self.box_min @ np.minimum(query, 0)
+        return np.where(self._empty_lists(), np.inf, -upper)
+
+    def search(
+        self,
+        list_costs: np.ndarray,
+        costs: Callable[[np.ndarray], np.ndarray],
+        k: int,
+        lists_per_round: int,
+        max_lists: int = 0,
+    ) -> np.ndarray:
+        """
+        비용(작을수록 좋음)이 가장 작은 k개의 위치를 (비용, 위치) 순으로 반환합니다.
+        list_costs는 리스트별 비용 하한, costs(positions)는 위치들의 실제 비용입니다.
+        한 번에 lists_per_round개의 리스트를 보고, 라운드마다 그 수를 두 배로 늘립니다.
+        """
+        list_order = np.argsort(list_costs, kind="stable")
+        limit = self.list_count if max_lists <= 0 else min(max_lists, self.list_count)
+        round_size = max(1, lists_per_round)
+        found_positions = np.empty(0, dtype=np.int64)
+        found_costs = np.empty(0, dtype=np.float64)
+        probed = 0
+        while probed < limit:
+            if len(found_positions) >= k and list_costs[list_order[probed]] > found_costs[k - 1] + BOUND_EPSILON:
+                break
+            next_lists = list_order[probed:min(probed + round_size, limit)]
+            # 하한이 이미 k번째 비용보다 큰 리스트는 이번 라운드에서도 건너뜁니다.
+            if len(found_positions) >= k:
+                next_lists = next_lists[list_costs[next_lists] <= found_costs[k - 1] + BOUND_EPSILON]
+            probed += round_size
+            round_size *= 2
+            positions = np.concatenate([self.members[self.offsets[i]:self.offsets[i + 1]] for i in next_lists])
+            found_positions = np.concatenate([found_positions, positions])
+            found_costs = np.concatenate([found_costs, costs(positions)])
+            best = np.lexsort((found_positions, found_costs))[:k]
+            found_positions, found_costs = found_positions[best], found_costs[best]
+
+        if len(found_positions) < k and len(self.unindexed):
+            found_positions = np.concatenate([found_positions, self.unindexed[:k - len(found_positions)]])
+        return found_positions
+
+
+def _category_vectors(features: ActivityFeatures, rows: np.ndarray, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """카테고리 행들의 (인덱스에 넣을 벡터, 인덱스에 넣을지 여부)."""
+    if kind == KIND_PLAY:
+        return features.play[rows], features.has_play[rows]
+    return features.food_bits[rows], np.ones(len(rows), dtype=bool)
+
+
+def _fingerprint(features: ActivityFeatures, rows: np.ndarray, vectors: np.ndarray, indexed: np.ndarray, kind: str) -> str:
+    digest = hashlib.sha1(f"{INDEX_FORMAT_VERSION}:{kind}".encode("utf-8"))
+    digest.update("\n".join(features.ids[row] for row in rows).encode("utf-8"))
+    digest.update(np.ascontiguousarray(vectors).tobytes())
+    digest.update(indexed.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _index_path(kind: str, category_id: str, fingerprint: str) -> str:
+    return os.path.join(settings.ANN_INDEX_DIR, f"{kind}-{category_id}-{fingerprint}.npz")
+
+
+def build_category_index(features: ActivityFeatures, category_id: str, kind: str) -> Optional[IVFIndex]:
+    """
+    카테고리의 IVF 인덱스를 만들어 ANN_INDEX_DIR에 저장하고, 같은 카테고리의 이전 인덱스 파일을 지웁니다.
+    같은 지문의 파일이 이미 있으면 다시 만들지 않습니다. ANN_MIN_CATEGORY_SIZE보다 작은 카테고리는 None입니다.
+    k-means를 실행하므로 요청 경로가 아닌 scripts/export_features.py에서 호출합니다.
+    """
+    rows = features.rows_for_category(category_id)
+    if len(rows) < settings.ANN_MIN_CATEGORY_SIZE:
+        return None
+    vectors, indexed = _category_vectors(features, rows, kind)
+    path = _index_path(kind, category_id, _fingerprint(features, rows, vectors, indexed, kind))
+    if os.path.exists(path):
+        return IVFIndex.load(path)
+    index = IVFIndex.build(vectors, indexed, settings.ANN_LIST_SIZE)
+    index.save(path)
+    _remove_stale_files(kind, category_id, path)
+    return index
+
+
+def build_category_indexes(features: ActivityFeatures, category_kinds: Iterable[Tuple[str, str]]) -> int:
+    """(카테고리 ID, 종류) 목록의 인덱스를 만듭니다. 인덱스를 가진 카테고리 수를 반환합니다."""
+    built = 0
+    for category_id, kind in category_kinds:
+        if build_category_index(features, category_id, kind) is not None:
+            built += 1
+    return built
+
+
+# (카테고리 ID, 종류) -> (지문을 계산한 ActivityFeatures, 지문, 읽은 인덱스 또는 None)
+# 특성 캐시가 같은 객체이면 지문 계산을 건너뛰고, 아직 파일이 없으면 다음 요청에서 파일만 다시 확인합니다.
+_indexes: Dict[Tuple[str, str], Tuple[ActivityFeatures, str, Optional[IVFIndex]]] = {}
+
+
+def get_category_index(features: ActivityFeatures, category_id: str, kind: str) -> Optional[IVFIndex]:
+    """
+    카테고리의 IVF 인덱스. 요청 경로에서는 만들지 않고 build_category_index가 저장한 같은 지문의 파일만 읽습니다.
+    ANN_MIN_CATEGORY_SIZE보다 작거나 아직 인덱스 파일이 없는 카테고리는 None이며, 호출한 쪽은 전체 탐색을 합니다.
+    """
+    rows = features.rows_for_category(category_id)
+    if len(rows) < settings.ANN_MIN_CATEGORY_SIZE:
+        return None
+    key = (category_id, kind)
+    cached = _indexes.get(key)
+    if cached and cached[0] is features:
+        fingerprint, index = cached[1], cached[2]
+    else:
+        vectors, indexed = _category_vectors(features, rows, kind)
+        fingerprint = _fingerprint(features, rows, vectors, indexed, kind)
+        index = cached[2] if cached and cached[1] == fingerprint else None
+    if index is None:
+        path = _index_path(kind, category_id, fingerprint)
+        if os.path.exists(path):
+            try:
+                index = IVFIndex.load(path)
+            except Exception as e:
+                print(f"Failed to load ANN index {path}, using exact search: {e}")
+    _indexes[key] = (features, fingerprint, index)
+    return index
+
+
+def _remove_stale_files(kind: str, category_id: str, current_path: str):
+    prefix = f"{kind}-{category_id}-"
+    for name in os.listdir(settings.ANN_INDEX_DIR):
+        path = os.path.join(settings.ANN_INDEX_DIR, name)
+        if name.startswith(prefix) and name.endswith(".npz") and path != current_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def top_play_rows(features: ActivityFeatures, category_id: str, vector, k: int) -> Optional[np.ndarray]:
+    """놀이 선호도와 거리가 가장 가까운 k개 행 (카탈로그 순서). 인덱스가 없는 카테고리는 None입니다."""
+    index = get_category_index(features, category_id, KIND_PLAY)
+    if index is None:
+        return None
+    rows = features.rows_for_category(category_id)
+    query = np.asarray(vector, dtype=np.float64)
+    positions = index.search(
+        index.l2_lower_bounds(query),
+        lambda candidates: features.play_distances(rows[candidates], vector),
+        k,
+        settings.ANN_LISTS_PER_ROUND,
+        settings.ANN_MAX_LISTS,
+    )
+    return rows[np.sort(positions)]
+
+
+def top_food_rows(features: ActivityFeatures, category_id: str, preference_vector: np.ndarray, k: int) -> Optional[np.ndarray]:
+    """음식 점수가 가장 높은 k개 행 (카탈로그 순서). 인덱스가 없는 카테고리는 None입니다."""
+    index = get_category_index(features, category_id, KIND_FOOD)
+    if index is None:
+        return None
+    rows = features.rows_for_category(category_id)
+    query = np.asarray(preference_vector, dtype=np.float64)
+    positions = index.search(
+        index.inner_product_upper_bounds(query),
+        lambda candidates: -features.food_similarity(rows[candidates], preference_vector),
+        k,
+        settings.ANN_LISTS_PER_ROUND,
+        settings.ANN_MAX_LISTS,
+    )
+    return rows[np.sort(positions)]
@@ -0,0 +1,181 @@
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+from app.core.features import PLAY_DIMENSIONS, encode_play_vector
+from app.db.catalog_meta import CATEGORIES_CATALOG, bump_catalog_version, bump_catalog_version_sync
+
+# 카테고리 문서에 저장하는 누적값. play_attributes는 항상 play_attribute_sums / play_attribute_count 입니다.
+SUMS_FIELD = "play_attribute_sums"
+COUNT_FIELD = "play_attribute_count"
+
+
+def _zero_centroid() -> dict:
+    # 활동이 없는 카테고리도 recommend_categories 대상에서 빠지지 않도록 None 대신 영벡터를 둡니다.
+    return {dim: 0.0 for dim in PLAY_DIMENSIONS}
+
+
+def _centroid_expression() -> dict:
+    """누적값으로 play_attributes(평균)를 계산하는 표현식. 놀이 속성을 가진 활동이 없으면 영벡터입니다."""
+    return {
+        "$cond": [
+            {"$gt": [f"${COUNT_FIELD}", 0]},
+            # 누적 오차로 PlayAttributes의 범위(-1 ~ 1)를 벗어나지 않도록 잘라냅니다.
+            {
+                dim: {"$max": [-1, {"$min": [1, {"$divide": [f"${SUMS_FIELD}.{dim}", f"${COUNT_FIELD}"]}]}]}
+                for dim in PLAY_DIMENSIONS
+            },
+            _zero_centroid(),
+        ]
+    }
+
+
+def centroid_accumulation_stages() -> List[dict]:
+    """activities에서 카테고리(category_id 문자열)별 놀이 속성 합계(차원별 필드)와 개수(COUNT_FIELD)를 구하는 단계."""
+    return [
+        {"$match": {"play_attributes": {"$ne": None}}},
+        {
+            "$group": {
+                "_id": "$category_id",
+                COUNT_FIELD: {"$sum": 1},
+                **{dim: {"$sum": {"$ifNull": [f"$play_attributes.{dim}", 0]}} for dim in PLAY_DIMENSIONS},
+            }
+        },
+    ]
+
+
+def centroid_rebuild_pipeline(rebuilt_at: datetime.datetime) -> List[dict]:
+    """
+    activities 전체에서 카테고리별 누적값과 play_attributes를 다시 계산해 categories에 $merge하는 파이프라인.
+    rebuild_centroids_sync가 사용합니다.
+    """
+    return centroid_accumulation_stages() + [
+        {
+            "$project": {
+                "_id": {"$toObjectId": "$_id"},
+                COUNT_FIELD: 1,
+                SUMS_FIELD: {dim: f"${dim}" for dim in PLAY_DIMENSIONS},
+                "centroid_rebuilt_at": {"$literal": rebuilt_at},
+            }
+        },
+        {"$set": {"play_attributes": _centroid_expression()}},
+        {"$merge": {"into": "categories", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]
+
+
+def empty_centroid_update(rebuilt_at: datetime.datetime) -> dict:
+    """rebuild에서 놀이 속성을 가진 활동이 하나도 없는 카테고리를 초기화하는 $set."""
+    return {
+        "$set": {
+            SUMS_FIELD: _zero_centroid(),
+            COUNT_FIELD: 0,
+            "play_attributes": _zero_centroid(),
+            "centroid_rebuilt_at": rebuilt_at,
+        }
+    }
+
+
+def _rebuild_timestamp() -> datetime.datetime:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)  # BSON datetime은 밀리초 단위
+
+
+def rebuild_centroids_sync(db: Database) -> int:
+    """
+    activities 전체로 모든 카테고리의 누적값과 play_attributes를 다시 계산합니다. 초기화된 카테고리 수를 반환합니다.
+    부동소수점 오차가 쌓였거나 누적값이 없는 기존 데이터에 사용합니다.
+    """
+    rebuilt_at = _rebuild_timestamp()
+    list(db.activities.aggregate(centroid_rebuild_pipeline(rebuilt_at)))
+    result = db.categories.update_many({"centroid_rebuilt_at": {"$ne": rebuilt_at}}, empty_centroid_update(rebuilt_at))
+    bump_catalog_version_sync(db, CATEGORIES_CATALOG)
+    return result.modified_count
+
+
+def _play_contribution(activity_doc: Optional[dict]) -> Optional[List[float]]:
+    if not activity_doc or not activity_doc.get("play_attributes"):
+        return None
+    return encode_play_vector(activity_doc["play_attributes"])
+
+
+def centroid_deltas(changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> Dict[str, Tuple[List[float], int]]:
+    """
+    활동 문서의 변경 전/후(추가는 before=None, 삭제는 after=None) 목록을 카테고리별 (합계 증감, 개수 증감)으로 모읍니다.
+    놀이 속성과 카테고리가 그대로인 변경은 건너뜁니다.
+    """
+    deltas: Dict[str, Tuple[List[float], int]] = {}
+
+    def add(category_id: str, vector: List[float], sign: int):
+        sums, count = deltas.get(category_id, ([0.0] * len(PLAY_DIMENSIONS), 0))
+        deltas[category_id] = ([total + sign * value for total, value in zip(sums, vector)], count + sign)
+
+    for before, after in changes:
+        old_vector = _play_contribution(before)
+        new_vector = _play_contribution(after)
+        old_category = str(before["category_id"]) if before and old_vector is not None else None
+        new_category = str(after["category_id"]) if after and new_vector is not None else None
+        if old_category == new_category and old_vector == new_vector:
+            continue
+        if old_category:
+            add(old_category, old_vector, -1)
+        if new_category:
+            add(new_category, new_vector, 1)
+    return deltas
+
+
+def centroid_delta_update(sums: List[float], count: int) -> List[dict]:
+    """
+    카테고리 누적값에 증감을 더하고 같은 업데이트 안에서 평균을 다시 계산하는 파이프라인 업데이트.
+    여러 작성자가 동시에 갱신해도 누적값과 play_attributes가 어긋나지 않습니다.
+    """
+    increments = {
+        f"{SUMS_FIELD}.{dim}": {"$add": [{"$ifNull": [f"${SUMS_FIELD}.{dim}", 0]}, value]}
+        for dim, value in zip(PLAY_DIMENSIONS, sums)
+    }
+    increments[COUNT_FIELD] = {"$add": [{"$ifNull": [f"${COUNT_FIELD}", 0]}, count]}
+    return [{"$set": increments}, {"$set": {"play_attributes": _centroid_expression()}}]
+
+
+def _centroid_operations(changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> List[UpdateOne]:
+    """변경 목록을 카테고리마다 하나의 누적값 업데이트로 바꿉니다."""
+    return [
+        UpdateOne({"_id": ObjectId(category_id)}, centroid_delta_update(sums, count))
+        for category_id, (sums, count) in centroid_deltas(changes).items()
+        if ObjectId.is_valid(category_id)
+    ]
+
+
+async def apply_activity_changes(
+    db: AsyncIOMotorDatabase,
+    changes: Iterable[Tuple[Optional[dict], Optional[dict]]],
+) -> int:
+    """
+    ActivityService가 쓴 활동(추가/수정/삭제)의 변경 전/후로 카테고리 누적값과 play_attributes를 증분 갱신하고
+    categories 버전을 올립니다. 갱신한 카테고리 수를 반환합니다.
+    """
+    operations = _centroid_operations(changes)
+    if operations:
+        await db.categories.bulk_write(operations, ordered=False)
+        await bump_catalog_version(db, CATEGORIES_CATALOG)
+    return len(operations)
+
+
+def apply_activity_changes_sync(
+    db: Database,
+    changes: Iterable[Tuple[Optional[dict], Optional[dict]]],
+    bump_version: bool = True,
+) -> int:
+    """
+    scripts/import_catalog.py용 apply_activity_changes. 카테고리마다 한 번의 업데이트를 보내며, 갱신한 카테고리 수를
+    반환합니다. 여러 번 나눠 호출하는 쪽은 bump_version=False로 두고 마지막에 한 번 categories 버전을 올립니다.
+    """
+    operations = _centroid_operations(changes)
+    if operations:
+        db.categories.bulk_write(operations, ordered=False)
+        if bump_version:
+            bump_catalog_version_sync(db, CATEGORIES_CATALOG)
+    return len(operations)
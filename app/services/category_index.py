@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.enums import ActivityType
+from app.core.features import PLAY_DIMENSIONS, encode_play_vector
+from app.db.catalog_meta import CATEGORIES_CATALOG, CatalogCache
+from app.models.category import CategoryModel
+
+
+class CategoryIndex:
+    """
+    카테고리 카탈로그의 메모리 인덱스.
+
+    - categories: 카탈로그 순서의 CategoryModel 목록 (행 번호 = 리스트 인덱스)
+    - play (float64, n x 6): PLAY_DIMENSIONS 순서의 카테고리 대표 놀이 속성
+    - recommendable (bool, n): 선호도 기반 추천 대상 여부 (놀거리 하위 카테고리 중 play_attributes가 있는 것)
+    - 이름/ID 조회와 상위/하위 카테고리 관계
+    """
+
+    def __init__(self, categories: List[CategoryModel]):
+        self.categories = categories
+        self.play = np.array(
+            [encode_play_vector(c.play_attributes.dict() if c.play_attributes else None) for c in categories],
+            dtype=np.float64,
+        ).reshape(-1, len(PLAY_DIMENSIONS))
+        self.recommendable = np.array([
+            c.type == ActivityType.ACTIVITY and c.play_attributes is not None and c.parent_category_id is not None
+            for c in categories
+        ], dtype=bool)
+
+        self._by_id: Dict[str, CategoryModel] = {}
+        self._by_name: Dict[str, CategoryModel] = {}
+        self._children: Dict[str, List[CategoryModel]] = {}
+        for category in categories:
+            self._by_id[str(category.id)] = category
+            # 이름이 중복되면 find_one({"name": ...})과 같이 먼저 나온 카테고리를 사용합니다.
+            self._by_name.setdefault(category.name, category)
+            if category.parent_category_id:
+                self._children.setdefault(category.parent_category_id, []).append(category)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def get(self, category_id: str) -> Optional[CategoryModel]:
+        return self._by_id.get(category_id)
+
+    def get_by_name(self, name: str) -> Optional[CategoryModel]:
+        return self._by_name.get(name)
+
+    def parent_of(self, category_id: str) -> Optional[CategoryModel]:
+        category = self._by_id.get(category_id)
+        if not category or not category.parent_category_id:
+            return None
+        return self._by_id.get(category.parent_category_id)
+
+    def children_of(self, category_id: str) -> List[CategoryModel]:
+        return list(self._children.get(category_id, []))
+
+    def nearest(self, vector: List[float], k: int) -> List[CategoryModel]:
+        """
+        추천 대상 카테고리 중 vector와 유클리드 거리가 가까운 순서로 k개를 반환합니다.
+        거리가 같으면 카탈로그 순서를 유지합니다.
+        """
+        rows = np.flatnonzero(self.recommendable)
+        if len(rows) == 0 or k <= 0:
+            return []
+        distances = np.linalg.norm(self.play[rows] - np.asarray(vector, dtype=np.float64), axis=1)
+        nearest_rows = rows[np.argsort(distances, kind="stable")[:k]]
+        return [self.categories[row] for row in nearest_rows]
+
+
+async def _build_category_index(db: AsyncIOMotorDatabase) -> CategoryIndex:
+    categories = [CategoryModel(**doc) async for doc in db.categories.find({})]
+    return CategoryIndex(categories)
+
+
+# 프로세스 단위 캐시. catalog_meta의 categories 버전이 바뀌면 다시 만들어집니다.
+category_index_cache = CatalogCache(CATEGORIES_CATALOG, _build_category_index)
@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.db.catalog_meta import FACTORS_CATALOG, CatalogCache
+from app.services.activity_features import ActivityFeatures
+
+# 평점 범위(1~5)의 폭. 예측 평점을 global_mean 기준 -1 ~ 1 정도로 맞추는 데 사용합니다.
+RATING_SPAN = 4.0
+
+
+class FactorModel:
+    """
+    scripts/train_factors.py가 학습한 협업 필터링(행렬 분해) 모델의 활동 쪽 요인.
+
+    예측 평점 = global_mean + 활동 bias + 사용자 bias + 사용자 벡터 · 활동 벡터
+    그룹은 멤버 벡터/bias의 평균을 사용합니다. 학습 이후에 추가된 활동은 요인이 없어 0(global_mean)으로 예측합니다.
+    """
+
+    def __init__(self, version: int, global_mean: float, activity_ids: List[str], vectors: np.ndarray, biases: np.ndarray):
+        self.version = version
+        self.global_mean = global_mean
+        self.activity_rows: Dict[str, int] = {activity_id: row for row, activity_id in enumerate(activity_ids)}
+        self.vectors = vectors
+        self.biases = biases
+        self._aligned: Optional[Tuple[ActivityFeatures, np.ndarray]] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.activity_rows) == 0
+
+    def _feature_rows(self, features: ActivityFeatures) -> np.ndarray:
+        """
+        ActivityFeatures 행 번호 -> 요인 행 번호 (요인이 없으면 -1). 특성 캐시가 바뀔 때만 다시 만듭니다.
+        id()는 재빌드 후 재사용될 수 있으므로 객체 자체를 붙잡아 두고 is로 비교합니다.
+        """
+        if self._aligned is None or self._aligned[0] is not features:
+            aligned = np.array([self.activity_rows.get(activity_id, -1) for activity_id in features.ids], dtype=np.int64)
+            self._aligned = (features, aligned)
+        return self._aligned[1]
+
+    def centered_scores(self, features: ActivityFeatures, rows: np.ndarray, group_vector: np.ndarray, group_bias: float) -> np.ndarray:
+        """rows 활동들의 (예측 평점 - global_mean) / RATING_SPAN. 요인이 없는 활동은 0입니다."""
+        factor_rows = self._feature_rows(features)[rows]
+        known = factor_rows >= 0
+        scores = np.zeros(len(rows), dtype=np.float64)
+        if known.any():
+            known_rows = factor_rows[known]
+            scores[known] = (self.vectors[known_rows] @ group_vector + self.biases[known_rows] + group_bias) / RATING_SPAN
+        return scores
+
+    async def group_factors(self, db: AsyncIOMotorDatabase, member_ids: List[str]) -> Optional[Tuple[np.ndarray, float]]:
+        """멤버 요인의 평균 (벡터, bias). 학습 데이터에 있는 멤버가 없으면 None입니다."""
+        docs = await db.user_factors.find(
+            {"user_id": {"$in": member_ids}, "model_version": self.version},
+            {"vector": 1, "bias": 1},
+        ).to_list(length=None)
+        if not docs:
+            return None
+        vectors = np.array([doc["vector"] for doc in docs], dtype=np.float64)
+        biases = np.array([doc["bias"] for doc in docs], dtype=np.float64)
+        return vectors.mean(axis=0), float(biases.mean())
+
+
+async def _build_factor_model(db: AsyncIOMotorDatabase) -> FactorModel:
+    meta = await db.catalog_meta.find_one({"_id": FACTORS_CATALOG})
+    if not meta or "model_version" not in meta:
+        return FactorModel(0, 0.0, [], np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.float32))
+
+    activity_ids, vectors, biases = [], [], []
+    cursor = db.activity_factors.find({"model_version": meta["model_version"]}, {"activity_id": 1, "vector": 1, "bias": 1})
+    async for doc in cursor:
+        activity_ids.append(doc["activity_id"])
+        vectors.append(doc["vector"])
+        biases.append(doc["bias"])
+    factors = meta.get("factors", 0)
+    return FactorModel(
+        meta["model_version"],
+        float(meta.get("global_mean", 0.0)),
+        activity_ids,
+        np.array(vectors, dtype=np.float32).reshape(-1, factors),
+        np.array(biases, dtype=np.float32),
+    )
+
+
+# 학습 스크립트가 새 모델을 쓰고 factors 버전을 올리면 각 인스턴스가 다시 읽습니다.
+factor_model_cache = CatalogCache(FACTORS_CATALOG, _build_factor_model)
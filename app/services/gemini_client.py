@@ -0,0 +1,148 @@
+import asyncio
+import time
+from typing import Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    TokenBucket,
+    backoff_delay,
+    remaining,
+)
+
+LLM_CALLS = Counter(
+    "playfriends_llm_calls_total",
+    "Gemini calls by outcome (success, retry, error, timeout, deadline, circuit_open)",
+    ["outcome"],
+)
+LLM_CALL_SECONDS = Histogram(
+    "playfriends_llm_call_duration_seconds",
+    "Latency of individual Gemini generate_content attempts",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30),
+)
+LLM_CIRCUIT_OPEN = Gauge(
+    "playfriends_llm_circuit_open",
+    "1 while the Gemini circuit breaker is open or half-open",
+)
+
+# 잠시 후 다시 시도하면 성공할 수 있는 오류 (429, 5xx, 타임아웃)
+TRANSIENT_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+
+
+class GeminiClient:
+    """
+    프로세스 단위로 공유하는 Gemini 호출 계층.
+
+    - 모델 객체(와 그 아래의 연결)를 한 번만 만들어 재사용합니다.
+    - 토큰 버킷으로 초당 호출 수를, 세마포어로 동시 호출 수를 제한합니다.
+    - 호출자가 넘긴 deadline(time.monotonic() 기준)을 넘기지 않도록 대기/타임아웃/재시도 시간을 자릅니다.
+    - 일시적인 오류는 지수 백오프 + jitter로 재시도합니다.
+    - 연속 실패 시 서킷 브레이커가 열려, 회복될 때까지 호출하지 않고 CircuitOpenError를 발생시킵니다.
+      호출자는 이 경우 로컬 폴백을 사용합니다.
+    """
+
+    def __init__(self):
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.rate_limiter = TokenBucket(settings.GEMINI_RATE_LIMIT_PER_SECOND, settings.GEMINI_RATE_LIMIT_BURST)
+        self.semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(settings.GEMINI_CIRCUIT_FAILURE_THRESHOLD, settings.GEMINI_CIRCUIT_RESET_SECONDS)
+
+    def _timeout(self, deadline: Optional[float]) -> float:
+        time_left = remaining(deadline)
+        if time_left is None:
+            return settings.GEMINI_CALL_TIMEOUT_SECONDS
+        if time_left <= 0:
+            raise DeadlineExceeded("no time left for the Gemini call")
+        return min(settings.GEMINI_CALL_TIMEOUT_SECONDS, time_left)
+
+    async def _attempt(self, prompt: str, deadline: Optional[float]) -> str:
+        await self.rate_limiter.acquire(deadline)
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self._timeout(deadline))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("timed out waiting for a Gemini concurrency slot")
+        try:
+            timeout = self._timeout(deadline)
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(self.model.generate_content_async(prompt), timeout)
+            except asyncio.TimeoutError:
+                if timeout < settings.GEMINI_CALL_TIMEOUT_SECONDS:
+                    # 호출자의 남은 시간 때문에 짧아진 타임아웃이면 Gemini 장애로 보지 않습니다.
+                    raise DeadlineExceeded("deadline reached during the Gemini call")
+                raise
+            finally:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - start)
+            return response.text
+        finally:
+            self.semaphore.release()
+
+    async def generate(self, prompt: str, deadline: Optional[float] = None) -> str:
+        """프롬프트의 응답 텍스트를 반환합니다. 실패하면 마지막 오류를 그대로 발생시킵니다."""
+        if not self.breaker.allow():
+            LLM_CALLS.labels("circuit_open").inc()
+            raise CircuitOpenError("Gemini circuit breaker is open")
+        LLM_CIRCUIT_OPEN.set(0 if self.breaker.state == CircuitBreaker.CLOSED else 1)
+
+        attempt = 0
+        while True:
+            try:
+                text = await self._attempt(prompt, deadline)
+            except DeadlineExceeded:
+                # 호출자의 시간 예산이 부족한 것이지 Gemini가 비정상인 것은 아닙니다.
+                LLM_CALLS.labels("deadline").inc()
+                self.breaker.cancel_trial()
+                raise
+            except asyncio.CancelledError:
+                # 클라이언트 연결이 끊겨 요청이 취소된 경우
+                self.breaker.cancel_trial()
+                raise
+            except TRANSIENT_ERRORS as e:
+                delay = backoff_delay(attempt, settings.GEMINI_RETRY_BASE_SECONDS, settings.GEMINI_RETRY_MAX_SECONDS)
+                time_left = remaining(deadline)
+                if attempt >= settings.GEMINI_MAX_RETRIES or (time_left is not None and delay >= time_left):
+                    LLM_CALLS.labels("timeout" if isinstance(e, asyncio.TimeoutError) else "error").inc()
+                    self._record_failure()
+                    raise
+                LLM_CALLS.labels("retry").inc()
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except Exception:
+                LLM_CALLS.labels("error").inc()
+                self._record_failure()
+                raise
+
+            LLM_CALLS.labels("success").inc()
+            self.breaker.record_success()
+            LLM_CIRCUIT_OPEN.set(0)
+            return text
+
+    def _record_failure(self):
+        self.breaker.record_failure()
+        LLM_CIRCUIT_OPEN.set(0 if self.breaker.state == CircuitBreaker.CLOSED else 1)
+
+
+_client: Optional[GeminiClient] = None
+
+
+def get_gemini_client() -> GeminiClient:
+    """프로세스 단위 GeminiClient. 처음 사용할 때(이벤트 루프 안에서) 만듭니다."""
+    global _client
+    if _client is None:
+        _client = GeminiClient()
+    return _client
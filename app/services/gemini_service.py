@@ -1,42 +1,172 @@
-import google.generativeai as genai
 import json
 import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from app.core.config import settings
+from app.core.resilience import CircuitOpenError, DeadlineExceeded
 from app.models.activity import ActivityModel
+from app.services.gemini_client import GeminiClient, get_gemini_client
 
 class GeminiService:
-    def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+    def __init__(self, client: Optional[GeminiClient] = None):
+        self._client = client
 
-    async def generate_realistic_schedule(self, activities: List[ActivityModel], start_time: datetime.datetime, end_time: datetime.datetime) -> List[Dict[str, Any]]:
+    @property
+    def client(self) -> GeminiClient:
+        # 요청마다 서비스가 만들어지므로 모델/연결은 프로세스 단위 클라이언트를 공유합니다.
+        if self._client is None:
+            self._client = get_gemini_client()
+        return self._client
+
+    async def generate_realistic_schedule(self, activities: List[ActivityModel], start_time: datetime.datetime, end_time: datetime.datetime, deadline: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Gemini로 활동 순서와 시간을 정합니다. deadline(time.monotonic() 기준)까지 끝내지 못하거나
+        Gemini가 비정상이거나 응답이 _validate_schedule을 통과하지 못하면 None을 반환하고, 호출자는 로컬 타임라인을 사용합니다.
+        """
         prompt = self._create_prompt(activities, start_time, end_time)
         try:
-            response = await self.model.generate_content_async(prompt)
-            
-            # Extract JSON from the response text
-            response_text = response.text
-            json_start = response_text.find('```json')
-            json_end = response_text.rfind('```')
-            
-            if json_start != -1 and json_end != -1:
-                json_str = response_text[json_start + 7 : json_end].strip()
-                schedule_data = json.loads(json_str)
-                
-                # Convert time strings to datetime objects
-                for item in schedule_data:
-                    item['start_time'] = datetime.datetime.fromisoformat(item['start_time'])
-                    item['end_time'] = datetime.datetime.fromisoformat(item['end_time'])
-                return schedule_data
-            else:
-                # Fallback or error handling if JSON is not found
-                return []
+            response_text = await self.client.generate(prompt, deadline)
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            print(f"Skipping Gemini schedule refinement: {e}")
+            return None
+        except Exception as e:
+            print(f"Error calling Gemini API: {e}")
+            return None
+
+        try:
+            return self._validate_schedule(self._extract_json(response_text), activities, start_time, end_time)
+        except (ValueError, TypeError, KeyError) as e:
+            print(f"Invalid Gemini schedule: {e}")
+            return None
 
+    async def generate_realistic_schedules(self, activity_lists: List[List[ActivityModel]], start_time: datetime.datetime, end_time: datetime.datetime, deadline: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """
+        여러 후보 스케줄을 한 번의 프롬프트로 정합니다. 응답은 "schedule_<번호>" 키의 JSON 객체이며,
+        스케줄마다 따로 검증하여 잘못된 스케줄만 빈 리스트(로컬 타임라인 사용)로 돌려줍니다.
+        """
+        empty = [[] for _ in activity_lists]
+        prompt = self._create_batch_prompt(activity_lists, start_time, end_time)
+        try:
+            response_text = await self.client.generate(prompt, deadline)
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            print(f"Skipping Gemini schedule refinement: {e}")
+            return empty
         except Exception as e:
             print(f"Error calling Gemini API: {e}")
-            return []
+            return empty
+
+        try:
+            response_data = self._extract_json(response_text)
+        except ValueError as e:
+            print(f"Error parsing Gemini response: {e}")
+            return empty
+        if not isinstance(response_data, dict):
+            print("Error parsing Gemini response: expected a JSON object keyed by schedule")
+            return empty
+
+        schedules = []
+        for index, activities in enumerate(activity_lists, start=1):
+            key = f"schedule_{index}"
+            try:
+                schedules.append(self._validate_schedule(response_data.get(key), activities, start_time, end_time))
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Invalid Gemini schedule {key}: {e}")
+                schedules.append([])
+        return schedules
+
+    @staticmethod
+    def _extract_json(response_text: str) -> Any:
+        """```json 코드 블록(없으면 응답 전체)의 JSON을 읽습니다."""
+        json_start = response_text.find('```json')
+        json_end = response_text.rfind('```')
+        if json_start != -1 and json_end > json_start:
+            response_text = response_text[json_start + 7 : json_end]
+        return json.loads(response_text.strip())
+
+    @staticmethod
+    def _validate_schedule(items: Any, activities: List[ActivityModel], start_time: datetime.datetime, end_time: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        스케줄 하나를 검증합니다. 모든 활동이 정확히 한 번씩, 시간 범위 안에서 겹치지 않게 배치되어야 합니다.
+        문제가 있으면 ValueError를 발생시킵니다.
+        """
+        if not isinstance(items, list):
+            raise ValueError("missing or not a list")
+
+        # MongoDB에서 읽은 그룹 시각은 naive(UTC)이고 Gemini는 오프셋을 붙여 답하기도 하므로, 양쪽을 naive UTC로 맞춰 비교합니다.
+        def to_naive_utc(value: datetime.datetime) -> datetime.datetime:
+            if value.tzinfo is None:
+                return value
+            return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+        def parse(value: str) -> datetime.datetime:
+            parsed = datetime.datetime.fromisoformat(value)
+            if parsed.tzinfo is None and start_time.tzinfo is not None:
+                parsed = parsed.replace(tzinfo=start_time.tzinfo)
+            return to_naive_utc(parsed)
+
+        start_time = to_naive_utc(start_time)
+        end_time = to_naive_utc(end_time)
+
+        schedule = []
+        for item in items:
+            schedule.append({
+                'activity_id': str(item['activity_id']),
+                'start_time': parse(item['start_time']),
+                'end_time': parse(item['end_time']),
+            })
+
+        scheduled_ids = [item['activity_id'] for item in schedule]
+        if sorted(scheduled_ids) != sorted(str(activity.id) for activity in activities):
+            raise ValueError("activities do not match the candidate schedule")
+
+        schedule.sort(key=lambda item: item['start_time'])
+        previous_end = start_time
+        for item in schedule:
+            if item['start_time'] < previous_end or item['end_time'] <= item['start_time']:
+                raise ValueError("overlapping or empty time slot")
+            previous_end = item['end_time']
+        if previous_end > end_time:
+            raise ValueError("schedule exceeds the time window")
+        return schedule
+
+    def _create_batch_prompt(self, activity_lists: List[List[ActivityModel]], start_time: datetime.datetime, end_time: datetime.datetime) -> str:
+        schedule_list_str = "\n".join(
+            f"- schedule_{index}:\n" + "\n".join(f"  - {activity.name} (ID: {activity.id}, Category: {activity.type.value})" for activity in activities)
+            for index, activities in enumerate(activity_lists, start=1)
+        )
+
+        prompt = f"""
+You are an expert trip planner. Your task is to create a realistic and enjoyable schedule for each of several candidate activity lists within the same time window.
+
+**Instructions:**
+1.  Plan every candidate schedule independently, using only the activities listed under its key.
+2.  Analyze the activities, considering their type (e.g., FOOD, ACTIVITY), and determine a logical sequence. For example, don't schedule two meals back-to-back.
+3.  Allocate a reasonable amount of time for each activity. Consider that meals usually take about 1-1.5 hours, and other activities might take 1-2 hours.
+4.  Schedule meal times around lunch and dinner hours, and plan alcoholic activities for the evening.
+5.  Each schedule must include every one of its activities exactly once, without overlaps, within the given start and end times.
+6.  Return a single JSON object whose keys are the schedule keys (e.g. `schedule_1`) and whose values are arrays of objects with `activity_id`, `start_time`, and `end_time` in ISO 8601 format.
+
+**Input:**
+- **Start Time:** {start_time.isoformat()}
+- **End Time:** {end_time.isoformat()}
+- **Candidate Schedules:**
+{schedule_list_str}
+
+**Output Format (JSON only):**
+```json
+{{
+  "schedule_1": [
+    {{
+      "activity_id": "...",
+      "start_time": "YYYY-MM-DDTHH:MM:SS",
+      "end_time": "YYYY-MM-DDTHH:MM:SS"
+    }},
+    ...
+  ],
+  ...
+}}
+```
+"""
+        return prompt
 
     def _create_prompt(self, activities: List[ActivityModel], start_time: datetime.datetime, end_time: datetime.datetime) -> str:
         activity_list_str = "\n".join([f"- {activity.name} (ID: {activity.id}, Category: {activity.type.value})" for activity in activities])
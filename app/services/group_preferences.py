@@ -0,0 +1,106 @@
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.features import FOOD_BIT_COUNT, PREFERENCE_VECTOR_SIZE, preference_vector
+
+# 그룹 통합 선호도 계산 방식 (consensus strategy)
+# 음식 점수는 좋고 싫음의 정도이므로 전략마다 다르게 합치지만, 놀이 선호도는 -1 ~ 1 사이의 위치이므로
+# 최솟값/최댓값이 의미가 없어 weighted를 제외한 모든 전략에서 평균을 사용합니다.
+STRATEGY_MEAN = "mean"                              # 멤버 평균 (선호도를 불러올 수 없는 멤버는 0으로 계산)
+STRATEGY_WEIGHTED = "weighted"                      # 멤버별 가중치로 가중 평균
+STRATEGY_LEAST_MISERY = "least_misery"              # 음식: 가장 낮은 멤버의 점수
+STRATEGY_MOST_PLEASURE = "most_pleasure"            # 음식: 가장 높은 멤버의 점수
+STRATEGY_VARIANCE_PENALIZED = "variance_penalized"  # 음식: 평균 - variance_penalty * 표준편차
+
+# 이 모듈은 settings에 의존하지 않습니다. Settings가 GROUP_PREFERENCE_STRATEGY를 CONSENSUS_STRATEGIES로 검증할 때 가져옵니다.
+
+
+class MemberPreferenceStats:
+    """멤버 선호도 행렬의 열별 통계. 모든 전략이 이 통계 하나로 계산됩니다."""
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        member_count: int,
+        weights: Optional[List[float]] = None,
+        variance_penalty: float = 0.0,
+    ):
+        w = np.ones(len(matrix)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.mean = matrix.sum(axis=0) / member_count
+        # 가중치 합이 0이면(예: 방장 가중치 0이고 방장만 있는 그룹) 나누지 않고 평균을 사용합니다.
+        total_weight = w.sum()
+        self.weighted_mean = w @ matrix / total_weight if total_weight > 0 else self.mean
+        self.variance_penalty = variance_penalty
+        self.min = matrix.min(axis=0)
+        self.max = matrix.max(axis=0)
+        self.std = matrix.std(axis=0)
+
+    def with_food(self, food: np.ndarray) -> np.ndarray:
+        """음식 부분만 food로 바꾸고 놀이 부분은 평균을 사용한 선호도 벡터."""
+        result = self.mean.copy()
+        result[:FOOD_BIT_COUNT] = food[:FOOD_BIT_COUNT]
+        return result
+
+
+CONSENSUS_STRATEGIES: Dict[str, Callable[[MemberPreferenceStats], np.ndarray]] = {}
+
+
+def consensus_strategy(name: str):
+    """MemberPreferenceStats -> 선호도 벡터 함수를 전략으로 등록합니다."""
+    def register(fn: Callable[[MemberPreferenceStats], np.ndarray]):
+        CONSENSUS_STRATEGIES[name] = fn
+        return fn
+    return register
+
+
+@consensus_strategy(STRATEGY_MEAN)
+def _mean(stats: MemberPreferenceStats) -> np.ndarray:
+    return stats.mean
+
+
+@consensus_strategy(STRATEGY_WEIGHTED)
+def _weighted(stats: MemberPreferenceStats) -> np.ndarray:
+    return stats.weighted_mean
+
+
+@consensus_strategy(STRATEGY_LEAST_MISERY)
+def _least_misery(stats: MemberPreferenceStats) -> np.ndarray:
+    return stats.with_food(stats.min)
+
+
+@consensus_strategy(STRATEGY_MOST_PLEASURE)
+def _most_pleasure(stats: MemberPreferenceStats) -> np.ndarray:
+    return stats.with_food(stats.max)
+
+
+@consensus_strategy(STRATEGY_VARIANCE_PENALIZED)
+def _variance_penalized(stats: MemberPreferenceStats) -> np.ndarray:
+    return stats.with_food(stats.mean - stats.variance_penalty * stats.std)
+
+
+def member_preference_matrix(user_docs: Iterable[dict]) -> np.ndarray:
+    """사용자 문서들을 (멤버 수, PREFERENCE_VECTOR_SIZE) 선호도 행렬로 변환합니다."""
+    rows = [preference_vector(doc.get("food_preferences"), doc.get("play_preferences")) for doc in user_docs]
+    if not rows:
+        return np.zeros((0, PREFERENCE_VECTOR_SIZE), dtype=np.float64)
+    return np.vstack(rows)
+
+
+def compute_consensus(
+    matrix: np.ndarray,
+    member_count: int,
+    weights: Optional[List[float]] = None,
+    variance_penalty: float = 0.0,
+) -> Dict[str, np.ndarray]:
+    """
+    등록된 모든 전략의 그룹 선호도 벡터를 한 번에 계산합니다.
+    member_count는 그룹의 멤버 수로, 행렬에 없는 멤버(탈퇴한 사용자 등)는 mean에서 0으로 계산됩니다.
+    variance_penalty는 variance_penalized에서 음식 점수 표준편차에 곱하는 계수(CONSENSUS_VARIANCE_PENALTY)입니다.
+    결과는 선호도 모델의 범위(-1 ~ 1)로 자릅니다.
+    """
+    if len(matrix) == 0 or member_count <= 0:
+        return {name: np.zeros(PREFERENCE_VECTOR_SIZE, dtype=np.float64) for name in CONSENSUS_STRATEGIES}
+    stats = MemberPreferenceStats(matrix, member_count, weights, variance_penalty)
+    return {name: np.clip(strategy(stats), -1.0, 1.0) for name, strategy in CONSENSUS_STRATEGIES.items()}
+
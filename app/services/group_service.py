@@ -1,26 +1,58 @@
+import asyncio
 import datetime
+import hashlib
+import heapq
+import json
+import math
 import random
+import time
 import numpy as np
-from collections import defaultdict
-from typing import List, Optional
-from itertools import permutations, product
+from typing import AsyncIterator, List, Optional
+from itertools import product
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.models.group import GroupModel
-from app.models.category import CategoryModel
-from app.models.activity import ActivityModel, FoodAttributes
+from app.models.activity import ActivityModel
 from app.models.schedule import ScheduledActivity
-from app.schemas.schedule import ScheduleSuggestion, ListScheduleResponse
+from app.schemas.schedule import ScheduleSuggestion, ListScheduleResponse, ScheduleStreamEvent
+from app.schemas.schedule import ScheduledActivity as ResponseScheduledActivity
 from app.schemas.user import FoodPreferences, PlayPreferences
 from app.schemas.category import CategoryListResponse
 from app.schemas.group import GroupCreate, GroupUpdate, GroupDetailResponse, GroupMember
 from app.core.config import settings
 from app.core.enums import ActivityType
+from app.core.features import FOOD_BIT_COUNT, encode_play_vector, food_preference_vector, food_preferences_from_vector, play_preferences_from_vector
+from app.core.singleflight import SingleFlight
+from app.core.telemetry import PipelineTrace
+from app.db.catalog_meta import CATEGORIES_CATALOG, get_catalog_version
+from app.services.activity_features import ActivityFeatures, activity_feature_cache, load_activities
+from app.services.ann_index import top_food_rows, top_play_rows
+from app.services.category_index import category_index_cache
+from app.services.factor_model import factor_model_cache
 from app.services.user_service import UserService
 from app.services.gemini_service import GeminiService
+from app.services.group_preferences import compute_consensus, member_preference_matrix
+from app.services.recommendation_cache import RecommendationCache
+from app.services.slot_rules import get_slot_rule_table, slot_rules_fingerprint
+from app.services.singleflight_service import MongoSingleFlight
+
+# 같은 그룹/선호도/입력으로 동시에 들어온 요청을 하나의 계산으로 합칩니다. GroupService는 요청마다 만들어지므로 모듈 수준에 둡니다.
+_recommend_flights = SingleFlight("recommend_categories")
+_schedule_flights = SingleFlight("create_schedules")
+# 추천/스케줄 결과에 영향을 주는 그룹 필드. 이 필드나 멤버가 바뀌면 preference_version을 올립니다.
+PREFERENCE_FIELDS = ("food_preferences", "play_preferences", "preference_vectors", "starttime", "endtime")
 
 class GroupService:
+    # --- Parameters for recommendation diversity ---
+    POOL_SIZE = 10  # Number of activities to select for the final pool
+    CANDIDATE_POOL_SIZE = 30  # Number of candidates for sampling
+    DIVERSITY_WEIGHT = 0.5  # Weight for the diversity score
+    HARMONY_WEIGHT = 1.0  # Weight for the harmony score
+    NOVELTY_WEIGHT = 0.3 # Weight for novelty between schedules
+    MMR_CANDIDATE_LIMIT = 500  # Number of top-ranked schedules considered by MMR
+    # -----------------------------------------
+
     def __init__(self, db_client: AsyncIOMotorClient):
         self.db = db_client[settings.MONGO_DATABASE]
         self.collection = self.db.groups
@@ -30,77 +62,203 @@ class GroupService:
         self.schedules_collection = self.db.schedules
         self.user_service = UserService(db_client)
         self.gemini_service = GeminiService()
+        self.distributed_recommend_flights = MongoSingleFlight(db_client, _recommend_flights.operation)
+        self.distributed_schedule_flights = MongoSingleFlight(db_client, _schedule_flights.operation)
+        self.recommendation_cache = RecommendationCache(db_client)
+
+    def _sample_pool(self, candidate_rows: np.ndarray, weights: np.ndarray) -> List[int]:
+        """
+        가중치에 비례해 비복원 추출로 POOL_SIZE개의 후보를 고릅니다.
+        음수/무한대 가중치는 0으로 보고, 가중치가 양수인 후보가 모자라면 나머지는 순위 순서대로 채웁니다.
+        """
+        size = min(self.POOL_SIZE, len(candidate_rows))
+        weights = np.where(np.isfinite(weights) & (weights > 0), weights, 0.0)
+        positive = int(np.count_nonzero(weights))
+        if positive == 0:
+            # If all weights are zero, fall back to top N
+            return candidate_rows[:size].tolist()
+
+        probabilities = weights / weights.sum()
+        # Use np.random.choice for sampling without replacement
+        sampled_indices = list(np.random.choice(len(candidate_rows), size=min(size, positive), p=probabilities, replace=False))
+        if len(sampled_indices) < size:
+            chosen = set(sampled_indices)
+            sampled_indices += [i for i in range(len(candidate_rows)) if i not in chosen][:size - len(sampled_indices)]
+        return candidate_rows[sampled_indices].tolist()
+
+    def _search_best_schedules(self, features: ActivityFeatures, activity_pools: List[List[int]], limit: int, trace: PipelineTrace) -> List[tuple]:
+        """
+        각 풀(ActivityFeatures 행 번호 목록)에서 하나씩 고른 조합마다 조화 점수가 가장 좋은 순서를 찾고,
+        점수가 가장 낮은(좋은) limit개의 (행 번호 튜플, 점수)를 점수순으로 반환합니다.
+
+        조합은 product로 하나씩 소비하고 상위 limit개만 힙에 유지하므로 메모리는 조합 수와 무관합니다.
+        다양성 점수는 순서와 무관하고 거리는 음수가 아니므로, 조합 점수의 하한(가장 짧은 거리들로 만든 조화 점수 -
+        다양성 점수)이 힙의 최하위 점수보다 나쁘면 조합 전체를, 순서 탐색 중 부분 점수가 현재 기준 이상이면
+        그 접두사를 가지치기합니다.
+        """
+        rows = [row for pool in activity_pools for row in pool]
+        pool_indices = []
+        offset = 0
+        for pool in activity_pools:
+            pool_indices.append(range(offset, offset + len(pool)))
+            offset += len(pool)
+
+        # 풀 활동 간 거리를 한 번만 계산해 두고 모든 조합/순서에서 재사용합니다.
+        distances = features.pairwise_distances(np.asarray(rows, dtype=np.int64)).tolist()
+
+        size = len(activity_pools)
+        # remaining_leaves[d]: 길이 d인 접두사 아래에 있는 완전한 순서의 수
+        remaining_leaves = [math.factorial(size - depth) for depth in range(size + 1)]
+        stats = {"permutations_evaluated": 0, "permutations_pruned": 0}
+
+        def best_order(combo: tuple, diversity_penalty: float, threshold: float):
+            """threshold보다 좋은 점수를 내는 순서 중 최선(동점이면 사전순으로 처음)을 찾습니다."""
+            best = [threshold, None]
+            order = []
+            used = [False] * size
+
+            def visit(harmony: float):
+                if len(order) == size:
+                    stats["permutations_evaluated"] += 1
+                    final_score = (self.HARMONY_WEIGHT * harmony) - diversity_penalty
+                    if final_score < best[0]:
+                        best[0] = final_score
+                        best[1] = tuple(order)
+                    return
+                for position in range(size):
+                    if used[position]:
+                        continue
+                    partial = harmony + distances[combo[order[-1]]][combo[position]] if order else harmony
+                    if (self.HARMONY_WEIGHT * partial) - diversity_penalty >= best[0]:
+                        stats["permutations_pruned"] += remaining_leaves[len(order) + 1]
+                        continue
+                    used[position] = True
+                    order.append(position)
+                    visit(partial)
+                    order.pop()
+                    used[position] = False
+
+            visit(0.0)
+            return best[1], best[0]
+
+        heap = []  # (-score, -sequence, order): heap[0]이 유지 중인 후보 중 가장 나쁜 것
+        combos_evaluated = 0
+        combos_pruned = 0
+        for sequence, combo in enumerate(product(*pool_indices)):
+            combos_evaluated += 1
+
+            # Diversity score does not depend on the order of the combo
+            pair_distances = [distances[combo[i]][combo[j]] for i in range(size) for j in range(i + 1, size)]
+            diversity_score = sum(pair_distances) / len(pair_distances) if pair_distances else 0
+            diversity_penalty = self.DIVERSITY_WEIGHT * diversity_score
+
+            threshold = float('inf')
+            if len(heap) >= limit:
+                threshold = -heap[0][0]
+                # 어떤 순서든 조화 점수는 가장 짧은 size-1개 거리의 합 이상입니다.
+                harmony_lower_bound = sum(sorted(pair_distances)[:size - 1])
+                if (self.HARMONY_WEIGHT * harmony_lower_bound) - diversity_penalty >= threshold:
+                    combos_pruned += 1
+                    stats["permutations_pruned"] += remaining_leaves[0]
+                    continue
+
+            order, score = best_order(combo, diversity_penalty, threshold)
+            if order is None:
+                continue
+            entry = (-score, -sequence, tuple(combo[position] for position in order))
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+
+        trace.count("combos_evaluated", combos_evaluated)
+        trace.count("combos_pruned", combos_pruned)
+        trace.count("permutations_evaluated", stats["permutations_evaluated"])
+        trace.count("permutations_pruned", stats["permutations_pruned"])
+
+        ranked = sorted(heap, key=lambda entry: (-entry[0], -entry[1]))
+        return [(tuple(rows[i] for i in indices), -neg_score) for neg_score, _, indices in ranked]
+
+    def _select_diverse_schedules(self, ranked_schedules: List[tuple], top_n: int) -> List[tuple]:
+        """
+        점수순으로 정렬된 (행 번호 튜플, 점수) 목록에서 MMR로 top_n개의 스케줄을 고릅니다.
+        상위 MMR_CANDIDATE_LIMIT개 후보만 고려하며, 각 후보를 활동 포함 여부 비트셋 행으로 표현해
+        새로 선택된 스케줄과의 Jaccard 비유사도만 라운드마다 누적하므로 후보 수에 대해 선형입니다.
+        """
+        candidates = ranked_schedules[:self.MMR_CANDIDATE_LIMIT]
+        if not candidates:
+            return []
+
+        activity_index = {}
+        membership_rows = [
+            [activity_index.setdefault(row, len(activity_index)) for row in schedule]
+            for schedule, _ in candidates
+        ]
+        membership = np.zeros((len(candidates), len(activity_index)), dtype=np.float32)
+        for row, columns in enumerate(membership_rows):
+            membership[row, columns] = 1.0
+        sizes = membership.sum(axis=1)
+        scores = np.array([score for _, score in candidates], dtype=np.float64)
+
+        novelty_sum = np.zeros(len(candidates), dtype=np.float64)
+        available = np.ones(len(candidates), dtype=bool)
 
-    def _euclidean_distance(self, v1, v2):
-        """두 벡터 간의 유클리드 거리를 계산합니다."""
-        v1 = np.array(v1)
-        v2 = np.array(v2)
-        return np.linalg.norm(v1 - v2)
-
-    def _calculate_food_similarity_score(self, prefs: FoodPreferences, attrs: FoodAttributes) -> float:
-        """음식 선호도와 속성 간의 유사도 점수를 계산합니다."""
-        score = 0
-        if not prefs or not attrs:
-            return 0
-        
-        pref_dict = {
-            'ingredients': {p.name.value: p.score for p in prefs.ingredients},
-            'tastes': {p.name.value: p.score for p in prefs.tastes},
-            'cooking_methods': {p.name.value: p.score for p in prefs.cooking_methods},
-            'cuisine_types': {p.name.value: p.score for p in prefs.cuisine_types}
-        }
-
-        attr_dict = {
-            'ingredients': [a.value for a in attrs.ingredients],
-            'tastes': [a.value for a in attrs.tastes],
-            'cooking_methods': [a.value for a in attrs.cooking_methods],
-            'cuisine_types': [a.value for a in attrs.cuisine_types]
-        }
-
-        for pref_type, preferences in pref_dict.items():
-            for pref_name, pref_score in preferences.items():
-                if pref_name in attr_dict[pref_type]:
-                    score += pref_score
-
-        return score
-
-    def _calculate_food_attraction_score(self, attr1: FoodAttributes, attr2: FoodAttributes) -> float:
-        """두 음식 활동 간의 유사도 점수를 계산합니다."""
-        if not attr1 or not attr2:
-            return 0
-        
-        score = 0
-        attr1_sets = {
-            'ingredients': {a.value for a in attr1.ingredients},
-            'tastes': {a.value for a in attr1.tastes},
-            'cooking_methods': {a.value for a in attr1.cooking_methods},
-            'cuisine_types': {a.value for a in attr1.cuisine_types}
-        }
-        attr2_sets = {
-            'ingredients': {a.value for a in attr2.ingredients},
-            'tastes': {a.value for a in attr2.tastes},
-            'cooking_methods': {a.value for a in attr2.cooking_methods},
-            'cuisine_types': {a.value for a in attr2.cuisine_types}
-        }
-
-        for key in attr1_sets:
-            score += len(attr1_sets[key].intersection(attr2_sets[key]))
-        
-        # 유사도가 높을수록 거리는 가까워야 하므로 역수로 변환 (0으로 나누는 것 방지)
-        return 1 / (1 + score)
-
-    def _jaccard_dissimilarity(self, schedule1: tuple, schedule2: tuple) -> float:
-        """두 스케줄 간의 Jaccard 유사도를 계산합니다."""
-        set1 = {str(act.id) for act in schedule1[0]}
-        set2 = {str(act.id) for act in schedule2[0]}
-        
-        intersection = len(set1.intersection(set2))
-        union = len(set1.union(set2))
-        
-        if union == 0:
-            return 0.0
-        
-        return 1.0 - (intersection / union)
+        # Select the first schedule (the best one)
+        selected = [0]
+        available[0] = False
+
+        while len(selected) < top_n and available.any():
+            # Jaccard dissimilarity of every candidate against the newest selection
+            last = selected[-1]
+            intersection = membership @ membership[last]
+            union = sizes + sizes[last] - intersection
+            novelty_sum += np.where(union > 0, 1.0 - intersection / np.maximum(union, 1), 0.0)
+
+            # MMR score: lower original score is better, so we use -original_score
+            mmr_scores = -scores + self.NOVELTY_WEIGHT * (novelty_sum / len(selected))
+            mmr_scores[~available] = -np.inf
+            next_index = int(np.argmax(mmr_scores))
+            selected.append(next_index)
+            available[next_index] = False
+
+        return [candidates[i] for i in selected]
+
+    def _gemini_timeline(self, activities: List[ActivityModel], gemini_schedule: List[dict], category_names_by_id: dict) -> List[ResponseScheduledActivity]:
+        """Gemini가 정한 순서와 시간으로 응답용 일정을 만듭니다."""
+        activity_map = {str(act.id): act for act in activities}
+        response_activities = []
+        for item in gemini_schedule:
+            activity_obj = activity_map.get(item['activity_id'])
+            if activity_obj:
+                response_activities.append(ResponseScheduledActivity(
+                    name=activity_obj.name,
+                    category=category_names_by_id[activity_obj.category_id],
+                    start_time=item['start_time'],
+                    end_time=item['end_time'],
+                    location=activity_obj.location
+                ))
+        return response_activities
+
+    def _local_timeline(self, activities: List[ActivityModel], group: GroupModel, category_names_by_id: dict) -> List[ResponseScheduledActivity]:
+        """그룹 시간을 활동 수로 균등하게 나눈 일정을 만듭니다."""
+        if not activities:
+            return []
+        total_duration = (group.endtime - group.starttime).total_seconds()
+        duration_per_activity = total_duration / len(activities)
+
+        response_activities = []
+        current_time = group.starttime
+        for activity_obj in activities:
+            end_time = current_time + datetime.timedelta(seconds=duration_per_activity)
+            response_activities.append(ResponseScheduledActivity(
+                name=activity_obj.name,
+                category=category_names_by_id[activity_obj.category_id],
+                start_time=current_time,
+                end_time=end_time,
+                location=activity_obj.location
+            ))
+            current_time = end_time
+        return response_activities
 
     async def _create_group_detail_response(self, group_doc: dict) -> GroupDetailResponse:
         group_model = GroupModel(**group_doc)
@@ -151,9 +309,12 @@ class GroupService:
         if not update_data:
             return await self.get_group(group_id)
 
+        update = {"$set": update_data}
+        if any(field in update_data for field in PREFERENCE_FIELDS):
+            update["$inc"] = {"preference_version": 1}
         await self.collection.update_one(
             {"_id": ObjectId(group_id)},
-            {"$set": update_data}
+            update
         )
         return await self.get_group(group_id)
 
@@ -167,6 +328,7 @@ class GroupService:
         await self.user_service.remove_group_from_all_users(group.member_ids, group_id)
 
         result = await self.collection.delete_one({"_id": ObjectId(group_id)})
+        await self.recommendation_cache.invalidate(group_id)
         return result.deleted_count > 0
 
     async def add_member(self, group_id: str, user_id: str) -> bool:
@@ -185,7 +347,7 @@ class GroupService:
         # Add user to group's member_ids
         group_update_result = await self.collection.update_one(
             {"_id": ObjectId(group_id)},
-            {"$addToSet": {"member_ids": user_id}}
+            {"$addToSet": {"member_ids": user_id}, "$inc": {"preference_version": 1}}
         )
 
         # Add group to user's group_ids
@@ -208,7 +370,7 @@ class GroupService:
         # Remove user from group's member_ids
         group_update_result = await self.collection.update_one(
             {"_id": ObjectId(group_id)},
-            {"$pull": {"member_ids": user_id}}
+            {"$pull": {"member_ids": user_id}, "$inc": {"preference_version": 1}}
         )
 
         # Remove group from user's group_ids
@@ -233,6 +395,7 @@ class GroupService:
             {"$set": {"is_active": False}}
         )
         print(f"Deactivated {result.modified_count} expired groups.")
+        return {"matched": result.matched_count, "deactivated": result.modified_count}
 
     async def calculate_and_update_group_preferences(self, group_id: str) -> Optional[GroupDetailResponse]:
         group_doc = await self.collection.find_one({"_id": ObjectId(group_id)})
@@ -242,108 +405,142 @@ class GroupService:
         if not group.member_ids:
             return await self._create_group_detail_response(group_doc)
 
-        num_members = len(group.member_ids)
-        
-        # Food preferences calculation
-        total_food_scores = defaultdict(lambda: defaultdict(float))
-        # Play preferences calculation
-        total_play_scores = defaultdict(float)
-
-        for member_id in group.member_ids:
-            user = await self.user_service.get_user(member_id)
-            if user:
-                # Accumulate food preferences scores
-                for pref_type in ['ingredients', 'tastes', 'cooking_methods', 'cuisine_types']:
-                    for preference in getattr(user.food_preferences, pref_type):
-                        total_food_scores[pref_type][preference.name.value] += preference.score
-                
-                # Accumulate play preferences scores
-                for attr, value in user.play_preferences.dict().items():
-                    total_play_scores[attr] += value
-
-        # Calculate average food preferences
-        avg_food_prefs = FoodPreferences()
-        for pref_type in ['ingredients', 'tastes', 'cooking_methods', 'cuisine_types']:
-            for preference in getattr(avg_food_prefs, pref_type):
-                preference.score = total_food_scores[pref_type][preference.name.value] / num_members
-
-        # Calculate average play preferences
-        avg_play_prefs = PlayPreferences()
-        for attr in avg_play_prefs.dict().keys():
-            setattr(avg_play_prefs, attr, total_play_scores[attr] / num_members)
+        # 멤버 선호도를 한 번에 읽어 (멤버 수, 30) 행렬로 만들고 한 번의 행렬 연산으로 합칩니다.
+        member_object_ids = [ObjectId(member_id) for member_id in group.member_ids if ObjectId.is_valid(member_id)]
+        user_docs = await self.users_collection.find(
+            {"_id": {"$in": member_object_ids}},
+            {"food_preferences": 1, "play_preferences": 1},
+        ).to_list(length=None)
+        # $in은 순서를 보장하지 않으므로 member_ids 순서로 맞춥니다.
+        user_docs_by_id = {str(doc["_id"]): doc for doc in user_docs}
+        members = [user_docs_by_id[member_id] for member_id in group.member_ids if member_id in user_docs_by_id]
+        weights = [
+            settings.GROUP_PREFERENCE_OWNER_WEIGHT if str(doc["_id"]) == group.owner_id else 1.0
+            for doc in members
+        ]
+        # 등록된 모든 합의 전략의 결과를 함께 저장해, 요청마다 전략을 바꿔도 다시 계산하지 않게 합니다.
+        consensus = compute_consensus(
+            member_preference_matrix(members),
+            len(group.member_ids),
+            weights,
+            settings.CONSENSUS_VARIANCE_PENALTY,
+        )
+        group_vector = consensus[settings.GROUP_PREFERENCE_STRATEGY]
+        avg_food_prefs = FoodPreferences(**food_preferences_from_vector(group_vector))
+        avg_play_prefs = PlayPreferences(**play_preferences_from_vector(group_vector))
 
         # Update group with calculated preferences
         updated_group = await self.update_group(group_id, GroupUpdate(
             food_preferences=avg_food_prefs,
-            play_preferences=avg_play_prefs
+            play_preferences=avg_play_prefs,
+            preference_vectors={name: vector.tolist() for name, vector in consensus.items()},
         ))
         
         return updated_group
 
-    async def recommend_categories(self, group_id: str, top_n: int = 5) -> CategoryListResponse:
-        group_doc = await self.collection.find_one({"_id": ObjectId(group_id)})
+    @staticmethod
+    def _flight_key(group_id: str, group_doc: dict, *params) -> str:
+        """그룹 ID, preference_version, 시간 범위와 요청 파라미터로 만든 single-flight 키."""
+        fingerprint = [group_id, group_doc.get("preference_version", 0), group_doc.get("starttime"), group_doc.get("endtime")] + list(params)
+        payload = json.dumps(fingerprint, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    async def _single_flight(self, flights: SingleFlight, distributed: MongoSingleFlight, key: str, fn, encode, decode):
+        if settings.SINGLEFLIGHT_DISTRIBUTED:
+            return await flights.do(key, lambda: distributed.do(key, fn, encode, decode))
+        return await flights.do(key, fn)
+
+    async def _group_versions(self, group_id: str) -> Optional[dict]:
+        """single-flight 키와 추천 캐시에 필요한 그룹 필드만 읽습니다."""
+        return await self.collection.find_one(
+            {"_id": ObjectId(group_id)},
+            {"preference_version": 1, "starttime": 1, "endtime": 1, "play_preferences": 1, "preference_vectors": 1},
+        )
+
+    async def _consensus_vector(self, trace: PipelineTrace, group_id: str, group: GroupModel, strategy: str) -> Optional[np.ndarray]:
+        """
+        그룹에 저장된 strategy 합의 선호도 벡터(음식 FOOD_BIT_COUNT개 + 놀이). 아직 계산된 적이 없는 그룹이면
+        통합 선호도를 다시 계산해 저장한 뒤 사용합니다.
+        """
+        vectors = group.preference_vectors or {}
+        if strategy not in vectors:
+            with trace.stage("preference_refresh"):
+                group_with_prefs = await self.calculate_and_update_group_preferences(group_id)
+            vectors = (group_with_prefs.preference_vectors if group_with_prefs else None) or {}
+        if strategy not in vectors:
+            return None
+        return np.asarray(vectors[strategy], dtype=np.float64)
+
+    async def recommend_categories(self, group_id: str, top_n: int = 5, strategy: Optional[str] = None) -> CategoryListResponse:
+        """strategy를 지정하면 그룹의 기본 통합 선호도 대신 해당 합의 전략의 선호도를 사용합니다."""
+        group_doc, catalog_version = await asyncio.gather(
+            self._group_versions(group_id),
+            get_catalog_version(self.db, CATEGORIES_CATALOG),
+        )
+        if not group_doc:
+            return CategoryListResponse(categories=[])
+        preference_version = group_doc.get("preference_version", 0)
+        rules_version = slot_rules_fingerprint(settings.CATEGORY_SLOT_RULES)
+        cached = await self.recommendation_cache.get(group_id, top_n, strategy, preference_version, catalog_version, rules_version)
+        if cached is not None:
+            return cached
+
+        async def recommend() -> CategoryListResponse:
+            with PipelineTrace("recommend_categories") as trace:
+                response = await self._recommend_categories(trace, group_id, top_n, strategy)
+            version = preference_version
+            if not group_doc.get("play_preferences") or (strategy and strategy not in (group_doc.get("preference_vectors") or {})):
+                # 계산 중에 통합 선호도를 새로 저장해 버전이 올라갔으므로 저장된 버전에 결과를 묶습니다.
+                refreshed = await self._group_versions(group_id)
+                version = refreshed.get("preference_version", 0) if refreshed else version
+            await self.recommendation_cache.put(group_id, top_n, strategy, version, catalog_version, rules_version, response)
+            return response
+
+        return await self._single_flight(
+            _recommend_flights,
+            self.distributed_recommend_flights,
+            self._flight_key(group_id, group_doc, top_n, strategy),
+            recommend,
+            encode=lambda response: response.model_dump(mode="json"),
+            decode=lambda data: CategoryListResponse(**data),
+        )
+
+    async def _recommend_categories(self, trace: PipelineTrace, group_id: str, top_n: int, strategy: Optional[str] = None) -> CategoryListResponse:
+        with trace.stage("load_group"):
+            group_doc = await self.collection.find_one({"_id": ObjectId(group_id)})
         if not group_doc:
             return CategoryListResponse(categories=[])
         group = GroupModel(**group_doc)
 
-        time_based_recommendations = []
-        
-        # 시간 기반 카테고리 추천
-        if group.starttime:
-            # 점심 시간 (11:30 ~ 14:00)
-            lunch_start = group.starttime.replace(hour=11, minute=30, second=0, microsecond=0)
-            lunch_end = group.starttime.replace(hour=14, minute=0, second=0, microsecond=0)
-            
-            # 저녁 시간 (17:30 ~ 20:00)
-            dinner_start = group.starttime.replace(hour=17, minute=30, second=0, microsecond=0)
-            dinner_end = group.starttime.replace(hour=20, minute=0, second=0, microsecond=0)
-
-            group_start_time = group.starttime
-            group_end_time = group.endtime if group.endtime else group.starttime
-
-            # 식사시간 겹치는지 확인
-            is_lunch_time = max(group_start_time, lunch_start) < min(group_end_time, lunch_end)
-            is_dinner_time = max(group_start_time, dinner_start) < min(group_end_time, dinner_end)
-
-            if is_lunch_time or is_dinner_time:
-                restaurant_category = await self.categories_collection.find_one({"name": "식당"})
-                if restaurant_category:
-                    time_based_recommendations.append(CategoryModel(**restaurant_category))
-
-            # 음주시간 (20:00 이후)
-            if group_start_time >= dinner_end:
-                bar_category = await self.categories_collection.find_one({"name": "주점"})
-                if bar_category:
-                    time_based_recommendations.append(CategoryModel(**bar_category))
-        
-        group_prefs = group.play_preferences
-        if not group_prefs:
-            group_with_prefs = await self.calculate_and_update_group_preferences(group_id)
-            if not group_with_prefs:
-                return CategoryListResponse(categories=[str(c.name) for c in time_based_recommendations])
-            group_prefs = group_with_prefs.play_preferences
+        with trace.stage("load_categories"):
+            category_index = await category_index_cache.get(self.db)
 
-        group_vector = list(group_prefs.dict().values())
-        
-        preference_based_categories = []
-        # parent_category_id가 있는 카테고리만 추천 (하위 카테고리)
-        query = {
-            "type": ActivityType.ACTIVITY.value, 
-            "play_attributes": {"$ne": None},
-            "parent_category_id": {"$ne": None}
-        }
-        cursor = self.categories_collection.find(query)
-        async for category_doc in cursor:
-            category = CategoryModel(**category_doc)
-            if category.play_attributes:
-                category_vector = list(category.play_attributes.dict().values())
-                distance = self._euclidean_distance(group_vector, category_vector)
-                preference_based_categories.append((category, distance))
+        # 시간 기반 카테고리 추천 (CATEGORY_SLOT_RULES)
+        with trace.stage("time_slots"):
+            time_based_recommendations = []
+            if group.starttime:
+                time_based_recommendations = get_slot_rule_table(category_index).match(group.starttime, group.endtime)
         
-        preference_based_categories.sort(key=lambda x: x[1])
+        if strategy:
+            consensus_vector = await self._consensus_vector(trace, group_id, group, strategy)
+            if consensus_vector is None:
+                return CategoryListResponse(categories=[str(c.name) for c in time_based_recommendations])
+            group_vector = consensus_vector[FOOD_BIT_COUNT:].tolist()
+        else:
+            group_prefs = group.play_preferences
+            if not group_prefs:
+                with trace.stage("preference_refresh"):
+                    group_with_prefs = await self.calculate_and_update_group_preferences(group_id)
+                if not group_with_prefs:
+                    return CategoryListResponse(categories=[str(c.name) for c in time_based_recommendations])
+                group_prefs = group_with_prefs.play_preferences
+
+            group_vector = encode_play_vector(group_prefs.dict())
         
-        # top_n 만큼 선호도 기반 카테고리 선택
-        top_preference_categories = [cat for cat, dist in preference_based_categories[:top_n]]
+        # parent_category_id가 있는 놀거리 카테고리(하위 카테고리) 중 top_n 만큼 선호도 기반 카테고리 선택
+        with trace.stage("score_categories"):
+            top_preference_categories = category_index.nearest(group_vector, top_n)
+        trace.count("categories_scored", int(category_index.recommendable.sum()))
 
         # 중복 제거 및 최종 목록 생성
         existing_ids = {str(c.id) for c in time_based_recommendations}
@@ -352,238 +549,264 @@ class GroupService:
         for category in top_preference_categories:
             if str(category.id) not in existing_ids:
                 final_recommendations.append(str(category.name))
+        trace.count("categories_recommended", len(final_recommendations))
         
         return CategoryListResponse(categories=final_recommendations)
 
-    async def create_schedules(self, group_id: str, category_names: List[str], top_n: int = 4) -> Optional[ListScheduleResponse]:
-        # --- Parameters for recommendation diversity ---
-        POOL_SIZE = 10  # Number of activities to select for the final pool
-        CANDIDATE_POOL_SIZE = 30  # Number of candidates for sampling
-        DIVERSITY_WEIGHT = 0.5  # Weight for the diversity score
-        HARMONY_WEIGHT = 1.0  # Weight for the harmony score
-        NOVELTY_WEIGHT = 0.3 # Weight for novelty between schedules
-        # -----------------------------------------
+    async def create_schedules(self, group_id: str, category_names: List[str], top_n: int = 4, strategy: Optional[str] = None) -> Optional[ListScheduleResponse]:
+        group_doc = await self._group_versions(group_id)
+        if not group_doc:
+            return None
 
-        group_doc = await self.collection.find_one({"_id": ObjectId(group_id)})
+        async def create() -> Optional[ListScheduleResponse]:
+            with PipelineTrace("create_schedules") as trace:
+                return await self._create_schedules(trace, group_id, category_names, top_n, strategy)
+
+        return await self._single_flight(
+            _schedule_flights,
+            self.distributed_schedule_flights,
+            self._flight_key(group_id, group_doc, category_names, top_n, strategy),
+            create,
+            # 스케줄을 만들 수 없었던 결과(None)도 공유하도록 빈 dict로 저장합니다.
+            encode=lambda response: response.model_dump(mode="json") if response else {},
+            decode=lambda data: ListScheduleResponse(**data) if data else None,
+        )
+
+    async def _create_schedules(self, trace: PipelineTrace, group_id: str, category_names: List[str], top_n: int, strategy: Optional[str] = None) -> Optional[ListScheduleResponse]:
+        # 이 요청에서 Gemini 호출에 쓸 수 있는 시간. 넘으면 남은 스케줄은 로컬 타임라인을 사용합니다.
+        llm_deadline = time.monotonic() + settings.GEMINI_REQUEST_BUDGET_SECONDS
+        prepared = await self._schedule_candidates(trace, group_id, category_names, top_n, strategy)
+        if not prepared:
+            return None
+        group, candidate_activities, category_names_by_id = prepared
+
+        # Call Gemini API to get realistic schedules
+        gemini_schedules = [[] for _ in candidate_activities]
+        with trace.stage("llm_refinement"):
+            async for index, gemini_schedule in self._refine_schedules(trace, group, candidate_activities, llm_deadline):
+                gemini_schedules[index] = gemini_schedule
+
+        final_schedules = []
+        for activities, gemini_schedule in zip(candidate_activities, gemini_schedules):
+            if gemini_schedule:
+                # Use the schedule from Gemini
+                response_activities = self._gemini_timeline(activities, gemini_schedule, category_names_by_id)
+            else:
+                # Fallback to simple time division if Gemini fails
+                trace.count("llm_fallbacks")
+                response_activities = self._local_timeline(activities, group, category_names_by_id)
+
+            if response_activities:
+                schedule_suggestion = ScheduleSuggestion(
+                    group_id=group_id,
+                    scheduled_activities=response_activities
+                )
+                final_schedules.append(schedule_suggestion)
+
+        if not final_schedules:
+            return None
+            
+        return ListScheduleResponse(schedules=final_schedules)
+
+    async def stream_schedules(self, group_id: str, category_names: List[str], top_n: int = 4, strategy: Optional[str] = None) -> AsyncIterator[ScheduleStreamEvent]:
+        """
+        create_schedules의 스트리밍 버전. 조합 탐색이 끝나면 각 후보의 로컬 타임라인(source="local")을 바로 보내고,
+        Gemini 보정이 끝나는 대로 같은 index의 보정된 스케줄(source="llm")을 업데이트로 보냅니다.
+        보정에 실패한 스케줄은 로컬 타임라인이 최종 결과입니다.
+        """
+        with PipelineTrace("stream_schedules") as trace:
+            llm_deadline = time.monotonic() + settings.GEMINI_REQUEST_BUDGET_SECONDS
+            prepared = await self._schedule_candidates(trace, group_id, category_names, top_n, strategy)
+            if not prepared:
+                yield ScheduleStreamEvent(event="error", detail="Failed to create schedule. Check group times or selected categories.")
+                return
+            group, candidate_activities, category_names_by_id = prepared
+
+            for index, activities in enumerate(candidate_activities):
+                yield ScheduleStreamEvent(
+                    event="schedule",
+                    index=index,
+                    source="local",
+                    schedule=ScheduleSuggestion(
+                        group_id=group_id,
+                        scheduled_activities=self._local_timeline(activities, group, category_names_by_id),
+                    ),
+                )
+
+            with trace.stage("llm_refinement"):
+                async for index, gemini_schedule in self._refine_schedules(trace, group, candidate_activities, llm_deadline):
+                    if not gemini_schedule:
+                        trace.count("llm_fallbacks")
+                        continue
+                    response_activities = self._gemini_timeline(candidate_activities[index], gemini_schedule, category_names_by_id)
+                    if response_activities:
+                        yield ScheduleStreamEvent(
+                            event="schedule",
+                            index=index,
+                            source="llm",
+                            schedule=ScheduleSuggestion(group_id=group_id, scheduled_activities=response_activities),
+                        )
+            yield ScheduleStreamEvent(event="done")
+
+    async def _refine_schedules(self, trace: PipelineTrace, group: GroupModel, candidate_activities: List[List[ActivityModel]], deadline: float) -> AsyncIterator[tuple]:
+        """
+        후보 스케줄들을 Gemini로 보정하고 (index, 보정 결과)를 끝나는 순서대로 내보냅니다. 실패한 스케줄의 결과는 빈 리스트 또는 None입니다.
+        GEMINI_BATCH_REFINEMENT이면 한 번의 호출로, 아니면 스케줄마다 동시에 호출합니다.
+        """
+        if settings.GEMINI_BATCH_REFINEMENT and len(candidate_activities) > 1:
+            trace.count("llm_calls")
+            gemini_schedules = await self.gemini_service.generate_realistic_schedules(candidate_activities, group.starttime, group.endtime, deadline=deadline)
+            for index, gemini_schedule in enumerate(gemini_schedules):
+                yield index, gemini_schedule
+            return
+
+        async def refine(index: int, activities: List[ActivityModel]) -> tuple:
+            return index, await self.gemini_service.generate_realistic_schedule(activities, group.starttime, group.endtime, deadline=deadline)
+
+        tasks = [asyncio.ensure_future(refine(index, activities)) for index, activities in enumerate(candidate_activities)]
+        trace.count("llm_calls", len(tasks))
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 스트리밍 클라이언트가 연결을 끊으면 남은 호출을 취소합니다.
+            for task in tasks:
+                task.cancel()
+
+    async def _schedule_candidates(self, trace: PipelineTrace, group_id: str, category_names: List[str], top_n: int, strategy: Optional[str] = None) -> Optional[tuple]:
+        """
+        조합 탐색과 MMR로 후보 스케줄을 고릅니다.
+        (그룹, 후보별 ActivityModel 목록, 카테고리 ID -> 이름)을 반환하며, 만들 수 없으면 None입니다.
+        """
+        with trace.stage("load_group"):
+            group_doc = await self.collection.find_one({"_id": ObjectId(group_id)})
         if not group_doc:
             return None
         group = GroupModel(**group_doc)
         if not group.starttime or not group.endtime:
             return None
 
-        category_ids = []
-        for cat_name in category_names:
-            category = await self.categories_collection.find_one({"name": cat_name})
-            if category:
-                category_ids.append(str(category["_id"]))
-
-        group_play_prefs = group.play_preferences
-        group_food_prefs = group.food_preferences
-        if not group_play_prefs or not group_food_prefs:
-            group_with_prefs = await self.calculate_and_update_group_preferences(group_id)
-            if not group_with_prefs:
+        with trace.stage("fetch_categories"):
+            category_index = await category_index_cache.get(self.db)
+            categories = [category_index.get_by_name(name) for name in category_names]
+            categories = [category for category in categories if category]
+        trace.count("categories_requested", len(category_names))
+        category_names_by_id = {str(category.id): category.name for category in categories}
+
+        if strategy:
+            consensus_vector = await self._consensus_vector(trace, group_id, group, strategy)
+            if consensus_vector is None:
                 return None
-            group_play_prefs = group_with_prefs.play_preferences
-            group_food_prefs = group_with_prefs.food_preferences
-        
-        group_play_vector = list(group_play_prefs.dict().values())
+            group_play_vector = consensus_vector[FOOD_BIT_COUNT:].tolist()
+            group_food_vector = consensus_vector[:FOOD_BIT_COUNT]
+        else:
+            group_play_prefs = group.play_preferences
+            group_food_prefs = group.food_preferences
+            if not group_play_prefs or not group_food_prefs:
+                with trace.stage("preference_refresh"):
+                    group_with_prefs = await self.calculate_and_update_group_preferences(group_id)
+                if not group_with_prefs:
+                    return None
+                group_play_prefs = group_with_prefs.play_preferences
+                group_food_prefs = group_with_prefs.food_preferences
+
+            group_play_vector = encode_play_vector(group_play_prefs.dict())
+            group_food_vector = food_preference_vector(group_food_prefs)
+
+        with trace.stage("fetch_activities"):
+            features = await activity_feature_cache.get(self.db)
+
+        # 멤버 평점으로 학습한 요인이 있으면 속성 거리/유사도에 예측 평점을 섞습니다.
+        group_factors = None
+        factor_model = None
+        if settings.CF_BLEND_WEIGHT > 0:
+            with trace.stage("load_factors"):
+                factor_model = await factor_model_cache.get(self.db)
+                if not factor_model.is_empty:
+                    group_factors = await factor_model.group_factors(self.db, group.member_ids)
+            trace.count("cf_blended", int(group_factors is not None))
 
         activity_pools = []
-        for category_id in category_ids:
-            category = await self.categories_collection.find_one({"_id": ObjectId(category_id)})
-            if not category:
-                continue
-            
-            category_model = CategoryModel(**category)
-            activities = []
-            cursor = self.activities_collection.find({"category_id": category_id})
-            async for activity_doc in cursor:
-                activities.append(ActivityModel(**activity_doc))
+        for category_model in categories:
+            rows = features.rows_for_category(str(category_model.id))
+            trace.count("activities_fetched", len(rows))
 
-            if not activities:
+            if len(rows) == 0:
                 continue
 
+            # 큰 카테고리는 IVF 인덱스로 상위 CANDIDATE_POOL_SIZE개만 골라 아래에서 같은 방식으로 정렬합니다.
+            # (협업 필터링 점수는 이렇게 고른 후보 안에서만 순서를 바꿉니다.)
+            with trace.stage("ann_search"):
+                shortlist = None
+                if category_model.type == ActivityType.ACTIVITY:
+                    shortlist = top_play_rows(features, str(category_model.id), group_play_vector, self.CANDIDATE_POOL_SIZE)
+                elif category_model.type == ActivityType.FOOD:
+                    shortlist = top_food_rows(features, str(category_model.id), group_food_vector, self.CANDIDATE_POOL_SIZE)
+                if shortlist is not None:
+                    rows = shortlist
+
             # Sort activities based on similarity to group preferences
-            if category_model.type == ActivityType.ACTIVITY:
-                activities.sort(
-                    key=lambda act: self._euclidean_distance(group_play_vector, list(act.play_attributes.dict().values())) if act.play_attributes else float('inf')
-                )
-            elif category_model.type == ActivityType.FOOD:
-                activities.sort(
-                    key=lambda act: self._calculate_food_similarity_score(group_food_prefs, act.food_attributes) if act.food_attributes else 0,
-                    reverse=True
-                )
+            with trace.stage("rank_activities"):
+                scores = np.zeros(len(rows))
+                cf_scores = 0.0
+                if group_factors is not None and category_model.type in (ActivityType.ACTIVITY, ActivityType.FOOD):
+                    cf_scores = settings.CF_BLEND_WEIGHT * factor_model.centered_scores(features, rows, *group_factors)
+                if category_model.type == ActivityType.ACTIVITY:
+                    # 거리는 낮을수록 좋으므로 예측 평점이 높을수록 뺍니다.
+                    scores = features.play_distances(rows, group_play_vector) - cf_scores
+                    order = np.argsort(scores, kind="stable")
+                elif category_model.type == ActivityType.FOOD:
+                    scores = features.food_similarity(rows, group_food_vector) + cf_scores
+                    order = np.argsort(-scores, kind="stable")
+                else:
+                    order = np.arange(len(rows))
+                rows, scores = rows[order], scores[order]
             
             # --- 1. Weighted Random Sampling for Activity Pool ---
-            candidate_activities = activities[:CANDIDATE_POOL_SIZE]
-            if not candidate_activities:
-                continue
-
-            weights = []
-            if category_model.type == ActivityType.ACTIVITY:
-                # Lower distance is better, so we invert it for weights. Add 1 to avoid division by zero.
-                distances = [self._euclidean_distance(group_play_vector, list(act.play_attributes.dict().values())) if act.play_attributes else float('inf') for act in candidate_activities]
-                max_dist = max(d for d in distances if d != float('inf')) + 1
-                weights = [max_dist - d for d in distances]
-            elif category_model.type == ActivityType.FOOD:
-                weights = [self._calculate_food_similarity_score(group_food_prefs, act.food_attributes) if act.food_attributes else 0 for act in candidate_activities]
-
-            # Normalize weights to be probabilities
-            total_weight = sum(weights)
-            if total_weight > 0:
-                probabilities = [w / total_weight for w in weights]
-                # Use np.random.choice for sampling without replacement
-                sampled_indices = np.random.choice(len(candidate_activities), size=min(POOL_SIZE, len(candidate_activities)), p=probabilities, replace=False)
-                activity_pools.append([candidate_activities[i] for i in sampled_indices])
-            else:
-                # If all weights are zero, fall back to top N
-                activity_pools.append(candidate_activities[:POOL_SIZE])
+            candidate_rows = rows[:self.CANDIDATE_POOL_SIZE]
+
+            with trace.stage("sample_pools"):
+                candidate_scores = scores[:self.CANDIDATE_POOL_SIZE]
+                weights = np.zeros(len(candidate_rows))
+                if category_model.type == ActivityType.ACTIVITY:
+                    # Lower distance is better, so we invert it for weights. Add 1 to avoid division by zero.
+                    finite = candidate_scores[np.isfinite(candidate_scores)]
+                    if len(finite):
+                        weights = (finite.max() + 1) - candidate_scores
+                elif category_model.type == ActivityType.FOOD:
+                    weights = candidate_scores
+                activity_pools.append(self._sample_pool(candidate_rows, weights))
+            trace.count("pool_size", len(activity_pools[-1]))
             # ----------------------------------------------------
 
         if not activity_pools:
             return None
 
-        all_combinations = list(product(*activity_pools))
-
-        best_schedules = []
-        for combo in all_combinations:
-            min_final_score = float('inf')
-            best_permutation = None
-            
-            for p in permutations(combo):
-                harmony_score = 0
-                diversity_score = 0
-                
-                # --- 2. Calculate Harmony and Diversity Scores ---
-                for i in range(len(p) - 1):
-                    act1 = p[i]
-                    act2 = p[i+1]
-
-                    if act1.type == ActivityType.ACTIVITY and act2.type == ActivityType.ACTIVITY:
-                        dist = self._euclidean_distance(list(act1.play_attributes.dict().values()), list(act2.play_attributes.dict().values()))
-                    elif act1.type == ActivityType.FOOD and act2.type == ActivityType.FOOD:
-                        dist = self._calculate_food_attraction_score(act1.food_attributes, act2.food_attributes)
-                    else:
-                        dist = 2.0
-                    harmony_score += dist
-                
-                # Calculate diversity score for the permutation
-                if len(p) > 1:
-                    total_dist = 0
-                    pair_count = 0
-                    for i in range(len(p)):
-                        for j in range(i + 1, len(p)):
-                            act1 = p[i]
-                            act2 = p[j]
-                            if act1.type == ActivityType.ACTIVITY and act2.type == ActivityType.ACTIVITY:
-                                total_dist += self._euclidean_distance(list(act1.play_attributes.dict().values()), list(act2.play_attributes.dict().values()))
-                            elif act1.type == ActivityType.FOOD and act2.type == ActivityType.FOOD:
-                                total_dist += self._calculate_food_attraction_score(act1.food_attributes, act2.food_attributes)
-                            else:
-                                total_dist += 2.0
-                            pair_count += 1
-                    diversity_score = total_dist / pair_count if pair_count > 0 else 0
-
-                final_score = (HARMONY_WEIGHT * harmony_score) - (DIVERSITY_WEIGHT * diversity_score)
-                # -------------------------------------------------
-
-                if final_score < min_final_score:
-                    min_final_score = final_score
-                    best_permutation = p
-            
-            if best_permutation:
-                best_schedules.append((best_permutation, min_final_score))
-
-        best_schedules.sort(key=lambda x: x[1])
+        with trace.stage("combinatorial_search"):
+            best_schedules = self._search_best_schedules(features, activity_pools, self.MMR_CANDIDATE_LIMIT, trace)
 
         # --- 3. Maximal Marginal Relevance (MMR) for Final Selection ---
         if not best_schedules:
             return None
 
-        selected_schedules = []
-        candidate_schedules = best_schedules.copy()
-
-        # Select the first schedule (the best one)
-        selected_schedules.append(candidate_schedules.pop(0))
-
-        while len(selected_schedules) < top_n and candidate_schedules:
-            next_schedule_idx = -1
-            max_mmr_score = -float('inf')
-
-            for i, candidate in enumerate(candidate_schedules):
-                original_score = candidate[1]
-                
-                # Calculate novelty against already selected schedules
-                novelty_score = sum(self._jaccard_dissimilarity(candidate, selected) for selected in selected_schedules) / len(selected_schedules)
-                
-                # MMR score: lower original score is better, so we use -original_score
-                mmr_score = -original_score + NOVELTY_WEIGHT * novelty_score
-                
-                if mmr_score > max_mmr_score:
-                    max_mmr_score = mmr_score
-                    next_schedule_idx = i
-            
-            if next_schedule_idx != -1:
-                selected_schedules.append(candidate_schedules.pop(next_schedule_idx))
+        with trace.stage("mmr_selection"):
+            selected_schedules = self._select_diverse_schedules(best_schedules, top_n)
+        trace.count("schedules_selected", len(selected_schedules))
         # ----------------------------------------------------------------
 
-        final_schedules = []
-        
-        for activities, score in selected_schedules:
-            if not activities:
-                continue
-
-            # Call Gemini API to get a realistic schedule
-            gemini_schedule = await self.gemini_service.generate_realistic_schedule(list(activities), group.starttime, group.endtime)
-            
-            response_activities = []
-            
-            if gemini_schedule:
-                # Use the schedule from Gemini
-                activity_map = {str(act.id): act for act in activities}
-                for item in gemini_schedule:
-                    activity_obj = activity_map.get(item['activity_id'])
-                    if activity_obj:
-                        _cat = await self.categories_collection.find_one({"_id": ObjectId(activity_obj.category_id)})
-                        from app.schemas.schedule import ScheduledActivity as ResponseScheduledActivity
-                        response_activities.append(ResponseScheduledActivity(
-                            name=activity_obj.name,
-                            category=_cat["name"],
-                            start_time=item['start_time'],
-                            end_time=item['end_time'],
-                            location=activity_obj.location
-                        ))
-            else:
-                # Fallback to simple time division if Gemini fails
-                total_duration = (group.endtime - group.starttime).total_seconds()
-                num_activities = len(activities)
-                if num_activities == 0: continue
-                duration_per_activity = total_duration / num_activities
-                
-                current_time = group.starttime
-                for activity_obj in activities:
-                    end_time = current_time + datetime.timedelta(seconds=duration_per_activity)
-                    _cat = await self.categories_collection.find_one({"_id": ObjectId(activity_obj.category_id)})
-                    from app.schemas.schedule import ScheduledActivity as ResponseScheduledActivity
-                    response_activities.append(ResponseScheduledActivity(
-                        name=activity_obj.name,
-                        category=_cat["name"],
-                        start_time=current_time,
-                        end_time=end_time,
-                        location=activity_obj.location
-                    ))
-                    current_time = end_time
-
-            if response_activities:
-                schedule_suggestion = ScheduleSuggestion(
-                    group_id=group_id,
-                    scheduled_activities=response_activities
-                )
-                final_schedules.append(schedule_suggestion)
-
-        if not final_schedules:
+        # 최종 응답에 필요한 활동만 ActivityModel로 다시 만듭니다.
+        with trace.stage("load_selected"):
+            selected_ids = [features.ids[row] for rows, _ in selected_schedules for row in rows]
+            activity_models = await load_activities(self.db, selected_ids)
+
+        candidate_activities = []
+        for rows, score in selected_schedules:
+            activities = [activity_models[features.ids[row]] for row in rows if features.ids[row] in activity_models]
+            if activities:
+                candidate_activities.append(activities)
+        if not candidate_activities:
             return None
-            
-        return ListScheduleResponse(schedules=final_schedules)
+
+        return group, candidate_activities, category_names_by_id
 
 group_service: "GroupService"
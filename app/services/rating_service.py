@@ -0,0 +1,269 @@
+import asyncio
+import datetime
+from collections import Counter as Tally
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from prometheus_client import Counter
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, OperationFailure
+
+from app.core.config import settings
+from app.models.activity_log import ActivityLogModel
+
+RATINGS_WRITTEN = Counter(
+    "playfriends_ratings_total",
+    "Activity ratings by outcome (written, retried, dead_lettered, dropped)",
+    ["outcome"],
+)
+
+ACTIVITY_LOGS = "activity_logs"
+# 집계에 반영한 평점 ID. 시계열 컬렉션인 activity_logs는 _id가 유일하지 않으므로 여기서 중복 반영을 막습니다.
+RATING_RECEIPTS = "activity_rating_receipts"
+# RATING_BUFFER_MAX_ATTEMPTS번 쓰지 못한 평점을 보관합니다.
+DEAD_LETTER = "activity_logs_dead_letter"
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _failed_indexes(error: BulkWriteError) -> Dict[int, int]:
+    """순서 없는 bulk 쓰기에서 실패한 문서 번호 -> 오류 코드."""
+    return {item["index"]: item.get("code") for item in error.details.get("writeErrors", [])}
+
+
+class RatingService:
+    """
+    그룹 모임에서 함께한 활동에 대한 사용자 평점을 activity_logs 컬렉션에 기록합니다.
+    기록된 평점은 scripts/train_factors.py가 협업 필터링 모델을 학습하는 데 사용합니다.
+
+    activity_logs는 timestamp 기준 시계열 컬렉션이고, 활동별 평점 수/합/분포는 activity_ratings에 $inc로 누적합니다.
+    평점 ID(_id)는 서버가 미리 만들고, 집계에 더하기 전에 activity_rating_receipts에 ID를 넣어 다시 시도한 평점이
+    두 번 더해지지 않게 합니다. 다시 시도로 activity_logs에 같은 평점이 두 번 쓰일 수는 있지만, 학습은 사용자/활동별
+    마지막 평점만 사용하므로 결과가 같습니다.
+    buffer가 있으면 평점을 메모리에 모았다가 RatingWriteBuffer가 묶어서 씁니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient, buffer: Optional["RatingWriteBuffer"] = None):
+        self.db = db_client[settings.MONGO_DATABASE]
+        self.collection = self.db[ACTIVITY_LOGS]
+        self.aggregates_collection = self.db.activity_ratings
+        self.receipts_collection = self.db[RATING_RECEIPTS]
+        self.dead_letter_collection = self.db[DEAD_LETTER]
+        self.activities_collection = self.db.activities
+        self.buffer = buffer
+
+    async def ensure_collections(self):
+        """
+        activity_logs를 시계열 컬렉션으로 만듭니다. 이미 있으면(일반 컬렉션으로 만들어졌어도) 그대로 둡니다.
+        평점 ID 기록은 다시 시도할 수 있는 기간보다 충분히 길게 보관한 뒤 MongoDB가 지웁니다.
+        """
+        await self.receipts_collection.create_index(
+            [("created_at", ASCENDING)],
+            expireAfterSeconds=settings.RATING_RECEIPT_RETENTION_SECONDS,
+            name="created_at_ttl",
+        )
+        if await self.db.list_collection_names(filter={"name": ACTIVITY_LOGS}):
+            return
+        try:
+            # 같은 모임의 평점은 비슷한 시각에 들어오므로 group_id로 버킷을 나눕니다.
+            await self.db.create_collection(
+                ACTIVITY_LOGS,
+                timeseries={"timeField": "timestamp", "metaField": "group_id", "granularity": "minutes"},
+            )
+        except CollectionInvalid:
+            # 다른 인스턴스가 먼저 만들었습니다.
+            pass
+        except OperationFailure as e:
+            print(f"Failed to create time-series collection {ACTIVITY_LOGS}, using a regular collection: {e}")
+
+    async def record_rating(self, user_id: str, group_id: str, activity_id: str, rating: int) -> Optional[ActivityLogModel]:
+        """평점을 기록합니다. 활동이 없으면 None을 반환합니다."""
+        if not ObjectId.is_valid(activity_id):
+            return None
+        if not await self.activities_collection.find_one({"_id": ObjectId(activity_id)}, {"_id": 1}):
+            return None
+
+        log = ActivityLogModel(user_id=user_id, group_id=group_id, activity_id=activity_id, rating=rating)
+        log_dict = log.model_dump(by_alias=True, exclude={"id"})
+        # 버퍼에 넣은 평점도 응답에 ID를 돌려줄 수 있도록 ID를 미리 만듭니다.
+        log_dict["_id"] = ObjectId()
+        if self.buffer is None or not self.buffer.add(log_dict):
+            failed = await self.write_ratings([log_dict])
+            if failed:
+                raise RuntimeError("Failed to write rating")
+        return ActivityLogModel(**log_dict)
+
+    async def write_ratings(self, logs: List[dict]) -> List[dict]:
+        """
+        평점들을 순서 없는 insert_many로 쓰고, 쓰인 평점 중 처음 반영하는 평점만 활동별 집계에 더합니다.
+        다시 시도해야 하는 평점 목록을 반환합니다. 같은 평점을 다시 넘겨도 집계에는 한 번만 더해집니다.
+        """
+        if not logs:
+            return []
+        failed: Dict[int, int] = {}
+        try:
+            await self.collection.insert_many(logs, ordered=False)
+        except BulkWriteError as e:
+            failed = _failed_indexes(e)
+
+        # activity_logs가 일반 컬렉션이면 _id 충돌은 이미 쓰인 평점입니다.
+        written = [log for index, log in enumerate(logs) if failed.get(index, DUPLICATE_KEY_ERROR) == DUPLICATE_KEY_ERROR]
+        retry = [logs[index] for index, code in sorted(failed.items()) if code != DUPLICATE_KEY_ERROR]
+
+        receipts = [{"_id": log["_id"], "activity_id": log["activity_id"], "created_at": datetime.datetime.now(datetime.timezone.utc)} for log in written]
+        receipt_failed: Dict[int, int] = {}
+        if receipts:
+            try:
+                await self.receipts_collection.insert_many(receipts, ordered=False)
+            except BulkWriteError as e:
+                receipt_failed = _failed_indexes(e)
+        # 기록이 이미 있는 평점은 앞선 시도에서 집계에 더했습니다. 기록하지 못한 평점은 다시 시도합니다.
+        counted = [log for index, log in enumerate(written) if index not in receipt_failed]
+        retry += [written[index] for index, code in sorted(receipt_failed.items()) if code != DUPLICATE_KEY_ERROR]
+
+        RATINGS_WRITTEN.labels("written").inc(len(written) - len(receipt_failed))
+        if counted:
+            await self._update_aggregates(counted)
+        return retry
+
+    async def dead_letter(self, logs: List[dict], attempts: int):
+        """다시 시도해도 쓰지 못한 평점을 activity_logs_dead_letter에 보관합니다. 보관하지 못하면 버립니다."""
+        if not logs:
+            return
+        failed_at = datetime.datetime.now(datetime.timezone.utc)
+        documents = [{**log, "attempts": attempts, "failed_at": failed_at} for log in logs]
+        try:
+            await self.dead_letter_collection.insert_many(documents, ordered=False)
+            RATINGS_WRITTEN.labels("dead_lettered").inc(len(logs))
+        except Exception as e:
+            RATINGS_WRITTEN.labels("dropped").inc(len(logs))
+            print(f"Dropped {len(logs)} ratings after {attempts} attempts: {e}")
+
+    async def _update_aggregates(self, logs: List[dict]):
+        """활동별 평점 수, 합, 점수별 개수를 활동마다 한 번의 $inc로 누적합니다."""
+        by_activity: Dict[str, Tally] = {}
+        last_rated = {}
+        for log in logs:
+            tally = by_activity.setdefault(log["activity_id"], Tally())
+            tally["count"] += 1
+            tally["sum"] += log["rating"]
+            tally[f"histogram.{log['rating']}"] += 1
+            last_rated[log["activity_id"]] = max(log["timestamp"], last_rated.get(log["activity_id"], log["timestamp"]))
+
+        operations = [
+            UpdateOne(
+                {"_id": activity_id},
+                {"$inc": dict(tally), "$max": {"last_rated_at": last_rated[activity_id]}},
+                upsert=True,
+            )
+            for activity_id, tally in by_activity.items()
+        ]
+        try:
+            await self.aggregates_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # 평점 ID를 이미 기록했으므로 다시 시도하지 않습니다 (일부가 반영되었을 수 있음). 집계는 activity_logs에서 다시 만들 수 있습니다.
+            print(f"Failed to update rating aggregates for {len(operations)} activities: {e}")
+
+
+class RatingWriteBuffer:
+    """
+    평점을 메모리에 모았다가 RATING_BUFFER_BATCH_SIZE개가 차거나 RATING_BUFFER_FLUSH_SECONDS가 지나면
+    insert_many 한 번으로 씁니다. 쓰지 못한 평점은 버퍼 앞쪽에 다시 넣어 다음 플러시에서 다시 시도하고,
+    RATING_BUFFER_MAX_ATTEMPTS번 실패한 평점은 activity_logs_dead_letter로 옮겨 뒤의 평점을 막지 않게 합니다.
+
+    버퍼에만 있는 평점은 프로세스가 죽으면 잃어버리므로, 잃을 수 있는 양은 플러시 간격 동안의 평점으로 제한되고
+    정상 종료(lifespan shutdown) 시에는 남은 평점을 모두 씁니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient, batch_size: Optional[int] = None):
+        self.rating_service = RatingService(db_client)
+        self.batch_size = settings.RATING_BUFFER_BATCH_SIZE if batch_size is None else batch_size
+        self._pending: List[dict] = []
+        # 한 번 이상 실패한 평점 ID -> 시도 횟수
+        self._attempts: Dict[ObjectId, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        await self.rating_service.ensure_collections()
+        if self.batch_size <= 0:
+            print("Rating write buffer is disabled (RATING_BUFFER_BATCH_SIZE=0).")
+            return
+        # 이벤트 루프 안에서 만들어야 하므로 생성자가 아닌 여기서 만듭니다.
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        """주기적인 플러시를 멈추고 남은 평점을 모두 씁니다."""
+        if not self._task:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await self.flush()
+        if self._pending:
+            RATINGS_WRITTEN.labels("dropped").inc(len(self._pending))
+            print(f"Dropped {len(self._pending)} buffered ratings on shutdown.")
+            self._pending = []
+            self._attempts.clear()
+
+    def add(self, log: dict) -> bool:
+        """평점을 버퍼에 넣습니다. 버퍼가 실행 중이 아니거나 가득 차 있으면 False를 반환하며, 호출한 쪽이 직접 씁니다."""
+        if not self._task or self._stopping or len(self._pending) >= settings.RATING_BUFFER_MAX_PENDING:
+            return False
+        self._pending.append(log)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.RATING_BUFFER_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """버퍼의 평점을 배치 단위로 씁니다. 실패하면 남은 평점을 버퍼에 둔 채 멈춥니다."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:len(batch)]
+                try:
+                    retry = await self.rating_service.write_ratings(batch)
+                except Exception as e:
+                    print(f"Failed to flush {len(batch)} ratings: {e}")
+                    retry = batch
+
+                retry_ids = {log["_id"] for log in retry}
+                for log in batch:
+                    if log["_id"] not in retry_ids:
+                        self._attempts.pop(log["_id"], None)
+                if not retry:
+                    continue
+
+                requeue, exhausted = [], []
+                for log in retry:
+                    attempts = self._attempts.get(log["_id"], 0) + 1
+                    if attempts >= settings.RATING_BUFFER_MAX_ATTEMPTS:
+                        self._attempts.pop(log["_id"], None)
+                        exhausted.append(log)
+                    else:
+                        self._attempts[log["_id"]] = attempts
+                        requeue.append(log)
+                if exhausted:
+                    await self.rating_service.dead_letter(exhausted, settings.RATING_BUFFER_MAX_ATTEMPTS)
+                if requeue:
+                    RATINGS_WRITTEN.labels("retried").inc(len(requeue))
+                    self._pending[:0] = requeue
+                    return
@@ -0,0 +1,102 @@
+import datetime
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.schemas.category import CategoryListResponse
+
+RECOMMENDATION_CACHE_LOOKUPS = Counter(
+    "playfriends_recommendation_cache_lookups_total",
+    "Category recommendation cache lookups by tier (memory, mongo) and outcome (hit, miss, stale)",
+    ["tier", "outcome"],
+)
+
+# (DB 이름, 그룹 ID, top_n, 합의 전략) -> (preference_version, 카테고리 catalog 버전, 시간대 규칙 해시, 추천 카테고리 이름 목록)
+# GroupService는 요청마다 만들어지므로 프로세스 단위로 공유합니다.
+_memory_tier: "OrderedDict[Tuple[str, str, int, str], Tuple[int, int, str, list]]" = OrderedDict()
+
+
+class RecommendationCache:
+    """
+    그룹별 카테고리 추천 결과 캐시.
+
+    결과는 그룹의 preference_version, 카테고리 catalog 버전과 시간대 규칙 해시에 묶여 저장되고, 조회 시 셋이 모두
+    같을 때만 사용합니다. 멤버나 선호도, 시간 범위가 바뀌면 preference_version이 올라가므로 따로 무효화할 필요가 없습니다.
+    메모리(프로세스 단위 LRU)를 먼저 보고, RECOMMENDATION_CACHE_MONGO이면 group_recommendations 컬렉션을
+    두 번째 계층으로 사용해 다른 인스턴스가 계산한 결과도 재사용합니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient):
+        self.db = db_client[settings.MONGO_DATABASE]
+        self.collection = self.db.group_recommendations
+
+    @staticmethod
+    def _scope(top_n: int, strategy: Optional[str]) -> str:
+        # strategy가 없으면 그룹의 기본 통합 선호도로 계산한 결과입니다.
+        return f"{top_n}:{strategy or 'default'}"
+
+    def _memory_key(self, group_id: str, top_n: int, strategy: Optional[str]) -> Tuple[str, str, int, str]:
+        return (self.db.name, group_id, top_n, strategy or "")
+
+    def _remember(self, group_id: str, top_n: int, strategy: Optional[str], preference_version: int, catalog_version: int, rules_version: str, categories: list):
+        key = self._memory_key(group_id, top_n, strategy)
+        _memory_tier[key] = (preference_version, catalog_version, rules_version, categories)
+        _memory_tier.move_to_end(key)
+        while len(_memory_tier) > settings.RECOMMENDATION_CACHE_MAX_ENTRIES:
+            _memory_tier.popitem(last=False)
+
+    async def get(self, group_id: str, top_n: int, strategy: Optional[str], preference_version: int, catalog_version: int, rules_version: str) -> Optional[CategoryListResponse]:
+        key = self._memory_key(group_id, top_n, strategy)
+        entry = _memory_tier.get(key)
+        if entry is not None:
+            if entry[:3] == (preference_version, catalog_version, rules_version):
+                _memory_tier.move_to_end(key)
+                RECOMMENDATION_CACHE_LOOKUPS.labels("memory", "hit").inc()
+                return CategoryListResponse(categories=list(entry[3]))
+            RECOMMENDATION_CACHE_LOOKUPS.labels("memory", "stale").inc()
+        else:
+            RECOMMENDATION_CACHE_LOOKUPS.labels("memory", "miss").inc()
+
+        if not settings.RECOMMENDATION_CACHE_MONGO:
+            return None
+        doc = await self.collection.find_one({
+            "_id": f"{group_id}:{self._scope(top_n, strategy)}",
+            "preference_version": preference_version,
+            "catalog_version": catalog_version,
+            "rules_version": rules_version,
+        })
+        if not doc:
+            RECOMMENDATION_CACHE_LOOKUPS.labels("mongo", "miss").inc()
+            return None
+        RECOMMENDATION_CACHE_LOOKUPS.labels("mongo", "hit").inc()
+        self._remember(group_id, top_n, strategy, preference_version, catalog_version, rules_version, doc["categories"])
+        return CategoryListResponse(categories=doc["categories"])
+
+    async def put(self, group_id: str, top_n: int, strategy: Optional[str], preference_version: int, catalog_version: int, rules_version: str, response: CategoryListResponse):
+        categories = list(response.categories)
+        self._remember(group_id, top_n, strategy, preference_version, catalog_version, rules_version, categories)
+        if settings.RECOMMENDATION_CACHE_MONGO:
+            await self.collection.update_one(
+                {"_id": f"{group_id}:{self._scope(top_n, strategy)}"},
+                {"$set": {
+                    "group_id": group_id,
+                    "top_n": top_n,
+                    "strategy": strategy,
+                    "preference_version": preference_version,
+                    "catalog_version": catalog_version,
+                    "rules_version": rules_version,
+                    "categories": categories,
+                    "updated_at": datetime.datetime.now(datetime.timezone.utc),
+                }},
+                upsert=True,
+            )
+
+    async def invalidate(self, group_id: str):
+        """삭제된 그룹의 캐시를 지웁니다. (버전이 바뀌는 변경은 무효화할 필요가 없습니다.)"""
+        for key in [key for key in _memory_tier if key[:2] == (self.db.name, group_id)]:
+            del _memory_tier[key]
+        if settings.RECOMMENDATION_CACHE_MONGO:
+            await self.collection.delete_many({"group_id": group_id})
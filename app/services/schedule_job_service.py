@@ -0,0 +1,267 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import socket
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.models.schedule_job import ScheduleJobModel, ScheduleJobStatus
+from app.services.group_service import GroupService
+
+DEDUPE_INDEX = "dedupe_key_active_unique"
+SCHEDULE_FAILED_MESSAGE = "Failed to create schedule. Check group times or selected categories."
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def schedule_job_dedupe_key(group_id: str, category_names: List[str], strategy: Optional[str] = None, preference_version: int = 0) -> str:
+    """
+    같은 그룹에 같은 카테고리(순서 포함)와 같은 합의 전략으로 들어온 요청은 같은 키를 갖습니다.
+    멤버 참여나 선호도 변경 뒤의 요청이 이전 선호도로 계산 중인 작업에 합쳐지지 않도록 그룹의 preference_version도 포함합니다.
+    """
+    key = [group_id, preference_version, category_names, strategy]
+    payload = json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ScheduleJobService:
+    """
+    스케줄 생성 작업(schedule_jobs 컬렉션)의 상태를 관리합니다.
+
+    작업은 pending -> running -> succeeded/failed 순서로 진행됩니다. 대기/실행 중인 작업에만 dedupe_key가 있고
+    이 필드에 부분 유니크 인덱스가 걸려 있어, 같은 그룹의 같은 요청은 인스턴스가 달라도 하나의 작업을 공유합니다.
+    워커는 find_one_and_update로 작업을 하나씩 가져가므로 두 워커가 같은 작업을 실행하지 않습니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient):
+        self.db = db_client[settings.MONGO_DATABASE]
+        self.collection = self.db.schedule_jobs
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("dedupe_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"dedupe_key": {"$exists": True}},
+            name=DEDUPE_INDEX,
+        )
+        await self.collection.create_index([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at")
+        # 끝난 작업은 보관 기간이 지나면 MongoDB가 지웁니다.
+        await self.collection.create_index(
+            [("finished_at", ASCENDING)],
+            expireAfterSeconds=settings.SCHEDULE_JOB_RETENTION_SECONDS,
+            name="finished_at_ttl",
+        )
+
+    async def submit(
+        self,
+        group_id: str,
+        category_names: List[str],
+        requested_by: str,
+        strategy: Optional[str] = None,
+        preference_version: int = 0,
+    ) -> Tuple[ScheduleJobModel, bool]:
+        """
+        작업을 등록합니다. 같은 preference_version의 같은 요청이 이미 대기/실행 중이면 그 작업을 반환합니다.
+        (작업, 새로 만들었는지 여부)를 반환합니다.
+        """
+        dedupe_key = schedule_job_dedupe_key(group_id, category_names, strategy, preference_version)
+        while True:
+            job_doc = {
+                "group_id": group_id,
+                "categories": category_names,
+                "strategy": strategy,
+                "preference_version": preference_version,
+                "requested_by": requested_by,
+                "status": ScheduleJobStatus.PENDING,
+                "dedupe_key": dedupe_key,
+                "attempts": 0,
+                "created_at": _utcnow(),
+            }
+            try:
+                result = await self.collection.insert_one(job_doc)
+                job_doc["_id"] = result.inserted_id
+                return ScheduleJobModel(**job_doc), True
+            except DuplicateKeyError:
+                existing = await self.collection.find_one({"dedupe_key": dedupe_key})
+                if existing:
+                    return ScheduleJobModel(**existing), False
+                # 기존 작업이 방금 끝나 키가 사라졌으면 새 작업으로 다시 시도합니다.
+
+    async def get_job(self, job_id: str) -> Optional[ScheduleJobModel]:
+        try:
+            object_id = ObjectId(job_id)
+        except InvalidId:
+            return None
+        job_doc = await self.collection.find_one({"_id": object_id})
+        if job_doc:
+            return ScheduleJobModel(**job_doc)
+        return None
+
+    async def claim_next(self, worker_id: str) -> Optional[ScheduleJobModel]:
+        """가장 오래 기다린 대기 작업을 실행 중으로 바꾸고 반환합니다. 없으면 None입니다."""
+        now = _utcnow()
+        job_doc = await self.collection.find_one_and_update(
+            {"status": ScheduleJobStatus.PENDING},
+            {
+                "$set": {
+                    "status": ScheduleJobStatus.RUNNING,
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_expires_at": now + datetime.timedelta(seconds=settings.SCHEDULE_JOB_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job_doc:
+            return ScheduleJobModel(**job_doc)
+        return None
+
+    async def renew_lease(self, job_id: str, worker_id: str) -> bool:
+        result = await self.collection.update_one(
+            {"_id": ObjectId(job_id), "status": ScheduleJobStatus.RUNNING, "worker_id": worker_id},
+            {"$set": {"lease_expires_at": _utcnow() + datetime.timedelta(seconds=settings.SCHEDULE_JOB_LEASE_SECONDS)}},
+        )
+        return result.matched_count > 0
+
+    async def _finish(self, job_id: str, worker_id: str, fields: Dict[str, object]) -> bool:
+        # 리스가 만료되어 다른 워커가 가져간 작업이면 결과를 쓰지 않습니다.
+        result = await self.collection.update_one(
+            {"_id": ObjectId(job_id), "status": ScheduleJobStatus.RUNNING, "worker_id": worker_id},
+            {
+                "$set": {**fields, "finished_at": _utcnow()},
+                "$unset": {"dedupe_key": "", "lease_expires_at": ""},
+            },
+        )
+        return result.matched_count > 0
+
+    async def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        return await self._finish(job_id, worker_id, {"status": ScheduleJobStatus.SUCCEEDED, "result": result})
+
+    async def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return await self._finish(job_id, worker_id, {"status": ScheduleJobStatus.FAILED, "error": error})
+
+    async def release(self, job_id: str, worker_id: str) -> bool:
+        """종료 중인 워커가 실행하던 작업을 다시 대기열에 넣습니다."""
+        result = await self.collection.update_one(
+            {"_id": ObjectId(job_id), "status": ScheduleJobStatus.RUNNING, "worker_id": worker_id},
+            {"$set": {"status": ScheduleJobStatus.PENDING}, "$unset": {"worker_id": "", "lease_expires_at": ""}},
+        )
+        return result.matched_count > 0
+
+    async def requeue_stale_jobs(self) -> Dict[str, int]:
+        """
+        리스가 만료된(워커 인스턴스가 죽은) 실행 중 작업을 다시 대기열에 넣습니다.
+        SCHEDULE_JOB_MAX_ATTEMPTS번 실행해도 끝나지 않은 작업은 실패로 처리합니다.
+        """
+        now = _utcnow()
+        stale = {"status": ScheduleJobStatus.RUNNING, "lease_expires_at": {"$lt": now}}
+        failed = await self.collection.update_many(
+            {**stale, "attempts": {"$gte": settings.SCHEDULE_JOB_MAX_ATTEMPTS}},
+            {
+                "$set": {"status": ScheduleJobStatus.FAILED, "error": "Job did not finish before its lease expired.", "finished_at": now},
+                "$unset": {"dedupe_key": "", "lease_expires_at": "", "worker_id": ""},
+            },
+        )
+        requeued = await self.collection.update_many(
+            stale,
+            {"$set": {"status": ScheduleJobStatus.PENDING}, "$unset": {"lease_expires_at": "", "worker_id": ""}},
+        )
+        if failed.modified_count or requeued.modified_count:
+            print(f"Requeued {requeued.modified_count} stale schedule jobs, failed {failed.modified_count}.")
+        return {"requeued": requeued.modified_count, "failed": failed.modified_count}
+
+
+class ScheduleJobWorkerPool:
+    """
+    이 인스턴스에서 스케줄 생성 작업을 실행하는 워커 풀.
+
+    각 워커는 schedule_jobs에서 작업을 하나씩 가져와 GroupService.create_schedules를 실행하고 결과를 저장합니다.
+    실행 중에는 리스를 주기적으로 갱신하며, 인스턴스가 죽어 갱신이 멈춘 작업은 requeue_stale_jobs가 다시 대기열에 넣습니다.
+    같은 인스턴스에서 등록된 작업은 notify()로 바로 깨우고, 다른 인스턴스의 작업은 폴링으로 가져갑니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient, concurrency: Optional[int] = None):
+        self.job_service = ScheduleJobService(db_client)
+        self.group_service = GroupService(db_client)
+        self.concurrency = settings.SCHEDULE_JOB_WORKERS if concurrency is None else concurrency
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        if self.concurrency <= 0:
+            print("Schedule job workers are disabled (SCHEDULE_JOB_WORKERS=0).")
+            return
+        await self.job_service.ensure_indexes()
+        # 이벤트 루프 안에서 만들어야 하므로 생성자가 아닌 여기서 만듭니다.
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work(f"{self.instance_id}/{index}"))
+            for index in range(self.concurrency)
+        ]
+
+    async def shutdown(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self):
+        """새 작업이 등록되었음을 알려 쉬고 있는 워커를 깨웁니다."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _wait_for_work(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), settings.SCHEDULE_JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _work(self, worker_id: str):
+        while True:
+            try:
+                job = await self.job_service.claim_next(worker_id)
+            except Exception as e:
+                print(f"Schedule job worker {worker_id} failed to claim a job: {e}")
+                job = None
+            if job is None:
+                await self._wait_for_work()
+                continue
+            await self._run(job, worker_id)
+
+    async def _keep_lease(self, job_id: str, worker_id: str):
+        while True:
+            await asyncio.sleep(settings.SCHEDULE_JOB_LEASE_SECONDS / 3)
+            if not await self.job_service.renew_lease(job_id, worker_id):
+                return
+
+    async def _run(self, job: ScheduleJobModel, worker_id: str):
+        keep_lease = asyncio.create_task(self._keep_lease(job.id, worker_id))
+        try:
+            schedules = await self.group_service.create_schedules(job.group_id, job.categories, strategy=job.strategy)
+            if schedules:
+                await self.job_service.complete(job.id, worker_id, schedules.model_dump(mode="json"))
+            else:
+                await self.job_service.fail(job.id, worker_id, SCHEDULE_FAILED_MESSAGE)
+        except asyncio.CancelledError:
+            await asyncio.shield(self.job_service.release(job.id, worker_id))
+            raise
+        except Exception as e:
+            print(f"Schedule job {job.id} failed: {e}")
+            await self.job_service.fail(job.id, worker_id, str(e))
+        finally:
+            keep_lease.cancel()
@@ -0,0 +1,163 @@
+import datetime
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+
+SCHEDULER_MODE_LEADER = "leader"
+SCHEDULER_MODE_LOCAL = "local"
+SCHEDULER_MODE_OFF = "off"
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class MongoLease:
+    """
+    MongoDB 문서 하나를 만료 시간이 있는 잠금(lease)으로 사용합니다.
+    리스가 만료되거나 현재 소유자일 때만 획득/갱신에 성공합니다.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, name: str, holder_id: str, ttl_seconds: int):
+        self.collection = collection
+        self.name = name
+        self.holder_id = holder_id
+        self.ttl_seconds = ttl_seconds
+
+    async def acquire(self) -> bool:
+        """리스를 획득하거나 갱신합니다. 다른 인스턴스가 유효한 리스를 갖고 있으면 False를 반환합니다."""
+        now = _utcnow()
+        try:
+            lease = await self.collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [
+                        {"holder": self.holder_id},
+                        {"expires_at": {"$lt": now}},
+                    ],
+                },
+                {"$set": {
+                    "holder": self.holder_id,
+                    "renewed_at": now,
+                    "expires_at": now + datetime.timedelta(seconds=self.ttl_seconds),
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # 유효한 리스가 이미 있어 필터가 매칭되지 않았고, upsert가 같은 _id로 충돌한 경우
+            return False
+        return lease is not None and lease.get("holder") == self.holder_id
+
+    async def release(self) -> None:
+        """자신이 소유한 리스를 즉시 반납하여 다른 인스턴스가 바로 인계받을 수 있게 합니다."""
+        await self.collection.delete_one({"_id": self.name, "holder": self.holder_id})
+
+
+class LeaderElectedScheduler:
+    """
+    주기 작업을 실행하는 스케줄러.
+
+    - leader: MongoDB 리스를 가진 인스턴스 하나만 작업을 실행하고, 리스가 만료되면 다른 인스턴스가 인계받습니다.
+    - local: 기존처럼 모든 인스턴스(워커)가 작업을 실행합니다.
+    - off: 작업을 실행하지 않습니다.
+
+    각 작업의 마지막 실행 시간, 소요 시간, 결과 카운트는 scheduler_job_runs 컬렉션에 기록됩니다.
+    """
+
+    LEASE_NAME = "periodic-jobs"
+
+    def __init__(self, db_client: AsyncIOMotorClient, mode: Optional[str] = None):
+        self.db = db_client[settings.MONGO_DATABASE]
+        self.job_runs_collection = self.db.scheduler_job_runs
+        self.mode = mode or settings.SCHEDULER_MODE
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease = MongoLease(
+            self.db.scheduler_leases,
+            self.LEASE_NAME,
+            self.instance_id,
+            settings.SCHEDULER_LEASE_TTL_SECONDS,
+        )
+        self.scheduler = AsyncIOScheduler()
+        self.is_leader = False
+
+    def add_job(self, func: Callable[[], Awaitable[Optional[Dict[str, Any]]]], trigger: str, job_id: str, **trigger_args):
+        """주기 작업을 등록합니다. func는 결과 카운트 dict(또는 None)를 반환하는 코루틴 함수입니다."""
+        self.scheduler.add_job(
+            self._run_job,
+            trigger,
+            args=[job_id, func],
+            id=job_id,
+            replace_existing=True,
+            **trigger_args,
+        )
+
+    def start(self):
+        if self.mode == SCHEDULER_MODE_OFF:
+            print("Scheduler is disabled (SCHEDULER_MODE=off).")
+            return
+        if self.mode == SCHEDULER_MODE_LEADER:
+            self.scheduler.add_job(
+                self._renew_leadership,
+                "interval",
+                seconds=settings.SCHEDULER_LEASE_RENEW_SECONDS,
+                id="scheduler-lease-renewal",
+                next_run_time=datetime.datetime.now(),
+            )
+        self.scheduler.start()
+
+    async def shutdown(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        if self.is_leader:
+            await self.lease.release()
+            self.is_leader = False
+
+    async def _renew_leadership(self) -> bool:
+        acquired = await self.lease.acquire()
+        if acquired != self.is_leader:
+            state = "acquired" if acquired else "lost"
+            print(f"Scheduler leadership {state} by {self.instance_id}.")
+        self.is_leader = acquired
+        return acquired
+
+    async def _run_job(self, job_id: str, func: Callable[[], Awaitable[Optional[Dict[str, Any]]]]):
+        # 실행 직전에 리스를 다시 확인하여, 리스를 잃은 인스턴스가 작업을 중복 실행하지 않도록 합니다.
+        if self.mode == SCHEDULER_MODE_LEADER and not await self._renew_leadership():
+            return
+
+        started_at = _utcnow()
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = await func()
+        except Exception as e:
+            error = str(e)
+            print(f"Scheduled job '{job_id}' failed: {e}")
+        duration = time.perf_counter() - start
+
+        await self.job_runs_collection.update_one(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "last_run_at": started_at,
+                    "last_duration_seconds": duration,
+                    "last_status": "error" if error else "success",
+                    "last_error": error,
+                    "last_result": result,
+                    "instance_id": self.instance_id,
+                },
+                "$inc": {"run_count": 1},
+            },
+            upsert=True,
+        )
@@ -0,0 +1,92 @@
+import asyncio
+import datetime
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.singleflight import SINGLEFLIGHT_CALLS
+from app.services.scheduler_service import MongoLease
+
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class MongoSingleFlight:
+    """
+    SingleFlight를 여러 인스턴스로 확장합니다.
+
+    키마다 singleflight_locks 컬렉션의 MongoLease를 잡은 인스턴스만 작업을 실행하고, 결과를 encode한 값을
+    SINGLEFLIGHT_RESULT_SECONDS 동안 같은 문서에 남깁니다. 리스를 얻지 못한 인스턴스는 결과가 저장될 때까지
+    폴링합니다. 실행 중인 인스턴스가 죽으면 리스가 만료된 뒤 다른 인스턴스가 인계받고,
+    SINGLEFLIGHT_WAIT_SECONDS 안에 결과를 얻지 못하면 직접 실행합니다.
+    """
+
+    def __init__(self, db_client: AsyncIOMotorClient, operation: str):
+        self.db = db_client[settings.MONGO_DATABASE]
+        self.collection = self.db.singleflight_locks
+        self.operation = operation
+        self.instance_id = INSTANCE_ID
+
+    async def ensure_indexes(self):
+        # 리스와 결과가 모두 만료된 문서는 MongoDB가 지웁니다.
+        await self.collection.create_index("expires_at", expireAfterSeconds=0, name="expires_at_ttl")
+
+    async def _stored_result(self, key: str) -> Any:
+        doc = await self.collection.find_one(
+            {"_id": key, "result_expires_at": {"$gt": _utcnow()}},
+            {"result": 1},
+        )
+        return doc["result"] if doc else None
+
+    @staticmethod
+    async def _keep_lease(lease: MongoLease):
+        # fn이 리스 TTL보다 오래 걸려도 다른 인스턴스가 만료된 리스를 잡아 같은 작업을 반복하지 않도록 주기적으로 연장합니다.
+        while True:
+            await asyncio.sleep(lease.ttl_seconds / 3)
+            if not await lease.acquire():
+                return
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], encode: Callable[[Any], Any], decode: Callable[[Any], Any]) -> Any:
+        """fn의 결과를 반환합니다. encode는 결과를 BSON으로 저장할 수 있는 None이 아닌 값으로 바꿔야 합니다."""
+        key = f"{self.operation}:{key}"
+        lease = MongoLease(self.collection, key, self.instance_id, settings.SINGLEFLIGHT_LOCK_TTL_SECONDS)
+        give_up_at = time.monotonic() + settings.SINGLEFLIGHT_WAIT_SECONDS
+        while True:
+            stored = await self._stored_result(key)
+            if stored is not None:
+                SINGLEFLIGHT_CALLS.labels(self.operation, "remote_follower").inc()
+                return decode(stored)
+
+            if await lease.acquire():
+                keep_lease = asyncio.create_task(self._keep_lease(lease))
+                try:
+                    try:
+                        value = await fn()
+                    finally:
+                        # 진행 중인 연장이 반납/결과 저장 뒤에 리스를 다시 만들지 않도록 끝날 때까지 기다립니다.
+                        keep_lease.cancel()
+                        await asyncio.gather(keep_lease, return_exceptions=True)
+                except BaseException:
+                    await asyncio.shield(lease.release())
+                    raise
+                now = _utcnow()
+                result_expires_at = now + datetime.timedelta(seconds=settings.SINGLEFLIGHT_RESULT_SECONDS)
+                # 결과를 보관하는 동안 다른 인스턴스가 리스를 잡아 다시 계산하지 않도록 리스 만료도 함께 미룹니다.
+                await self.collection.update_one(
+                    {"_id": key, "holder": self.instance_id},
+                    {"$set": {"result": encode(value), "result_expires_at": result_expires_at, "expires_at": result_expires_at}},
+                )
+                return value
+
+            if time.monotonic() >= give_up_at:
+                SINGLEFLIGHT_CALLS.labels(self.operation, "wait_timeout").inc()
+                return await fn()
+            await asyncio.sleep(settings.SINGLEFLIGHT_POLL_SECONDS)
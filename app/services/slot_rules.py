@@ -0,0 +1,114 @@
+import bisect
+import datetime
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.slots import MATCH_OVERLAP, MINUTES_PER_DAY, parse_minutes
+from app.models.category import CategoryModel
+from app.services.category_index import CategoryIndex
+
+
+def _minute_of_day(moment: datetime.datetime) -> float:
+    return moment.hour * 60 + moment.minute + (moment.second + moment.microsecond / 1e6) / 60
+
+
+def slot_rules_fingerprint(rules: List[dict]) -> str:
+    """규칙이 바뀌면 달라지는 짧은 해시. 추천 캐시가 다른 규칙으로 계산한 결과를 쓰지 않도록 합니다."""
+    return hashlib.sha1(json.dumps(rules, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+
+
+class SlotRuleTable:
+    """
+    시간대 규칙(CATEGORY_SLOT_RULES)을 카테고리로 바꿔 하루를 나눈 구간표로 컴파일합니다.
+
+    하루(0~1440분)를 모든 규칙의 경계로 나누고 구간마다 해당하는 규칙의 비트마스크를 미리 계산해 두므로,
+    그룹 시간 범위는 경계 이분 탐색 두 번과 구간 마스크 OR 한 번으로 평가합니다. 자정을 넘는 슬롯과
+    여러 날에 걸친 범위도 같은 방식으로 처리하며, 24시간 이상인 범위는 모든 overlap 규칙에 해당합니다.
+    결과 카테고리는 규칙 순서대로, 중복 없이 반환합니다.
+    """
+
+    def __init__(self, rules: List[dict], category_index: CategoryIndex):
+        self.rules = rules
+        self.fingerprint = slot_rules_fingerprint(rules)
+        self.categories: List[Optional[CategoryModel]] = []
+        slots: List[Tuple[str, List[Tuple[int, int]]]] = []
+        for rule in rules:
+            self.categories.append(category_index.get_by_name(rule["category"]))
+            start, end = parse_minutes(rule["start"]), parse_minutes(rule["end"])
+            # end가 start보다 이르면 자정을 넘는 슬롯입니다.
+            intervals = [(start, end)] if start < end else [(start, MINUTES_PER_DAY), (0, end)]
+            slots.append((rule.get("match", MATCH_OVERLAP), [(s, e) for s, e in intervals if s < e]))
+
+        boundaries = {0, MINUTES_PER_DAY}
+        for _, intervals in slots:
+            for start, end in intervals:
+                boundaries.update((start, end))
+        self.boundaries = sorted(boundaries)
+
+        # 구간 i = [boundaries[i], boundaries[i + 1])
+        segment_count = len(self.boundaries) - 1
+        self.overlap_masks = [0] * segment_count
+        self.start_masks = [0] * segment_count
+        self.all_overlap_mask = 0
+        for bit, (match, intervals) in enumerate(slots):
+            if self.categories[bit] is None:
+                continue
+            if match == MATCH_OVERLAP:
+                self.all_overlap_mask |= 1 << bit
+            masks = self.overlap_masks if match == MATCH_OVERLAP else self.start_masks
+            for start, end in intervals:
+                for segment in range(self.boundaries.index(start), self.boundaries.index(end)):
+                    masks[segment] |= 1 << bit
+
+    def _segment(self, minute: float) -> int:
+        """minute이 속한 구간."""
+        return bisect.bisect_right(self.boundaries, minute) - 1
+
+    def _overlap_mask(self, start_minute: float, end_minute: float) -> int:
+        """같은 날 [start_minute, end_minute) 범위와 겹치는 overlap 규칙 마스크."""
+        if start_minute >= end_minute:
+            return 0
+        mask = 0
+        # 마지막 구간은 end_minute 바로 앞의 시각이 속한 구간입니다.
+        last_segment = bisect.bisect_left(self.boundaries, end_minute) - 1
+        for segment in range(self._segment(start_minute), last_segment + 1):
+            mask |= self.overlap_masks[segment]
+        return mask
+
+    def match(self, starttime: datetime.datetime, endtime: Optional[datetime.datetime]) -> List[CategoryModel]:
+        start_minute = _minute_of_day(starttime)
+        mask = self.start_masks[self._segment(start_minute)]
+
+        # 시작 시각의 벽시계 기준입니다. 종료 시간이 없으면 시작 시각만 봅니다.
+        duration = (endtime - starttime).total_seconds() / 60 if endtime else 0
+        if duration >= MINUTES_PER_DAY:
+            mask |= self.all_overlap_mask
+        elif duration > 0:
+            end_minute = start_minute + duration
+            if end_minute <= MINUTES_PER_DAY:
+                mask |= self._overlap_mask(start_minute, end_minute)
+            else:
+                mask |= self._overlap_mask(start_minute, MINUTES_PER_DAY)
+                mask |= self._overlap_mask(0, end_minute - MINUTES_PER_DAY)
+
+        matched = []
+        seen = set()
+        for bit, category in enumerate(self.categories):
+            if mask >> bit & 1 and str(category.id) not in seen:
+                seen.add(str(category.id))
+                matched.append(category)
+        return matched
+
+
+_compiled: Optional[Tuple[CategoryIndex, str, SlotRuleTable]] = None
+
+
+def get_slot_rule_table(category_index: CategoryIndex) -> SlotRuleTable:
+    """현재 카테고리 인덱스와 설정으로 컴파일한 SlotRuleTable. 둘 중 하나가 바뀔 때만 다시 컴파일합니다."""
+    global _compiled
+    fingerprint = slot_rules_fingerprint(settings.CATEGORY_SLOT_RULES)
+    if _compiled is None or _compiled[0] is not category_index or _compiled[1] != fingerprint:
+        _compiled = (category_index, fingerprint, SlotRuleTable(settings.CATEGORY_SLOT_RULES, category_index))
+    return _compiled[2]
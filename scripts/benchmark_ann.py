@@ -0,0 +1,147 @@
+"""
+카테고리별 활동 IVF 인덱스(app/services/ann_index.py) 벤치마크.
+
+합성 카탈로그로 ActivityFeatures를 만들고, 카테고리마다 임의의 그룹 선호도 질의에 대해
+전체 탐색(정렬 후 상위 k개)과 IVF 탐색의 recall@k와 지연 시간을 ANN_MAX_LISTS 값별로 비교합니다.
+ANN_MAX_LISTS=0은 경계로만 멈추므로 recall이 1이어야 합니다. MongoDB는 필요하지 않습니다.
+
+    python scripts/benchmark_ann.py --activities 100000 --queries 200
+    python scripts/benchmark_ann.py --activities 20000 --max-lists 4,16,0 --output ann.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings는 필수 환경 변수를 요구하므로 인메모리 실행용 기본값을 채워 둡니다.
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DATABASE", "playfriends_benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import numpy as np
+from bson import ObjectId
+
+from app.core.config import settings
+from app.core.features import FOOD_BIT_COUNT, PLAY_DIMENSIONS
+from app.services.activity_features import ActivityFeatures
+from app.services.ann_index import KIND_FOOD, KIND_PLAY, build_category_index, top_food_rows, top_play_rows
+from scripts.seed_db import PLAY_CATEGORIES, FOOD_CATEGORIES
+from scripts.synthetic_catalog import iter_synthetic_activities
+
+
+def _parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def build_features(num_activities: int, seed: int) -> Tuple[ActivityFeatures, Dict[str, str], Dict[str, str]]:
+    """합성 카탈로그의 ActivityFeatures와 카테고리 이름 -> ID, 카테고리 ID -> 인덱스 종류."""
+    category_ids: Dict[str, str] = {}
+    kinds: Dict[str, str] = {}
+    for tree, kind in ((PLAY_CATEGORIES, KIND_PLAY), (FOOD_CATEGORIES, KIND_FOOD)):
+        for parent, children in tree.items():
+            for name in [parent, *children]:
+                category_ids[name] = str(ObjectId())
+                kinds[category_ids[name]] = kind
+    documents = []
+    for activity in iter_synthetic_activities(category_ids, num_activities, seed=seed):
+        document = activity.model_dump(by_alias=True, exclude_none=True)
+        document["_id"] = ObjectId()
+        documents.append(document)
+    return ActivityFeatures.from_documents(documents), category_ids, kinds
+
+
+def _brute_force(features: ActivityFeatures, rows: np.ndarray, kind: str, query: np.ndarray, k: int) -> np.ndarray:
+    """GroupService가 인덱스 없이 하는 것과 같은 정렬 후 상위 k개."""
+    if kind == KIND_PLAY:
+        order = np.argsort(features.play_distances(rows, query), kind="stable")
+    else:
+        order = np.argsort(-features.food_similarity(rows, query), kind="stable")
+    return rows[order[:k]]
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000 if samples else 0.0
+
+
+def run(args) -> Dict[str, Any]:
+    features, category_ids, kinds = build_features(args.activities, args.seed)
+    rng = np.random.default_rng(args.seed)
+    names = {category_id: name for name, category_id in category_ids.items()}
+    results = []
+
+    for category_id in features.categories:
+        rows = features.rows_for_category(category_id)
+        if len(rows) < args.min_size or category_id not in kinds:
+            continue
+        kind = kinds[category_id]
+
+        start = time.perf_counter()
+        index = build_category_index(features, category_id, kind)
+        build_seconds = time.perf_counter() - start
+
+        dimension = len(PLAY_DIMENSIONS) if kind == KIND_PLAY else FOOD_BIT_COUNT
+        queries = rng.uniform(-1, 1, (args.queries, dimension))
+        brute_latency, expected = [], []
+        for query in queries:
+            start = time.perf_counter()
+            expected.append(set(_brute_force(features, rows, kind, query, args.k).tolist()))
+            brute_latency.append(time.perf_counter() - start)
+
+        for max_lists in args.max_lists:
+            settings.ANN_MAX_LISTS = max_lists
+            search = top_play_rows if kind == KIND_PLAY else top_food_rows
+            latency, recall = [], []
+            for query, exact in zip(queries, expected):
+                start = time.perf_counter()
+                found = search(features, category_id, query, args.k)
+                latency.append(time.perf_counter() - start)
+                recall.append(len(exact & set(found.tolist())) / max(1, len(exact)))
+            results.append({
+                "category": names.get(category_id, category_id),
+                "kind": kind,
+                "activities": int(len(rows)),
+                "lists": index.list_count,
+                "build_ms": round(build_seconds * 1000, 1),
+                "max_lists": max_lists,
+                "recall": round(float(np.mean(recall)), 4),
+                "ann_p50_ms": round(_percentile(latency, 50), 3),
+                "ann_p95_ms": round(_percentile(latency, 95), 3),
+                "brute_p50_ms": round(_percentile(brute_latency, 50), 3),
+            })
+            print(
+                f"{results[-1]['category']:<12} {kind:<4} n={len(rows):<7} lists={index.list_count:<5} build={results[-1]['build_ms']:.0f}ms "
+                f"max_lists={max_lists:<3} recall@{args.k}={results[-1]['recall']:.4f} "
+                f"ann p50={results[-1]['ann_p50_ms']:.3f}ms p95={results[-1]['ann_p95_ms']:.3f}ms "
+                f"brute p50={results[-1]['brute_p50_ms']:.3f}ms"
+            )
+    return {"activities": args.activities, "k": args.k, "queries": args.queries, "seed": args.seed, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IVF candidate retrieval against brute-force ranking.")
+    parser.add_argument("--activities", type=int, default=50000, help="합성 카탈로그의 활동 수")
+    parser.add_argument("--queries", type=int, default=100, help="카테고리별 질의 수")
+    parser.add_argument("--k", type=int, default=30, help="가져올 후보 수 (GroupService.CANDIDATE_POOL_SIZE)")
+    parser.add_argument("--max-lists", type=_parse_int_list, default=[4, 16, 64, 0], help="비교할 ANN_MAX_LISTS 값 목록 (0 = 제한 없음)")
+    parser.add_argument("--min-size", type=int, default=1000, help="이보다 활동이 적은 카테고리는 건너뜁니다")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON을 저장할 경로 (기본: 표준 출력에 표만 출력)")
+    args = parser.parse_args()
+
+    # 벤치마크에서는 모든 카테고리에 인덱스를 쓰고, 인덱스 파일은 임시 디렉터리에 만듭니다.
+    settings.ANN_MIN_CATEGORY_SIZE = 0
+    settings.ANN_INDEX_DIR = tempfile.mkdtemp(prefix="playfriends-ann-")
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+스케줄 생성 파이프라인 벤치마크.
+
+mongomock-motor 기반의 인메모리 MongoDB에 더미/합성 카탈로그를 시딩한 뒤
+calculate_and_update_group_preferences, recommend_categories, create_schedules의
+지연 시간 백분위수, 초당 평가 조합 수, 최대 메모리 사용량을 측정하여 JSON으로 출력합니다.
+Gemini 호출은 로컬 폴백 타임라인을 쓰도록 대체됩니다.
+
+    pip install mongomock-motor
+    python scripts/benchmark_schedules.py --activities 10000 --categories 1,2,3 --output bench.json
+    python scripts/benchmark_schedules.py --compare bench.json   # 이전 결과와 p50 비교
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings는 필수 환경 변수를 요구하므로 인메모리 실행용 기본값을 채워 둡니다.
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DATABASE", "playfriends_benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import numpy as np
+from bson import ObjectId
+
+try:
+    from mongomock_motor import AsyncMongoMockClient
+except ImportError:
+    sys.exit("mongomock-motor가 필요합니다: pip install mongomock-motor")
+
+from app.core.config import settings
+from app.core.telemetry import collect_pipeline_traces
+from app.core.enums import ActivityType, FoodIngredient, FoodTaste, FoodCookingMethod, FoodCuisineType
+from app.core.features import PLAY_DIMENSIONS
+from app.models.category import CategoryModel
+from app.schemas.user import (
+    FoodPreferences,
+    PlayPreferences,
+    IngredientPreference,
+    TastePreference,
+    CookingMethodPreference,
+    CuisineTypePreference,
+)
+from app.services.category_centroid_service import COUNT_FIELD, SUMS_FIELD, centroid_accumulation_stages
+from app.services.group_service import GroupService
+from scripts.seed_db import PLAY_CATEGORIES, FOOD_CATEGORIES
+from scripts.synthetic_catalog import iter_synthetic_activities
+
+# 카테고리 수 k의 시나리오에서는 이 목록의 앞 k개를 선택합니다 (더미 데이터에서 활동이 많은 순서).
+BENCHMARK_CATEGORIES = ["식당", "카페", "주점", "미술관, 박물관", "영화관", "관광", "이색 데이트", "쇼핑"]
+
+
+class StubGeminiService:
+    """Gemini를 호출하지 않고 빈 결과를 반환하여 로컬 폴백 타임라인을 사용하게 합니다."""
+
+    async def generate_realistic_schedule(self, activities, start_time, end_time, deadline=None):
+        return []
+
+    async def generate_realistic_schedules(self, activity_lists, start_time, end_time, deadline=None):
+        return [[] for _ in activity_lists]
+
+
+def _parse_int_list(value: str) -> List[int]:
+    result = []
+    for part in value.split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            result.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            result.append(int(part))
+    return result
+
+
+def _latency_summary(samples: List[float]) -> Dict[str, float]:
+    values = np.array(samples) * 1000
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def _random_preferences(rng: random.Random) -> Dict[str, Any]:
+    score = lambda: round(rng.uniform(-1, 1), 2)
+    food = FoodPreferences(
+        ingredients=[IngredientPreference(name=item, score=score()) for item in FoodIngredient],
+        tastes=[TastePreference(name=item, score=score()) for item in FoodTaste],
+        cooking_methods=[CookingMethodPreference(name=item, score=score()) for item in FoodCookingMethod],
+        cuisine_types=[CuisineTypePreference(name=item, score=score()) for item in FoodCuisineType],
+    )
+    play = PlayPreferences(**{key: score() for key in PlayPreferences().model_dump()})
+    return {"food_preferences": food.model_dump(), "play_preferences": play.model_dump()}
+
+
+async def seed_catalog(db, num_activities: int, seed: int) -> Dict[str, str]:
+    category_ids: Dict[str, str] = {}
+
+    async def add_category(name: str, type: ActivityType, parent_name: str = None):
+        category = CategoryModel(name=name, type=type, parent_category_id=category_ids.get(parent_name))
+        result = await db.categories.insert_one(category.model_dump(by_alias=True, exclude_none=True))
+        category_ids[name] = str(result.inserted_id)
+
+    for tree, type in ((PLAY_CATEGORIES, ActivityType.ACTIVITY), (FOOD_CATEGORIES, ActivityType.FOOD)):
+        for parent, children in tree.items():
+            await add_category(parent, type)
+            for child in children:
+                await add_category(child, type, parent_name=parent)
+
+    batch = []
+    for activity in iter_synthetic_activities(category_ids, num_activities, seed=seed):
+        batch.append(activity.model_dump(by_alias=True, exclude_none=True))
+        if len(batch) >= 1000:
+            await db.activities.insert_many(batch)
+            batch = []
+    if batch:
+        await db.activities.insert_many(batch)
+
+    # mongomock은 $merge/$toObjectId를 지원하지 않으므로 rebuild_centroids_sync와 같은 값을 직접 씁니다.
+    async for totals in db.activities.aggregate(centroid_accumulation_stages()):
+        if not totals["_id"]:
+            continue
+        count = totals[COUNT_FIELD]
+        await db.categories.update_one(
+            {"_id": ObjectId(totals["_id"])},
+            {"$set": {
+                SUMS_FIELD: {dim: totals[dim] for dim in PLAY_DIMENSIONS},
+                COUNT_FIELD: count,
+                "play_attributes": {dim: totals[dim] / count for dim in PLAY_DIMENSIONS},
+            }},
+        )
+    return category_ids
+
+
+async def seed_group(db, group_size: int, rng: random.Random) -> str:
+    member_ids = []
+    for i in range(group_size):
+        result = await db.users.insert_one({
+            "userid": f"bench-{group_size}-{i}-{rng.random()}",
+            "username": f"bench{i}",
+            "hashed_password": "",
+            "is_active": True,
+            "group_ids": [],
+            **_random_preferences(rng),
+        })
+        member_ids.append(str(result.inserted_id))
+
+    starttime = datetime.datetime(2025, 7, 19, 10, 0)
+    result = await db.groups.insert_one({
+        "groupname": f"bench-{group_size}",
+        "starttime": starttime,
+        "endtime": starttime + datetime.timedelta(hours=12),
+        "is_active": True,
+        "owner_id": member_ids[0],
+        "member_ids": member_ids,
+    })
+    group_id = str(result.inserted_id)
+    await db.users.update_many({"_id": {"$in": [ObjectId(m) for m in member_ids]}}, {"$addToSet": {"group_ids": group_id}})
+    return group_id
+
+
+async def _measure(coro_factory, repeats: int, with_memory: bool) -> Dict[str, Any]:
+    await coro_factory()  # warm-up
+    samples = []
+    with collect_pipeline_traces() as traces:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await coro_factory()
+            samples.append(time.perf_counter() - start)
+
+    result: Dict[str, Any] = {"repeats": repeats, "latency_ms": _latency_summary(samples)}
+    if traces:
+        # 측정 대상 파이프라인(마지막 트레이스의 operation)의 단계별 평균 시간과 카운터
+        operation = traces[-1].operation
+        own = [t for t in traces if t.operation == operation]
+        stage_names = sorted({name for t in own for name in t.stages})
+        counter_names = sorted({name for t in own for name in t.counters})
+        result["stages_ms"] = {name: sum(t.stages.get(name, 0.0) for t in own) / len(own) * 1000 for name in stage_names}
+        result["counters"] = {name: sum(t.counters.get(name, 0.0) for t in own) / len(own) for name in counter_names}
+    if with_memory:
+        tracemalloc.start()
+        await coro_factory()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_memory_mb"] = peak / (1024 * 1024)
+    return result
+
+
+async def run_benchmarks(args) -> Dict[str, Any]:
+    np.random.seed(args.seed)
+    rng = random.Random(args.seed)
+    client = AsyncMongoMockClient()
+    db = client[settings.MONGO_DATABASE]
+
+    start = time.perf_counter()
+    await seed_catalog(db, args.activities, args.seed)
+    seed_seconds = time.perf_counter() - start
+
+    service = GroupService(client)
+    service.gemini_service = StubGeminiService()
+
+    results = []
+    for group_size in args.group_sizes:
+        group_id = await seed_group(db, group_size, rng)
+
+        measured = await _measure(lambda: service.calculate_and_update_group_preferences(group_id), args.repeats, args.memory)
+        results.append({"benchmark": "preference_aggregation", "group_size": group_size, **measured})
+        print(f"preference_aggregation group_size={group_size} p50={measured['latency_ms']['p50']:.2f}ms", file=sys.stderr)
+
+        measured = await _measure(lambda: service.recommend_categories(group_id), args.repeats, args.memory)
+        results.append({"benchmark": "recommend_categories", "group_size": group_size, **measured})
+        print(f"recommend_categories group_size={group_size} p50={measured['latency_ms']['p50']:.2f}ms", file=sys.stderr)
+
+        for num_categories in args.categories:
+            category_names = BENCHMARK_CATEGORIES[:num_categories]
+            measured = await _measure(lambda: service.create_schedules(group_id, category_names), args.repeats, args.memory)
+            combos = measured.get("counters", {}).get("combos_evaluated", 0)
+            search_seconds = measured.get("stages_ms", {}).get("combinatorial_search", 0) / 1000
+            results.append({
+                "benchmark": "create_schedules",
+                "group_size": group_size,
+                "categories": num_categories,
+                "combos_evaluated": combos,
+                "combos_per_second": combos / search_seconds if search_seconds > 0 else None,
+                **measured,
+            })
+            print(f"create_schedules group_size={group_size} categories={num_categories} p50={measured['latency_ms']['p50']:.2f}ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "activities": args.activities,
+            "seed": args.seed,
+            "seed_seconds": seed_seconds,
+        },
+        "results": results,
+    }
+
+
+def _scenario_key(result: Dict[str, Any]) -> tuple:
+    return (result["benchmark"], result.get("group_size"), result.get("categories"))
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]):
+    """두 결과의 시나리오별 p50 지연 시간을 비교하여 출력합니다."""
+    baseline = {_scenario_key(r): r for r in previous["results"]}
+    print(f"{'scenario':<50} {'before':>10} {'after':>10} {'change':>8}", file=sys.stderr)
+    for result in current["results"]:
+        old = baseline.get(_scenario_key(result))
+        if not old:
+            continue
+        before = old["latency_ms"]["p50"]
+        after = result["latency_ms"]["p50"]
+        change = (after - before) / before * 100 if before else 0.0
+        name = " ".join(str(part) for part in _scenario_key(result) if part is not None)
+        print(f"{name:<50} {before:>9.2f}ms {after:>9.2f}ms {change:>+7.1f}%", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the schedule generation pipeline against an in-memory MongoDB.")
+    parser.add_argument("--activities", type=int, default=1000, help="합성 카탈로그의 활동 수 (최대 10k 권장)")
+    parser.add_argument("--categories", type=_parse_int_list, default=[1, 2, 3], help="선택할 카테고리 수 목록 (예: 1,2,3 또는 1-8)")
+    parser.add_argument("--group-sizes", type=_parse_int_list, default=[2, 4, 8], help="그룹 인원 목록 (예: 2,4,8)")
+    parser.add_argument("--repeats", type=int, default=5, help="시나리오별 측정 반복 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="tracemalloc 최대 메모리 측정을 건너뜁니다")
+    parser.add_argument("--output", help="결과 JSON을 저장할 경로 (기본: 표준 출력)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmarks(args))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
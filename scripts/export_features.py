@@ -0,0 +1,114 @@
+"""
+활동 특성 저장소 내보내기.
+
+activities 컬렉션을 ActivityFeatures 배열로 만들어 FEATURE_STORE_DIR 아래
+'<DB 이름>-activities-v<catalog 버전>' 디렉터리에 .npy 파일로 저장합니다.
+서버 워커는 시작할 때 현재 catalog 버전과 같은 저장소를 읽기 전용 메모리 맵으로 열므로, 워커마다 MongoDB에서
+카탈로그를 다시 읽지 않고 같은 페이지를 공유합니다. 버전이 맞지 않으면 워커는 MongoDB에서 다시 만듭니다.
+이미 현재 버전의 저장소가 있으면 다시 내보내지 않으며, 저장 후에는 이전 버전의 저장소를 지웁니다.
+이어서 ANN_MIN_CATEGORY_SIZE 이상인 카테고리의 IVF 인덱스(app/services/ann_index.py)를 ANN_INDEX_DIR에 만듭니다.
+서버는 요청 중에 인덱스를 만들지 않고, 인덱스 파일이 없는 카테고리는 전체 탐색을 합니다.
+
+사용 예
+    python scripts/export_features.py            # 배포(cloudbuild.yaml)에서 이미지에 넣거나, 공유 볼륨에 주기적으로 실행
+    python scripts/export_features.py --force    # 현재 버전이라도 다시 내보냄
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.database import Database
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# .env 파일 로드
+load_dotenv()
+
+from app.core.config import settings
+from app.core.enums import ActivityType
+from app.db.catalog_meta import ACTIVITIES_CATALOG
+from app.services.activity_features import FEATURE_PROJECTION, ActivityFeatures, feature_store_path
+from app.services.ann_index import KIND_FOOD, KIND_PLAY, build_category_indexes
+
+MAX_ATTEMPTS = 3
+# 카테고리 type -> GroupService가 그 카테고리에 쓰는 인덱스 종류
+INDEX_KINDS = {ActivityType.ACTIVITY.value: KIND_PLAY, ActivityType.FOOD.value: KIND_FOOD}
+
+
+def _catalog_version(db: Database) -> int:
+    meta = db.catalog_meta.find_one({"_id": ACTIVITIES_CATALOG})
+    return meta.get("version", 0) if meta else 0
+
+
+def _remove_other_versions(database: str, current: str):
+    # 이미 매핑한 워커는 파일이 지워져도 계속 읽을 수 있습니다 (열린 inode는 남아 있음).
+    prefix = f"{database}-activities-v"
+    for name in os.listdir(settings.FEATURE_STORE_DIR):
+        path = os.path.join(settings.FEATURE_STORE_DIR, name)
+        if name.startswith(prefix) and path != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def build_ann_indexes(db: Database, features: ActivityFeatures):
+    """features로 카테고리별 IVF 인덱스를 만듭니다. 같은 지문의 인덱스 파일이 이미 있으면 건너뜁니다."""
+    start = time.perf_counter()
+    category_kinds = [
+        (str(doc["_id"]), INDEX_KINDS[doc.get("type")])
+        for doc in db.categories.find({}, {"type": 1})
+        if doc.get("type") in INDEX_KINDS
+    ]
+    built = build_category_indexes(features, category_kinds)
+    print(f"{settings.ANN_INDEX_DIR}: 카테고리 {built}개의 ANN 인덱스 준비 ({time.perf_counter() - start:.1f}s)")
+
+
+def export_features(db: Database, force: bool = False) -> str:
+    """현재 catalog 버전의 저장소 경로를 반환합니다. 읽는 도중 카탈로그가 바뀌면 다시 읽습니다."""
+    for _ in range(MAX_ATTEMPTS):
+        version = _catalog_version(db)
+        path = feature_store_path(db.name, version)
+        features = None if force else ActivityFeatures.load(path, db.name, version)
+        if features is not None:
+            print(f"{path}: 이미 최신입니다.")
+            build_ann_indexes(db, features)
+            return path
+
+        start = time.perf_counter()
+        documents = list(db.activities.find({}, FEATURE_PROJECTION))
+        if _catalog_version(db) != version:
+            print("내보내는 중에 카탈로그가 바뀌어 다시 읽습니다.")
+            continue
+
+        features = ActivityFeatures.from_documents(documents)
+        if force:
+            shutil.rmtree(path, ignore_errors=True)
+        features.save(path, db.name, version)
+        _remove_other_versions(db.name, path)
+        print(f"{path}: 활동 {len(features)}개 저장 ({time.perf_counter() - start:.1f}s)")
+        build_ann_indexes(db, features)
+        return path
+    raise RuntimeError("카탈로그가 계속 바뀌어 특성 저장소를 내보내지 못했습니다.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="활동 특성 배열을 메모리 맵 저장소로 내보냅니다.")
+    parser.add_argument("--force", action="store_true", help="현재 버전의 저장소가 있어도 다시 내보냅니다")
+    args = parser.parse_args()
+
+    if not settings.FEATURE_STORE_DIR:
+        print("FEATURE_STORE_DIR이 비어 있어 내보내지 않습니다.")
+        return
+
+    client = MongoClient(settings.MONGO_URI)
+    try:
+        export_features(client[settings.MONGO_DATABASE], force=args.force)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
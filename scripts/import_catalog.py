@@ -0,0 +1,309 @@
+"""
+활동 카탈로그 가져오기 도구.
+
+seed_db와 달리 기존 데이터를 지우지 않습니다. 활동은 (category_id, name)을 자연 키로 upsert하므로
+같은 파일을 여러 번 가져와도 결과가 같고, 입력은 chunk 단위로 읽어 쓰기 때문에 메모리 사용량은
+입력 크기와 무관합니다. chunk를 쓸 때마다 바뀐 활동만큼 카테고리 play_attributes 누적값을 증분 갱신하고,
+catalog_meta 버전을 올려 실행 중인 서버의 캐시가 새 데이터로 다시 만들어지게 합니다.
+--rebuild를 주면 증분 갱신 대신 가져온 뒤 activities 전체로 다시 계산합니다.
+
+입력 형식
+- JSONL: 한 줄에 ActivityModel 형태의 객체 하나. category_id 대신 카테고리 이름(category)을 쓸 수 있고,
+  location은 GeoJSON 또는 [경도, 위도] 배열입니다. type이 없으면 카테고리의 type을 사용합니다.
+- CSV: name, type, category(또는 category_id), lon, lat 열과 놀이 속성 열(crowd_level 등),
+  음식 속성 열(ingredients, tastes, cooking_methods, cuisine_types; 값은 "|"로 구분).
+
+사용 예
+    python scripts/import_catalog.py activities.jsonl
+    python scripts/import_catalog.py activities.csv --chunk-size 5000
+    python scripts/import_catalog.py --synthetic 1000000     # 더미 데이터 기반 합성 카탈로그
+    python scripts/import_catalog.py --synthetic 184         # 더미 데이터만 (seed_db의 비파괴 버전)
+    python scripts/import_catalog.py activities.jsonl --rebuild   # 누적값이 없는 기존 DB에 처음 가져올 때
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, OperationFailure
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# .env 파일 로드
+load_dotenv()
+
+from app.core.config import settings
+from app.core.enums import ActivityType
+from app.core.features import FOOD_FAMILIES, PLAY_DIMENSIONS
+from app.db.catalog_meta import ACTIVITIES_CATALOG, CATEGORIES_CATALOG, bump_catalog_version_sync
+from app.models.activity import ActivityModel
+from app.services.category_centroid_service import apply_activity_changes_sync, rebuild_centroids_sync
+from scripts.seed_db import PLAY_CATEGORIES, FOOD_CATEGORIES
+from scripts.synthetic_catalog import iter_synthetic_activities
+
+DEFAULT_CHUNK_SIZE = 1000
+ACTIVITY_NATURAL_KEY_INDEX = "category_id_name_unique"
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.rejected = 0
+        self.upserted = 0
+        self.modified = 0
+        self.matched = 0
+        self.write_errors = 0
+        self.centroid_updates = 0
+        self.unknown_categories: Counter = Counter()
+        self.started_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def summary(self) -> str:
+        rate = self.read / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"read={self.read} upserted={self.upserted} modified={self.modified} "
+            f"unchanged={self.matched - self.modified} rejected={self.rejected} write_errors={self.write_errors} "
+            f"centroid_updates={self.centroid_updates} "
+            f"elapsed={self.elapsed:.1f}s throughput={rate:,.0f} rows/s"
+        )
+
+
+def ensure_category_tree(db: Database) -> None:
+    """seed_db의 기본 카테고리 트리를 이름 기준으로 upsert합니다. 이미 있는 카테고리는 건드리지 않습니다."""
+    for tree, type in ((PLAY_CATEGORIES, ActivityType.ACTIVITY), (FOOD_CATEGORIES, ActivityType.FOOD)):
+        parents = [
+            UpdateOne({"name": parent}, {"$setOnInsert": {"name": parent, "type": type.value}}, upsert=True)
+            for parent in tree
+        ]
+        db.categories.bulk_write(parents, ordered=False)
+
+        parent_ids = {doc["name"]: str(doc["_id"]) for doc in db.categories.find({"name": {"$in": list(tree)}}, {"name": 1})}
+        children = [
+            UpdateOne(
+                {"name": child},
+                {"$setOnInsert": {"name": child, "type": type.value, "parent_category_id": parent_ids[parent]}},
+                upsert=True,
+            )
+            for parent, names in tree.items()
+            for child in names
+        ]
+        if children:
+            db.categories.bulk_write(children, ordered=False)
+
+
+def load_category_map(db: Database) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """카테고리 이름 -> ID, ID -> type 맵. 이름이 중복되면 먼저 나온 카테고리를 사용합니다."""
+    ids_by_name: Dict[str, str] = {}
+    types_by_id: Dict[str, str] = {}
+    for doc in db.categories.find({}, {"name": 1, "type": 1}):
+        ids_by_name.setdefault(doc["name"], str(doc["_id"]))
+        types_by_id[str(doc["_id"])] = doc.get("type")
+    return ids_by_name, types_by_id
+
+
+def ensure_activity_indexes(db: Database) -> None:
+    try:
+        db.activities.create_index(
+            [("category_id", ASCENDING), ("name", ASCENDING)],
+            unique=True,
+            name=ACTIVITY_NATURAL_KEY_INDEX,
+        )
+    except OperationFailure as e:
+        # 기존 데이터에 (category_id, name) 중복이 있으면 인덱스 없이 진행합니다. upsert는 동작하지만 느립니다.
+        print(f"경고: {ACTIVITY_NATURAL_KEY_INDEX} 인덱스를 만들 수 없습니다 ({e}).", file=sys.stderr)
+
+
+def _split_list(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split("|") if item.strip()]
+
+
+def _csv_row_to_record(row: Dict[str, str]) -> dict:
+    record = {key: row.get(key) or None for key in ("name", "type", "category", "category_id")}
+    lon, lat = row.get("lon") or row.get("longitude"), row.get("lat") or row.get("latitude")
+    if lon and lat:
+        record["location"] = [float(lon), float(lat)]
+    play = {dim: float(row[dim]) for dim in PLAY_DIMENSIONS if row.get(dim)}
+    if play:
+        record["play_attributes"] = play
+    food = {family: _split_list(row.get(family)) for family, _ in FOOD_FAMILIES if row.get(family)}
+    if food:
+        record["food_attributes"] = food
+    return record
+
+
+def iter_file_records(path: str) -> Iterator[dict]:
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield _csv_row_to_record(row)
+    else:
+        with open(path, encoding="utf-8") if path != "-" else sys.stdin as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def iter_synthetic_records(db: Database, count: int, seed: int) -> Iterator[dict]:
+    ids_by_name, _ = load_category_map(db)
+    for activity in iter_synthetic_activities(ids_by_name, count, seed=seed):
+        yield activity.model_dump(exclude_none=True, exclude={"id"})
+
+
+def to_activity_document(record: dict, ids_by_name: Dict[str, str], types_by_id: Dict[str, str], stats: ImportStats) -> Optional[dict]:
+    """입력 레코드를 검증된 activities 문서로 변환합니다. 변환할 수 없으면 None을 반환합니다."""
+    record = dict(record)
+    category_name = record.pop("category", None)
+    category_id = record.get("category_id") or ids_by_name.get(category_name)
+    if not category_id or category_id not in types_by_id:
+        stats.unknown_categories[category_name or category_id] += 1
+        return None
+    record["category_id"] = category_id
+    if not record.get("type"):
+        record["type"] = types_by_id[category_id]
+
+    location = record.get("location")
+    if isinstance(location, (list, tuple)):
+        record["location"] = {"type": "Point", "coordinates": list(location)}
+
+    record.pop("_id", None)
+    record.pop("id", None)
+    try:
+        activity = ActivityModel(**record)
+    except ValidationError:
+        return None
+    document = activity.model_dump(by_alias=True, exclude_none=True)
+    document.pop("_id", None)
+    return document
+
+
+def _chunks(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _existing_activities(db: Database, documents: List[dict]) -> Dict[Tuple[str, str], dict]:
+    """chunk의 자연 키 (category_id, name)에 해당하는 기존 활동의 카테고리와 놀이 속성."""
+    names_by_category: Dict[str, List[str]] = {}
+    for doc in documents:
+        names_by_category.setdefault(doc["category_id"], []).append(doc["name"])
+    query = {"$or": [{"category_id": category_id, "name": {"$in": names}} for category_id, names in names_by_category.items()]}
+    projection = {"category_id": 1, "name": 1, "play_attributes": 1}
+    return {(doc["category_id"], doc["name"]): doc for doc in db.activities.find(query, projection)}
+
+
+def write_chunk(db: Database, documents: List[dict], stats: ImportStats, maintain_centroids: bool = True) -> None:
+    existing = _existing_activities(db, documents) if maintain_centroids else {}
+    operations = [
+        UpdateOne({"category_id": doc["category_id"], "name": doc["name"]}, {"$set": doc}, upsert=True)
+        for doc in documents
+    ]
+    try:
+        result = db.activities.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        # unordered이므로 실패한 문서를 제외한 나머지는 이미 반영되어 있습니다.
+        details = e.details
+        stats.write_errors += len(details.get("writeErrors", []))
+    stats.upserted += details.get("nUpserted", 0)
+    stats.modified += details.get("nModified", 0)
+    stats.matched += details.get("nMatched", 0)
+
+    if maintain_centroids:
+        # 쓰지 못한 문서는 누적값에 반영하지 않습니다. $set이므로 입력에 없는 필드는 기존 값이 남습니다.
+        failed = {error["index"] for error in details.get("writeErrors", [])}
+        changes = []
+        for index, doc in enumerate(documents):
+            if index in failed:
+                continue
+            key = (doc["category_id"], doc["name"])
+            before = existing.get(key)
+            existing[key] = {**before, **doc} if before else doc
+            changes.append((before, existing[key]))
+        stats.centroid_updates += apply_activity_changes_sync(db, changes, bump_version=False)
+
+
+def import_records(
+    db: Database,
+    records: Iterable[dict],
+    chunk_size: int,
+    progress_every: int = 100_000,
+    maintain_centroids: bool = True,
+) -> ImportStats:
+    ids_by_name, types_by_id = load_category_map(db)
+    stats = ImportStats()
+    next_progress = progress_every
+    for chunk in _chunks(records, chunk_size):
+        stats.read += len(chunk)
+        documents = []
+        for record in chunk:
+            document = to_activity_document(record, ids_by_name, types_by_id, stats)
+            if document is None:
+                stats.rejected += 1
+            else:
+                documents.append(document)
+        if documents:
+            write_chunk(db, documents, stats, maintain_centroids)
+        if stats.read >= next_progress:
+            print(stats.summary(), file=sys.stderr)
+            next_progress += progress_every
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="활동 카탈로그를 기존 데이터를 지우지 않고 가져옵니다.")
+    parser.add_argument("source", nargs="?", help="JSONL 또는 CSV 파일 경로 (JSONL은 '-'로 표준 입력)")
+    parser.add_argument("--synthetic", type=int, default=0, help="파일 대신 더미 데이터 기반 합성 활동 N개를 가져옵니다")
+    parser.add_argument("--seed", type=int, default=0, help="--synthetic 난수 시드")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--skip-category-tree", action="store_true", help="기본 카테고리 트리를 upsert하지 않습니다")
+    parser.add_argument("--rebuild", action="store_true", help="증분 갱신 대신 가져온 뒤 카테고리 play_attributes를 전체 재계산합니다")
+    args = parser.parse_args()
+    if not args.source and not args.synthetic:
+        parser.error("source 또는 --synthetic 중 하나가 필요합니다")
+
+    client = MongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DATABASE]
+
+    if not args.skip_category_tree:
+        ensure_category_tree(db)
+        bump_catalog_version_sync(db, CATEGORIES_CATALOG)
+    ensure_activity_indexes(db)
+
+    records = iter_synthetic_records(db, args.synthetic, args.seed) if args.synthetic else iter_file_records(args.source)
+    stats = import_records(db, records, args.chunk_size, maintain_centroids=not args.rebuild)
+    bump_catalog_version_sync(db, ACTIVITIES_CATALOG)
+    print(stats.summary())
+    for category, count in stats.unknown_categories.most_common(10):
+        print(f"  알 수 없는 카테고리 {category!r}: {count}건")
+
+    if stats.centroid_updates:
+        bump_catalog_version_sync(db, CATEGORIES_CATALOG)
+    if args.rebuild:
+        start = time.perf_counter()
+        rebuild_centroids_sync(db)
+        print(f"카테고리 play_attributes 재계산 완료 ({time.perf_counter() - start:.1f}s)")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
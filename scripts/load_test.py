@@ -0,0 +1,263 @@
+"""
+HTTP API 부하 테스트 도구.
+
+N개의 그룹 세션을 동시에 실행합니다. 각 세션은 /create_user/로 사용자를 만들고 /token으로 로그인한 뒤
+그룹을 생성/참여하고, 시나리오 비율(--mix)에 따라
+recommend-categories → schedules → 스케줄 확정 흐름 등을 수행합니다.
+엔드포인트별 처리량, p50/p95/p99 지연 시간, 오류율을 JSON으로 출력합니다.
+
+기본값은 인메모리 MongoDB(mongomock-motor)와 Gemini 대체 구현을 사용하는 로컬 인프로세스 앱이며,
+--base-url을 지정하면 실행 중인 서버를 대상으로 합니다.
+
+    pip install mongomock-motor httpx
+    python scripts/load_test.py --groups 50 --group-size 4 --concurrency 10 --mix schedule=1,recommend=2,browse=2
+    python scripts/load_test.py --base-url http://localhost:8000 --groups 20
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings는 필수 환경 변수를 요구하므로 로컬 실행용 기본값을 채워 둡니다.
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DATABASE", "playfriends_loadtest")
+os.environ.setdefault("GEMINI_API_KEY", "loadtest")
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("httpx가 필요합니다: pip install httpx")
+
+API_PREFIX = "/api/v1"
+SCENARIOS = ("schedule", "recommend", "browse")
+
+
+class LoadStats:
+    """엔드포인트 템플릿별 지연 시간과 상태 코드를 수집합니다."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.status_codes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.sessions_completed = 0
+        self.sessions_failed = 0
+
+    def record(self, endpoint: str, elapsed: float, status_code: Optional[int]):
+        self.latencies[endpoint].append(elapsed)
+        self.status_codes[endpoint][str(status_code) if status_code else "exception"] += 1
+        if status_code is None or status_code >= 400:
+            self.errors[endpoint] += 1
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        endpoints = {}
+        total_requests = 0
+        total_errors = 0
+        for endpoint, samples in sorted(self.latencies.items()):
+            values = np.array(samples) * 1000
+            count = len(samples)
+            total_requests += count
+            total_errors += self.errors[endpoint]
+            endpoints[endpoint] = {
+                "count": count,
+                "throughput_rps": count / duration if duration else None,
+                "error_rate": self.errors[endpoint] / count,
+                "status_codes": dict(self.status_codes[endpoint]),
+                "latency_ms": {
+                    "p50": float(np.percentile(values, 50)),
+                    "p95": float(np.percentile(values, 95)),
+                    "p99": float(np.percentile(values, 99)),
+                    "mean": float(values.mean()),
+                    "max": float(values.max()),
+                },
+            }
+        return {
+            "duration_seconds": duration,
+            "requests": total_requests,
+            "throughput_rps": total_requests / duration if duration else None,
+            "error_rate": total_errors / total_requests if total_requests else 0.0,
+            "sessions_completed": self.sessions_completed,
+            "sessions_failed": self.sessions_failed,
+            "sessions_per_second": self.sessions_completed / duration if duration else None,
+            "endpoints": endpoints,
+        }
+
+
+class SessionError(Exception):
+    pass
+
+
+class GroupSession:
+    """그룹 하나의 생성부터 스케줄 확정까지의 사용자 흐름을 실행합니다."""
+
+    def __init__(self, client: httpx.AsyncClient, stats: LoadStats, args, scenario: str):
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.scenario = scenario
+        self.run_id = uuid.uuid4().hex[:10]
+
+    async def _request(self, method: str, endpoint: str, url: str, token: Optional[str] = None, **kwargs) -> httpx.Response:
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, API_PREFIX + url, headers=headers, **kwargs)
+        except Exception as e:
+            self.stats.record(endpoint, time.perf_counter() - start, None)
+            raise SessionError(f"{endpoint}: {e}")
+        self.stats.record(endpoint, time.perf_counter() - start, response.status_code)
+        if response.status_code >= 400:
+            raise SessionError(f"{endpoint}: HTTP {response.status_code}")
+        return response
+
+    async def _create_and_login(self, index: int) -> Dict[str, str]:
+        userid = f"load-{self.run_id}-{index}"
+        password = "loadtest-password"
+        user = await self._request("POST", "POST /create_user/", "/create_user/", json={
+            "userid": userid,
+            "username": f"load{index}",
+            "password": password,
+        })
+        token = await self._request("POST", "POST /token", "/token", json={"userid": userid, "password": password})
+        return {"id": user.json()["_id"], "userid": userid, "token": token.json()["access_token"]}
+
+    async def run(self):
+        users = [await self._create_and_login(i) for i in range(self.args.group_size)]
+        owner = users[0]
+
+        starttime = datetime.datetime(2025, 7, 19, 10, 0)
+        group = await self._request("POST", "POST /groups/", "/groups/", owner["token"], json={
+            "groupname": f"load-{self.run_id}",
+            "starttime": starttime.isoformat(),
+            "endtime": (starttime + datetime.timedelta(hours=12)).isoformat(),
+        })
+        group_id = group.json()["_id"]
+
+        for member in users[1:]:
+            await self._request("POST", "POST /groups/{group_id}/join", f"/groups/{group_id}/join", member["token"])
+
+        if self.scenario == "browse":
+            await self._request("GET", "GET /groups/{group_id}", f"/groups/{group_id}")
+            await self._request("GET", "GET /users/me", "/users/me", owner["token"])
+            return
+
+        recommended = await self._request(
+            "POST", "POST /groups/{group_id}/recommend-categories", f"/groups/{group_id}/recommend-categories", owner["token"]
+        )
+        if self.scenario == "recommend":
+            return
+
+        categories = recommended.json()["categories"][:self.args.schedule_categories]
+        schedules = await self._request(
+            "POST", "POST /groups/{group_id}/schedules", f"/groups/{group_id}/schedules", owner["token"],
+            json={"categories": categories},
+        )
+        suggestion = schedules.json()["schedules"][0]
+        await self._request("POST", "POST /groups/schedule", "/groups/schedule", json=suggestion)
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def _build_local_client() -> httpx.AsyncClient:
+    """인메모리 MongoDB와 Gemini 대체 구현으로 앱을 구성하고 ASGI 트랜스포트 클라이언트를 반환합니다."""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("로컬 모드에는 mongomock-motor가 필요합니다: pip install mongomock-motor")
+
+    from app.core.config import settings
+    from app.db.session import get_db
+    from app.main import app as fastapi_app
+    import app.services.group_service as group_service_module
+    from scripts.benchmark_schedules import StubGeminiService, seed_catalog
+
+    mock_client = AsyncMongoMockClient()
+    await seed_catalog(mock_client[settings.MONGO_DATABASE], num_activities=1000, seed=0)
+
+    fastapi_app.dependency_overrides[get_db] = lambda: mock_client
+    group_service_module.GeminiService = StubGeminiService
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=fastapi_app), base_url="http://loadtest", timeout=None)
+
+
+async def run_load_test(args) -> Dict[str, Any]:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        client = await _build_local_client()
+
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+    scenarios = rng.choices(list(args.mix), weights=list(args.mix.values()), k=args.groups)
+
+    async def worker(scenario: str):
+        async with semaphore:
+            try:
+                await GroupSession(client, stats, args, scenario).run()
+                stats.sessions_completed += 1
+            except SessionError as e:
+                stats.sessions_failed += 1
+                if args.verbose:
+                    print(f"session failed: {e}", file=sys.stderr)
+
+    start = time.perf_counter()
+    async with client:
+        await asyncio.gather(*(worker(scenario) for scenario in scenarios))
+    duration = time.perf_counter() - start
+
+    report = stats.summary(duration)
+    report["config"] = {
+        "target": args.base_url or "local",
+        "groups": args.groups,
+        "group_size": args.group_size,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "schedule_categories": args.schedule_categories,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive concurrent group sessions against the PlayFriends HTTP API.")
+    parser.add_argument("--base-url", help="대상 서버 주소 (미지정 시 인메모리 로컬 앱)")
+    parser.add_argument("--groups", type=int, default=20, help="실행할 그룹 세션 수")
+    parser.add_argument("--group-size", type=int, default=3, help="그룹당 사용자 수")
+    parser.add_argument("--concurrency", type=int, default=5, help="동시에 실행할 세션 수")
+    parser.add_argument("--mix", type=_parse_mix, default={"schedule": 1.0}, help="시나리오 비율 (예: schedule=1,recommend=2,browse=2)")
+    parser.add_argument("--schedule-categories", type=int, default=3, help="스케줄 요청에 사용할 추천 카테고리 수")
+    parser.add_argument("--timeout", type=float, default=60.0, help="원격 서버 요청 타임아웃 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON을 저장할 경로 (기본: 표준 출력)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import os
+import random
+import sys
+from typing import Dict, Iterator, List
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.enums import (
+    FoodIngredient,
+    FoodTaste,
+    FoodCookingMethod,
+    FoodCuisineType,
+)
+from app.models.activity import ActivityModel, FoodAttributes, PlayAttributes, GeoJson
+from scripts.dummydata import get_dummy_activities
+
+PLAY_JITTER = 0.15  # play_attributes에 더할 정규분포 노이즈의 표준편차
+FOOD_TOGGLE_PROBABILITY = 0.2  # 음식 속성 항목별로 값 하나를 뒤집을 확률
+LOCATION_JITTER = 0.03  # 위/경도에 더할 균등분포 노이즈의 범위 (도)
+
+_FOOD_ENUMS = {
+    "ingredients": FoodIngredient,
+    "tastes": FoodTaste,
+    "cooking_methods": FoodCookingMethod,
+    "cuisine_types": FoodCuisineType,
+}
+
+
+def _clip(value: float) -> float:
+    return max(-1.0, min(1.0, value))
+
+
+def _perturb_play(attrs: PlayAttributes, rng: random.Random) -> PlayAttributes:
+    return PlayAttributes(**{
+        key: round(_clip(value + rng.gauss(0, PLAY_JITTER)), 3)
+        for key, value in attrs.model_dump().items()
+    })
+
+
+def _perturb_food(attrs: FoodAttributes, rng: random.Random) -> FoodAttributes:
+    values = {}
+    for key, enum in _FOOD_ENUMS.items():
+        members = list(getattr(attrs, key))
+        if rng.random() < FOOD_TOGGLE_PROBABILITY:
+            member = rng.choice(list(enum))
+            if member in members:
+                members.remove(member)
+            else:
+                members.append(member)
+        values[key] = members
+    return FoodAttributes(**values)
+
+
+def _perturb_location(location: GeoJson, rng: random.Random) -> GeoJson:
+    lon, lat = location.coordinates
+    return GeoJson(coordinates=[
+        round(lon + rng.uniform(-LOCATION_JITTER, LOCATION_JITTER), 5),
+        round(lat + rng.uniform(-LOCATION_JITTER, LOCATION_JITTER), 5),
+    ])
+
+
+def iter_synthetic_activities(category_ids: Dict[str, str], count: int, seed: int = 0) -> Iterator[ActivityModel]:
+    """
+    get_dummy_activities의 활동을 템플릿으로 하여 count개의 활동을 생성합니다.
+    처음 한 바퀴는 원본 더미 데이터를 그대로 내보내고, 이후에는 속성에 노이즈를 더한 복제본을 만듭니다.
+    카테고리 분포는 더미 데이터와 같은 비율로 유지됩니다.
+    """
+    rng = random.Random(seed)
+    templates = [activity for activity in get_dummy_activities(category_ids) if activity.category_id]
+    if not templates:
+        return
+
+    for i in range(count):
+        template = templates[i % len(templates)]
+        round_no = i // len(templates)
+        if round_no == 0:
+            yield template
+            continue
+
+        yield ActivityModel(
+            name=f"{template.name} #{round_no}",
+            type=template.type,
+            category_id=template.category_id,
+            location=_perturb_location(template.location, rng) if template.location else None,
+            food_attributes=_perturb_food(template.food_attributes, rng) if template.food_attributes else None,
+            play_attributes=_perturb_play(template.play_attributes, rng) if template.play_attributes else None,
+        )
+
+
+def generate_synthetic_activities(category_ids: Dict[str, str], count: int, seed: int = 0) -> List[ActivityModel]:
+    return list(iter_synthetic_activities(category_ids, count, seed))
@@ -0,0 +1,251 @@
+"""
+협업 필터링 모델 학습 도구 (오프라인).
+
+activity_logs의 평점(사용자별·활동별 최신 평점)으로 bias가 있는 행렬 분해 모델을 ALS(Alternating Least Squares)로
+학습하고, 사용자/활동 잠재 벡터를 user_factors / activity_factors 컬렉션에 새 model_version으로 씁니다.
+모두 쓴 뒤에 catalog_meta의 factors 문서를 새 모델로 바꾸고 버전을 올리므로, 실행 중인 서버는 학습 도중의
+반쯤 쓰인 모델을 보지 않고 다음 요청부터 새 모델을 사용합니다. 이전 모델의 벡터는 마지막에 지웁니다.
+
+    예측 평점 = global_mean + 사용자 bias + 활동 bias + 사용자 벡터 · 활동 벡터
+
+사용 예
+    python scripts/train_factors.py
+    python scripts/train_factors.py --factors 32 --reg 0.05 --iterations 20 --holdout 0.1
+    python scripts/train_factors.py --holdout 0.1 --dry-run    # 평가만 하고 쓰지 않음
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from pymongo import ASCENDING, InsertOne, MongoClient
+from pymongo.database import Database
+
+# 프로젝트 루트 경로를 sys.path에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# .env 파일 로드
+load_dotenv()
+
+from app.core.config import settings
+from app.db.catalog_meta import FACTORS_CATALOG
+
+WRITE_CHUNK_SIZE = 1000
+
+
+class Ratings:
+    """(사용자 행, 활동 행, 평점) 삼중항과 행 번호 <-> ID 매핑."""
+
+    def __init__(self, user_ids: List[str], activity_ids: List[str], users: np.ndarray, items: np.ndarray, values: np.ndarray):
+        self.user_ids = user_ids
+        self.activity_ids = activity_ids
+        self.users = users
+        self.items = items
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def subset(self, mask: np.ndarray) -> "Ratings":
+        return Ratings(self.user_ids, self.activity_ids, self.users[mask], self.items[mask], self.values[mask])
+
+
+def load_ratings(db: Database) -> Ratings:
+    """activity_logs에서 (사용자, 활동)마다 가장 최근 평점만 읽습니다."""
+    pipeline = [
+        {"$sort": {"timestamp": 1}},
+        {"$group": {"_id": {"user_id": "$user_id", "activity_id": "$activity_id"}, "rating": {"$last": "$rating"}}},
+    ]
+    user_rows: Dict[str, int] = {}
+    activity_rows: Dict[str, int] = {}
+    users, items, values = [], [], []
+    for doc in db.activity_logs.aggregate(pipeline, allowDiskUse=True):
+        key = doc["_id"]
+        users.append(user_rows.setdefault(key["user_id"], len(user_rows)))
+        items.append(activity_rows.setdefault(key["activity_id"], len(activity_rows)))
+        values.append(doc["rating"])
+    return Ratings(
+        list(user_rows),
+        list(activity_rows),
+        np.array(users, dtype=np.int64),
+        np.array(items, dtype=np.int64),
+        np.array(values, dtype=np.float64),
+    )
+
+
+def _grouped(rows: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """rows 값별로 정렬한 인덱스와 각 값의 시작 위치 (CSR의 indptr)."""
+    order = np.argsort(rows, kind="stable")
+    indptr = np.searchsorted(rows[order], np.arange(count + 1))
+    return order, indptr
+
+
+def _solve_side(
+    order: np.ndarray,
+    indptr: np.ndarray,
+    other: np.ndarray,
+    other_bias: np.ndarray,
+    other_rows: np.ndarray,
+    residual: np.ndarray,
+    reg: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    한쪽(사용자 또는 활동)의 [벡터, bias]를 다른 쪽을 고정한 채 정규화 최소제곱으로 구합니다.
+    정규화 계수는 평점 수에 비례합니다 (ALS-WR).
+    """
+    count = len(indptr) - 1
+    k = other.shape[1]
+    vectors = np.zeros((count, k), dtype=np.float64)
+    biases = np.zeros(count, dtype=np.float64)
+    design_all = np.hstack([other, np.ones((len(other), 1))])
+    identity = np.eye(k + 1)
+    for row in range(count):
+        indices = order[indptr[row]:indptr[row + 1]]
+        if len(indices) == 0:
+            continue
+        design = design_all[other_rows[indices]]
+        target = residual[indices] - other_bias[other_rows[indices]]
+        solution = np.linalg.solve(design.T @ design + reg * len(indices) * identity, design.T @ target)
+        vectors[row], biases[row] = solution[:k], solution[k]
+    return vectors, biases
+
+
+def predict(model: dict, users: np.ndarray, items: np.ndarray) -> np.ndarray:
+    return (
+        model["global_mean"]
+        + model["user_bias"][users]
+        + model["item_bias"][items]
+        + np.einsum("ij,ij->i", model["user_vectors"][users], model["item_vectors"][items])
+    )
+
+
+def rmse(model: dict, ratings: Ratings) -> float:
+    if len(ratings) == 0:
+        return float("nan")
+    prediction = np.clip(predict(model, ratings.users, ratings.items), 1, 5)
+    return float(np.sqrt(np.mean((prediction - ratings.values) ** 2)))
+
+
+def train_als(ratings: Ratings, factors: int, reg: float, iterations: int, seed: int, validation: Ratings = None) -> dict:
+    rng = np.random.default_rng(seed)
+    n_users, n_items = len(ratings.user_ids), len(ratings.activity_ids)
+    global_mean = float(ratings.values.mean())
+    residual = ratings.values - global_mean
+
+    model = {
+        "global_mean": global_mean,
+        "user_vectors": np.zeros((n_users, factors)),
+        "user_bias": np.zeros(n_users),
+        "item_vectors": rng.normal(0, 0.1, (n_items, factors)),
+        "item_bias": np.zeros(n_items),
+    }
+    user_order, user_indptr = _grouped(ratings.users, n_users)
+    item_order, item_indptr = _grouped(ratings.items, n_items)
+
+    for iteration in range(iterations):
+        start = time.perf_counter()
+        model["user_vectors"], model["user_bias"] = _solve_side(
+            user_order, user_indptr, model["item_vectors"], model["item_bias"], ratings.items, residual, reg
+        )
+        model["item_vectors"], model["item_bias"] = _solve_side(
+            item_order, item_indptr, model["user_vectors"], model["user_bias"], ratings.users, residual, reg
+        )
+        message = f"iteration {iteration + 1}/{iterations}: train rmse={rmse(model, ratings):.4f}"
+        if validation is not None:
+            message += f" holdout rmse={rmse(model, validation):.4f}"
+        print(f"{message} ({time.perf_counter() - start:.1f}s)")
+    return model
+
+
+def write_model(db: Database, ratings: Ratings, model: dict, factors: int) -> int:
+    """새 model_version으로 벡터를 쓰고 factors 버전을 올립니다. 새 model_version을 반환합니다."""
+    meta = db.catalog_meta.find_one({"_id": FACTORS_CATALOG}) or {}
+    model_version = meta.get("model_version", 0) + 1
+
+    db.user_factors.create_index([("model_version", ASCENDING), ("user_id", ASCENDING)])
+    db.activity_factors.create_index([("model_version", ASCENDING), ("activity_id", ASCENDING)])
+    # 이전 실행이 벡터를 쓰다가 중단되었으면 같은 model_version의 벡터가 남아 있으므로 먼저 지웁니다.
+    db.user_factors.delete_many({"model_version": {"$gte": model_version}})
+    db.activity_factors.delete_many({"model_version": {"$gte": model_version}})
+    for collection, ids, vectors, biases, key in (
+        (db.user_factors, ratings.user_ids, model["user_vectors"], model["user_bias"], "user_id"),
+        (db.activity_factors, ratings.activity_ids, model["item_vectors"], model["item_bias"], "activity_id"),
+    ):
+        operations = []
+        for entity_id, vector, bias in zip(ids, vectors, biases):
+            operations.append(InsertOne({key: entity_id, "model_version": model_version, "vector": vector.tolist(), "bias": float(bias)}))
+            if len(operations) >= WRITE_CHUNK_SIZE:
+                collection.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+
+    db.catalog_meta.update_one(
+        {"_id": FACTORS_CATALOG},
+        {
+            "$set": {
+                "model_version": model_version,
+                "global_mean": model["global_mean"],
+                "factors": factors,
+                "ratings": len(ratings),
+                "trained_at": datetime.datetime.now(datetime.timezone.utc),
+            },
+            "$inc": {"version": 1},
+        },
+        upsert=True,
+    )
+    # 요청을 처리 중이거나 CatalogCache가 아직 바뀌지 않은 워커(최대 CATALOG_CACHE_MAX_AGE_SECONDS)는 직전 모델을
+    # 계속 읽으므로 직전 버전은 남기고 그보다 오래된 벡터만 지웁니다.
+    db.user_factors.delete_many({"model_version": {"$lt": model_version - 1}})
+    db.activity_factors.delete_many({"model_version": {"$lt": model_version - 1}})
+    return model_version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="activity_logs 평점으로 협업 필터링 모델을 학습합니다.")
+    parser.add_argument("--factors", type=int, default=16, help="잠재 벡터 차원")
+    parser.add_argument("--reg", type=float, default=0.1, help="정규화 계수 (평점 수에 비례해 적용)")
+    parser.add_argument("--iterations", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--holdout", type=float, default=0.0, help="평가용으로 떼어 둘 평점 비율 (0이면 전체로 학습)")
+    parser.add_argument("--min-ratings", type=int, default=10, help="평점이 이보다 적으면 학습하지 않습니다")
+    parser.add_argument("--dry-run", action="store_true", help="학습/평가만 하고 모델을 쓰지 않습니다")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DATABASE]
+
+    ratings = load_ratings(db)
+    print(f"ratings={len(ratings)} users={len(ratings.user_ids)} activities={len(ratings.activity_ids)}")
+    if len(ratings) < args.min_ratings:
+        print(f"평점이 {args.min_ratings}개보다 적어 학습하지 않습니다.")
+        client.close()
+        return
+
+    validation = None
+    train = ratings
+    if args.holdout > 0:
+        holdout = np.random.default_rng(args.seed).random(len(ratings)) < args.holdout
+        train, validation = ratings.subset(~holdout), ratings.subset(holdout)
+        baseline = float(np.sqrt(np.mean((validation.values - train.values.mean()) ** 2)))
+        print(f"holdout={len(validation)} baseline rmse (global mean)={baseline:.4f}")
+
+    model = train_als(train, args.factors, args.reg, args.iterations, args.seed, validation)
+    if args.dry_run:
+        client.close()
+        return
+
+    if validation is not None:
+        # 평가가 끝났으면 떼어 둔 평점까지 포함해 다시 학습한 모델을 씁니다.
+        model = train_als(ratings, args.factors, args.reg, args.iterations, args.seed)
+    model_version = write_model(db, ratings, model, args.factors)
+    print(f"model_version={model_version} 저장 완료")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()